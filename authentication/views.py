@@ -8,50 +8,21 @@ from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 
 from main.models import UserProfile
+from main.roles import COACH, CUSTOMER, VENUE_OWNER, role_for_user
 
-ROLE_CUSTOMER = "CUSTOMER"
-ROLE_VENUE_OWNER = "VENUE_OWNER"
-ROLE_COACH = "COACH"
+ROLE_CUSTOMER = CUSTOMER
+ROLE_VENUE_OWNER = VENUE_OWNER
+ROLE_COACH = COACH
 
 
 def get_role_type(user: User) -> str:
     """Baca role dari UserProfile dan kembalikan string seperti di form Django."""
-    # Prioritaskan superuser/staff sebagai ADMIN
-    if user.is_superuser or user.is_staff:
-        return "ADMIN"
-
-    try:
-        profile = user.profile  # related_name='profile'
-    except UserProfile.DoesNotExist:
-        return ROLE_CUSTOMER
-
-    if profile.is_venue_owner:
-        return ROLE_VENUE_OWNER
-    if profile.is_coach:
-        return ROLE_COACH
-    return ROLE_CUSTOMER
+    return role_for_user(user).name
 
 
 def get_dashboard_redirect_name(user: User) -> str:
     """Mirror logika get_dashboard_redirect_url_name() versi HTML."""
-    if not user.is_authenticated:
-        return 'index'
-
-    if user.is_superuser or user.is_staff:
-        return 'admin_dashboard'
-
-    try:
-        profile = user.profile
-        if profile.is_venue_owner:
-            return 'venue_dashboard'
-        elif profile.is_coach:
-            return 'coach_profile'
-        elif profile.is_customer:
-            return 'home'
-    except UserProfile.DoesNotExist:
-        pass
-
-    return 'home'
+    return role_for_user(user).dashboard
 
 @csrf_exempt
 def login(request):
@@ -69,19 +40,10 @@ def login(request):
         if user.is_active:
             auth_login(request, user)
 
-            role_type = get_role_type(user)
-            redirect_name = get_dashboard_redirect_name(user)
-
-            try:
-                user_profile = UserProfile.objects.get(user=user)
-                if user_profile.is_venue_owner:
-                    role_type = 'VENUE_OWNER'
-                elif user_profile.is_coach:
-                    role_type = 'COACH'
-                else:
-                    role_type = 'CUSTOMER'
-            except UserProfile.DoesNotExist:
-                role_type = 'ADMIN' if user.is_superuser or user.is_staff else 'CUSTOMER'
+            role = role_for_user(user)
+            redirect_name = role.dashboard
+            # profil lebih diutamakan daripada status staff; ADMIN hanya tanpa profil
+            role_type = role._replace(is_admin=False).name if role.has_profile else role.name
             return JsonResponse({
                 "username": user.username,
                 "status": True,
@@ -11,7 +11,14 @@ from .models import (
     Booking,
     BookingEquipment,
     Transaction,
-    Review
+    Review,
+    VenueRatingSummary,
+    CoachRatingSummary,
+    VenueAvailability,
+    CoachAvailability,
+    VenueDailyRevenue,
+    CoachDailyRevenue,
+    EquipmentUsage
 )
 
 
@@ -27,4 +34,10 @@ admin.site.register(Booking)
 admin.site.register(BookingEquipment)
 admin.site.register(Transaction)
 admin.site.register(Review)
-
+admin.site.register(VenueRatingSummary)
+admin.site.register(CoachRatingSummary)
+admin.site.register(VenueAvailability)
+admin.site.register(CoachAvailability)
+admin.site.register(VenueDailyRevenue)
+admin.site.register(CoachDailyRevenue)
+admin.site.register(EquipmentUsage)
@@ -0,0 +1,212 @@
+"""
+Autocomplete nama venue, coach, area, dan olahraga dari memori proses.
+
+Indeksnya dua array terurut berisi (teks ternormalisasi, jenis, id):
+- awal nama ("lapangan senayan ..."), diutamakan di hasil, dan
+- awal setiap kata berikutnya ("senayan ..."), pelengkap bila kurang.
+Prefix dicari dengan bisect lalu dibaca berurutan sampai `limit` hasil
+unik, jadi satu permintaan tidak menyentuh database.
+
+Seperti refdata, indeks dimuat sekali per proses dan punya versi bersama
+(lihat versions). Signal model memanggil update()/remove() setelah
+commit: proses yang mengubah data menerapkan perubahan itu langsung ke
+indeksnya (insort), proses lain melihat versinya tertinggal dan memuat
+ulang paling lambat setelah SHARED_VERSION_TTL detik. versions.bump()
+mengembalikan versi sebelumnya, jadi proses tahu apakah ada perubahan
+lain di antaranya.
+
+search() berjalan tanpa lock. add()/remove() tidak mengubah array yang
+sedang dibaca: array baru dibuat lalu ditukar (biaya salinannya sama
+dengan insort), kunci dihapus sebelum labelnya, dan search() melewati
+kunci yang labelnya sudah hilang.
+
+AUTOCOMPLETE_MAX_KEYS membatasi jumlah kunci (kira-kira 200 byte per
+kunci). Bila penuh, kunci per kata dikorbankan lebih dulu, lalu entri baru
+tidak diindeks; stats() melaporkan berapa yang terlewat.
+"""
+import re
+import threading
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from . import versions
+from .models import CoachProfile, LocationArea, SportCategory, Venue
+
+KINDS = ('venue', 'coach', 'area', 'sport')
+DEFAULT_MAX_KEYS = 200_000
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_PREFIX_LENGTH = 50
+VERSION_NAME = 'autocomplete'
+WORD_RE = re.compile(r'[^\W_]+')
+
+_lock = threading.Lock()
+_local = {'version': None, 'index': None}
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall(text.lower()))
+
+
+def coach_label(first_name, last_name, username):
+    return f'{first_name} {last_name}'.strip() or username
+
+
+class AutocompleteIndex:
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS):
+        self.max_keys = max_keys
+        self.names = []
+        self.words = []
+        self.labels = {}
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self.names) + len(self.words)
+
+    def _keys(self, label):
+        """Kunci awal nama dan kunci awal tiap kata setelahnya."""
+        text = normalize(label)
+        if not text:
+            return None, []
+        words = text.split(' ')
+        return text, [' '.join(words[i:]) for i in range(1, len(words))]
+
+    def add(self, kind, pk, label):
+        """Menambah atau mengganti satu entri tanpa mengurutkan ulang."""
+        if (kind, pk) in self.labels:
+            self.remove(kind, pk)
+        name, words = self._keys(label)
+        if name is None:
+            return
+        if len(self) >= self.max_keys:
+            self.skipped += 1
+            return
+        names, new_words = list(self.names), list(self.words)
+        insort(names, (name, kind, pk))
+        for word in words[:self.max_keys - len(self) - 1]:
+            insort(new_words, (word, kind, pk))
+        self.labels[(kind, pk)] = label
+        self.names, self.words = names, new_words
+
+    def remove(self, kind, pk):
+        label = self.labels.get((kind, pk))
+        if label is None:
+            return
+        name, words = self._keys(label)
+        names, new_words = list(self.names), list(self.words)
+        for keys, text in [(names, name)] + [(new_words, word) for word in words]:
+            position = bisect_left(keys, (text, kind, pk))
+            if position < len(keys) and keys[position] == (text, kind, pk):
+                del keys[position]
+        self.names, self.words = names, new_words
+        del self.labels[(kind, pk)]
+
+    def search(self, prefix, kinds=KINDS, limit=DEFAULT_LIMIT):
+        """Maksimal `limit` (jenis, id, label): kecocokan awal nama dulu, lalu awal kata."""
+        prefix = normalize(prefix[:MAX_PREFIX_LENGTH])
+        if not prefix:
+            return []
+        results, seen = [], set()
+        for keys in (self.names, self.words):
+            position = bisect_left(keys, (prefix,))
+            while position < len(keys) and len(results) < limit:
+                text, kind, pk = keys[position]
+                if not text.startswith(prefix):
+                    break
+                position += 1
+                label = self.labels.get((kind, pk))
+                # entri yang sedang dihapus oleh thread lain
+                if label is None:
+                    continue
+                if kind in kinds and (kind, pk) not in seen:
+                    seen.add((kind, pk))
+                    results.append((kind, pk, label))
+        return results
+
+    def stats(self):
+        return {
+            'entries': len(self.labels),
+            'keys': len(self),
+            'max_keys': self.max_keys,
+            'skipped': self.skipped,
+        }
+
+
+def load_entries():
+    """(jenis, id, label) dari database untuk semua entri."""
+    yield from (('venue', pk, name) for pk, name in Venue.objects.values_list('id', 'name'))
+    coaches = CoachProfile.objects.values_list('id', 'user__first_name', 'user__last_name', 'user__username')
+    yield from (('coach', pk, coach_label(*names)) for pk, *names in coaches)
+    yield from (('area', pk, name) for pk, name in LocationArea.objects.values_list('id', 'name'))
+    yield from (('sport', pk, name) for pk, name in SportCategory.objects.values_list('id', 'name'))
+
+
+def build(entries, max_keys=None):
+    """Indeks baru dari `entries`; kunci nama diisi sebelum kunci kata agar anggaran memihak nama."""
+    if max_keys is None:
+        max_keys = getattr(settings, 'AUTOCOMPLETE_MAX_KEYS', DEFAULT_MAX_KEYS)
+    index = AutocompleteIndex(max_keys)
+    entries = list(entries)
+    for kind, pk, label in entries:
+        name, _ = index._keys(label)
+        if name is None:
+            continue
+        if len(index) >= max_keys:
+            index.skipped += 1
+            continue
+        index.labels[(kind, pk)] = label
+        index.names.append((name, kind, pk))
+    for kind, pk, label in entries:
+        if (kind, pk) in index.labels:
+            for word in index._keys(label)[1]:
+                if len(index) >= max_keys:
+                    break
+                index.words.append((word, kind, pk))
+    index.names.sort()
+    index.words.sort()
+    return index
+
+
+def get_version():
+    return versions.get(VERSION_NAME)
+
+
+def get_index():
+    """Indeks proses ini, dimuat ulang dari database bila versinya tertinggal."""
+    version = get_version()
+    if _local['index'] is None or _local['version'] != version:
+        index = build(load_entries())
+        with _lock:
+            _local.update(index=index, version=version)
+    return _local['index']
+
+
+def _apply(change):
+    previous, version = versions.bump(VERSION_NAME)
+    with _lock:
+        index = _local['index']
+        if index is not None and _local['version'] == previous:
+            change(index)
+            _local['version'] = version
+
+
+def update(kind, pk, label):
+    _apply(lambda index: index.add(kind, pk, label))
+
+
+def remove(kind, pk):
+    _apply(lambda index: index.remove(kind, pk))
+
+
+def suggest(prefix, kinds=KINDS, limit=DEFAULT_LIMIT):
+    return [
+        {'type': kind, 'id': pk, 'label': label}
+        for kind, pk, label in get_index().search(prefix, kinds, limit)
+    ]
+
+
+def clear_local_cache():
+    with _lock:
+        _local.update(index=None, version=None)
+    versions.clear_local_cache()
@@ -0,0 +1,119 @@
+"""
+Alokasi booking yang dipakai view web/AJAX (create_booking) dan API Flutter.
+
+Slot diklaim dengan satu UPDATE bersyarat
+    UPDATE ... SET is_booked = true WHERE id = ? AND is_booked = false
+lalu rowcount-nya dicek. Tidak ada baca-lalu-tulis dan tidak ada
+select_for_update: dari beberapa request yang berebut slot yang sama,
+hanya satu yang mendapat rowcount 1. Bila langkah berikutnya gagal,
+transaction.atomic() mengembalikan klaim yang sudah terjadi. UPDATE tidak
+memicu signal, jadi indeks slot (slot_index) diinvalidasi dan
+Venue.next_available_slot dihitung ulang (venue_sort) di sini.
+"""
+from datetime import datetime
+
+from django.db import transaction as db_transaction
+
+from .models import Booking, BookingEquipment, CoachSchedule, Transaction, VenueSchedule
+from .inventory import InsufficientStock, reserve_equipment
+from .schedules import materialize_slot, materialize_slot_at
+from .slot_index import invalidate_slot
+from .venue_sort import schedule_refresh
+
+SCHEDULE_UNAVAILABLE = "Jadwal tidak tersedia atau sudah dibooking."
+COACH_UNAVAILABLE = "Coach tidak tersedia pada jadwal yang dipilih."
+
+
+class BookingError(Exception):
+    """Booking ditolak; pesannya aman ditampilkan ke pengguna."""
+
+
+def claim_slot(model, slot_id, **changes):
+    """
+    Menandai slot terbooking bila masih kosong. True bila klaim berhasil.
+    `changes` ikut ditulis dalam UPDATE yang sama (mis. is_available=False).
+    """
+    return model.objects.filter(pk=slot_id, is_booked=False).update(is_booked=True, **changes) == 1
+
+
+def allocate_booking(customer, venue, schedule_ref, coach=None, coach_schedule_ref=None,
+                     equipment=(), payment_method='CASH', not_before=None,
+                     mark_unavailable=False):
+    """
+    Membuat Booking + BookingEquipment + Transaction (PENDING) untuk satu slot venue.
+
+    `schedule_ref` / `coach_schedule_ref` boleh berupa id baris atau slot_key.
+    Dengan `coach`, slot coach dicari pada tanggal dan jam yang sama dengan
+    slot venue; `coach_schedule_ref` yang tanggal atau jam mulainya berbeda
+    ditolak. `equipment` adalah daftar (Equipment, jumlah) yang dipesan
+    dari ledger slot yang sama (lihat inventory). `not_before` (datetime naif, waktu lokal) menolak
+    slot yang sudah lewat; `mark_unavailable` ikut mematikan is_available
+    slot yang diklaim. Melempar BookingError bila slot tidak bisa diambil.
+    """
+    changes = {'is_available': False} if mark_unavailable else {}
+    with db_transaction.atomic():
+        try:
+            schedule = materialize_slot(VenueSchedule, 'venue', venue, schedule_ref)
+        except (VenueSchedule.DoesNotExist, ValueError):
+            raise BookingError(SCHEDULE_UNAVAILABLE)
+        if not_before and datetime.combine(schedule.date, schedule.start_time) < not_before:
+            raise BookingError(SCHEDULE_UNAVAILABLE)
+        if not claim_slot(VenueSchedule, schedule.pk, **changes):
+            raise BookingError(SCHEDULE_UNAVAILABLE)
+        schedule.is_booked = True
+        invalidate_slot(schedule)
+        schedule_refresh(schedule.venue_id)
+
+        coach_schedule = None
+        if coach is not None or coach_schedule_ref:
+            try:
+                if coach_schedule_ref:
+                    coach_schedule = materialize_slot(CoachSchedule, 'coach', None, coach_schedule_ref)
+                else:
+                    coach_schedule = materialize_slot_at(
+                        CoachSchedule, 'coach', coach, schedule.date, schedule.start_time
+                    )
+            except (CoachSchedule.DoesNotExist, ValueError):
+                raise BookingError(COACH_UNAVAILABLE)
+            # slot coach dari klien harus tepat pada tanggal dan jam slot venue
+            if (coach_schedule.date, coach_schedule.start_time) != (schedule.date, schedule.start_time):
+                raise BookingError(COACH_UNAVAILABLE)
+            if coach is not None and coach_schedule.coach_id != coach.pk:
+                raise BookingError(COACH_UNAVAILABLE)
+            if not claim_slot(CoachSchedule, coach_schedule.pk, **changes):
+                raise BookingError(COACH_UNAVAILABLE)
+            coach_schedule.is_booked = True
+            invalidate_slot(coach_schedule)
+
+        try:
+            reserve_equipment(schedule.date, schedule.start_time, equipment)
+        except InsufficientStock as e:
+            raise BookingError(str(e))
+
+        venue_price = venue.price_per_hour or 0
+        coach_price = (coach_schedule.coach.rate_per_hour or 0) if coach_schedule else 0
+        equipment_rows = [
+            (item, quantity, (item.rental_price or 0) * quantity) for item, quantity in equipment
+        ]
+        equipment_total = sum(sub_total for _, _, sub_total in equipment_rows)
+
+        booking = Booking.objects.create(
+            customer=customer,
+            venue_schedule=schedule,
+            coach_schedule=coach_schedule,
+            total_price=venue_price + coach_price + equipment_total,
+        )
+        if equipment_rows:
+            BookingEquipment.objects.bulk_create([
+                BookingEquipment(booking=booking, equipment=item, quantity=quantity, sub_total=sub_total)
+                for item, quantity, sub_total in equipment_rows
+            ])
+        Transaction.objects.create(
+            booking=booking,
+            status='PENDING',
+            payment_method=payment_method,
+            revenue_venue=venue_price + equipment_total,
+            revenue_coach=coach_price,
+            revenue_platform=0,
+        )
+    return booking
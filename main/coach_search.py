@@ -0,0 +1,121 @@
+"""
+Pencarian nama coach yang toleran salah ketik.
+
+CoachProfile.search_name berisi nama depan, nama belakang, dan username
+(huruf kecil), diisi signal CoachProfile/User.
+
+- PostgreSQL: pg_trgm, `kueri <% search_name` dengan index GIN
+  gin_trgm_ops dan peringkat word_similarity().
+- Database lain: trigram search_name disimpan di CoachNameTrigram
+  (dipecah seperti pg_trgm: tiap kata diberi dua spasi di depan dan satu
+  di belakang). Skornya bagian trigram kueri yang ada di nama coach,
+  padanan word_similarity, dihitung di subquery yang memakai index
+  (trigram, coach).
+
+Keduanya memakai ambang MIN_SIMILARITY, sehingga awalan nama ("andi"
+untuk "andika") dan satu huruf yang salah ketik tetap ditemukan.
+Hasilnya tetap queryset CoachProfile biasa, jadi filter olahraga/area
+ikut dalam query yang sama.
+"""
+import math
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, Count, FloatField, OuterRef, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .models import CoachNameTrigram, CoachProfile
+
+# sama dengan pg_trgm.word_similarity_threshold bawaan
+MIN_SIMILARITY = 0.6
+MAX_QUERY_LENGTH = 100
+WORD_RE = re.compile(r'[^\W_]+')
+REBUILD_BATCH_SIZE = 500
+
+
+def search_words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def name_trigrams(text):
+    """Himpunan trigram gaya pg_trgm dari `text`."""
+    trigrams = set()
+    for word in search_words(text):
+        padded = f'  {word} '
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def coach_search_name(user):
+    parts = (user.first_name, user.last_name, user.username)
+    return ' '.join(part for part in parts if part).lower()[:320]
+
+
+def search_coaches(queryset, query):
+    """
+    `queryset` CoachProfile yang namanya mirip `query`, dengan anotasi
+    search_rank (0..1, makin besar makin mirip). Urutannya tidak diubah.
+    """
+    query = ' '.join(search_words(query[:MAX_QUERY_LENGTH]))
+    trigrams = sorted(name_trigrams(query))
+    if not trigrams:
+        return queryset.annotate(search_rank=Value(0.0)).none()
+
+    if connection.vendor == 'postgresql':
+        return queryset.filter(
+            RawSQL('%s <%% search_name', (query,), output_field=BooleanField())
+        ).annotate(search_rank=RawSQL('word_similarity(%s, search_name)', (query,), output_field=FloatField()))
+
+    matching = CoachNameTrigram.objects.filter(trigram__in=trigrams)
+    candidates = (
+        matching.values('coach')
+        .annotate(hits=Count('id'))
+        .filter(hits__gte=math.ceil(MIN_SIMILARITY * len(trigrams)))
+        .values('coach')
+    )
+    hits = matching.filter(coach=OuterRef('pk')).values('coach').annotate(hits=Count('id')).values('hits')
+    return queryset.filter(id__in=candidates).annotate(
+        search_rank=Cast(Subquery(hits), FloatField()) / Value(float(len(trigrams)))
+    )
+
+
+def index_coach(coach):
+    """Menulis ulang trigram nama `coach`; PostgreSQL memakai index GIN sehingga dilewati."""
+    if connection.vendor == 'postgresql':
+        return
+    CoachNameTrigram.objects.filter(coach=coach).delete()
+    CoachNameTrigram.objects.bulk_create([
+        CoachNameTrigram(coach_id=coach.id, trigram=trigram) for trigram in sorted(name_trigrams(coach.search_name))
+    ])
+
+
+def rebuild_coach_search():
+    """Menghitung ulang search_name dan trigram semua coach; mengembalikan jumlah coach."""
+    use_trigram_table = connection.vendor != 'postgresql'
+    if use_trigram_table:
+        CoachNameTrigram.objects.all().delete()
+
+    count = 0
+    coaches = CoachProfile.objects.select_related('user').only(
+        'id', 'search_name', 'user__first_name', 'user__last_name', 'user__username'
+    ).order_by('id')
+    batch = []
+    for coach in coaches.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        coach.search_name = coach_search_name(coach.user)
+        batch.append(coach)
+        if len(batch) == REBUILD_BATCH_SIZE:
+            count += _save_batch(batch, use_trigram_table)
+            batch = []
+    return count + _save_batch(batch, use_trigram_table)
+
+
+def _save_batch(coaches, use_trigram_table):
+    CoachProfile.objects.bulk_update(coaches, ['search_name'])
+    if use_trigram_table:
+        CoachNameTrigram.objects.bulk_create([
+            CoachNameTrigram(coach_id=coach.id, trigram=trigram)
+            for coach in coaches
+            for trigram in sorted(name_trigrams(coach.search_name))
+        ])
+    return len(coaches)
@@ -0,0 +1,141 @@
+"""
+Jumlah venue per area, olahraga, dan rentang harga untuk halaman daftar venue.
+
+Satu query GROUP BY (location_id, sport_category_id, rentang harga)
+dengan filter pencarian teks menghasilkan beberapa puluh baris; jumlah
+per facet dihitung dari baris-baris itu di Python. Seperti facet pada
+umumnya, jumlah sebuah facet memakai semua filter lain kecuali filter
+facet itu sendiri, sehingga pilihan lain tetap terlihat jumlahnya.
+
+Hasil GROUP BY disimpan di cache Django selama FACET_CACHE_TIMEOUT detik
+dengan kunci kata-kata pencarian yang sudah dinormalisasi; filter area,
+olahraga, dan harga diterapkan di memori, jadi satu entri cache melayani
+semua kombinasinya. Perubahan venue baru terlihat setelah TTL habis.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from .models import Venue
+from .refdata import by_name, location_areas, sport_categories
+from .venue_search import matching_venue_ids, search_terms
+
+FACET_CACHE_TIMEOUT = 60
+CACHE_KEY = 'facets:venue:{}'
+SEARCH_COLUMNS = ('name', 'description')
+
+# (kunci, label, batas bawah inklusif, batas atas eksklusif)
+PRICE_BUCKETS = (
+    ('lt100', 'Di bawah Rp100.000', None, 100000),
+    ('100-200', 'Rp100.000 - Rp199.999', 100000, 200000),
+    ('200-300', 'Rp200.000 - Rp299.999', 200000, 300000),
+    ('gte300', 'Rp300.000 ke atas', 300000, None),
+)
+
+
+class FacetError(ValueError):
+    """Parameter filter tidak valid; pesannya ditampilkan ke klien."""
+
+
+def _optional_id(params, name):
+    raw = params.get(name, '')
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise FacetError(f"Parameter {name} harus berupa id.")
+
+
+def parse_filters(params):
+    """Filter daftar venue yang sudah dinormalisasi dari query string."""
+    price = params.get('price', '') or None
+    if price is not None:
+        price_q(price)
+    return {
+        'search': params.get('search', '').strip(),
+        'location': _optional_id(params, 'location'),
+        'sport': _optional_id(params, 'sport'),
+        'price': price,
+    }
+
+
+def _bucket_q(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(price_per_hour__gte=low)
+    if high is not None:
+        condition &= Q(price_per_hour__lt=high)
+    return condition
+
+
+def price_q(key):
+    """Q untuk venue di rentang harga `key`."""
+    for bucket, _, low, high in PRICE_BUCKETS:
+        if bucket == key:
+            return _bucket_q(low, high)
+    raise FacetError("Parameter price tidak dikenal.")
+
+
+def _bucket_case():
+    return Case(
+        *(When(_bucket_q(low, high), then=Value(key)) for key, _, low, high in PRICE_BUCKETS),
+        output_field=CharField(),
+    )
+
+
+def grouped_counts(search):
+    """[(location_id, sport_id, rentang harga, jumlah)] untuk teks pencarian `search`."""
+    terms = ' '.join(search_terms(search))
+    if search and not terms:
+        # sama dengan search_venues(): kueri tanpa kata tidak cocok dengan venue mana pun
+        return []
+    key = CACHE_KEY.format(hashlib.md5(terms.encode()).hexdigest())
+    rows = cache.get(key)
+    if rows is None:
+        venues = Venue.objects.all()
+        if terms:
+            venues = venues.filter(id__in=matching_venue_ids(terms, SEARCH_COLUMNS))
+        rows = [
+            (row['location_id'], row['sport_category_id'], row['bucket'], row['count'])
+            for row in venues.values('location_id', 'sport_category_id', bucket=_bucket_case())
+            .annotate(count=Count('id')).order_by()
+        ]
+        cache.set(key, rows, FACET_CACHE_TIMEOUT)
+    return rows
+
+
+def _matches(row, selected, skip=None):
+    return all(value is None or row[i] == value for i, value in enumerate(selected) if i != skip)
+
+
+def venue_facets(filters):
+    """Jumlah venue per pilihan filter dan total untuk `filters` dari parse_filters()."""
+    rows = grouped_counts(filters['search'])
+    # urutan sama dengan kolom baris grouped_counts()
+    selected = (filters['location'], filters['sport'], filters['price'])
+
+    def counts(position):
+        totals = {}
+        for row in rows:
+            if _matches(row, selected, skip=position):
+                totals[row[position]] = totals.get(row[position], 0) + row[3]
+        return totals
+
+    by_location, by_sport, by_price = counts(0), counts(1), counts(2)
+    return {
+        'total': sum(row[3] for row in rows if _matches(row, selected)),
+        'locations': [
+            {'id': area.id, 'name': area.name, 'count': by_location.get(area.id, 0)}
+            for area in by_name(location_areas())
+        ],
+        'sports': [
+            {'id': sport.id, 'name': sport.name, 'count': by_sport.get(sport.id, 0)}
+            for sport in by_name(sport_categories())
+        ],
+        'prices': [
+            {'key': key, 'label': label, 'count': by_price.get(key, 0)}
+            for key, label, _, _ in PRICE_BUCKETS
+        ],
+    }
@@ -4,6 +4,8 @@ from django.contrib.auth.models import User
 from .models import UserProfile, Venue, VenueSchedule, Equipment, LocationArea, SportCategory, CoachProfile, CoachSchedule
 from django.forms.widgets import DateInput, TextInput
 from .models import Review
+from .schedules import MAX_GENERATE_DAYS
+from .revenue import DEFAULT_BOOKINGS_PER_VENUE, MAX_BOOKINGS_PER_VENUE
 
 ROLE_CHOICES = [
     ('CUSTOMER', 'Customer'),
@@ -66,11 +68,28 @@ class VenueForm(forms.ModelForm):
         })
 
 
+WEEKDAY_CHOICES = [
+    (0, 'Senin'),
+    (1, 'Selasa'),
+    (2, 'Rabu'),
+    (3, 'Kamis'),
+    (4, 'Jumat'),
+    (5, 'Sabtu'),
+    (6, 'Minggu'),
+]
+
+SLOT_LENGTH_CHOICES = [
+    (30, '30 menit'),
+    (60, '1 jam'),
+    (90, '1,5 jam'),
+    (120, '2 jam'),
+]
+
 class VenueScheduleForm(forms.ModelForm):
 
     end_time_global = forms.CharField(
         label="Waktu Selesai Harian",
-        help_text="Waktu terakhir sesi (mis. 22:00). Slot dibuat per jam hingga waktu ini.",
+        help_text="Waktu terakhir sesi (mis. 22:00). Slot dibuat sesuai durasi slot hingga waktu ini.",
         widget=TextInput(
             attrs={
                 'class': 'timepicker mt-1 block w-full rounded-md border-gray-300 shadow-sm sm:text-sm',
@@ -80,6 +99,42 @@ class VenueScheduleForm(forms.ModelForm):
         required=True
     )
 
+    end_date = forms.DateField(
+        label="Sampai Tanggal",
+        help_text="Opsional. Kosongkan untuk membuat slot di satu tanggal saja.",
+        widget=DateInput(
+            attrs={
+                'type': 'text',
+                'class': 'datepicker mt-1 block w-full rounded-md border-gray-300 shadow-sm sm:text-sm',
+                'placeholder': 'Pilih tanggal akhir (opsional)'
+            }
+        ),
+        required=False
+    )
+
+    weekdays = forms.TypedMultipleChoiceField(
+        label="Hari",
+        choices=WEEKDAY_CHOICES,
+        coerce=int,
+        required=False,
+        widget=forms.CheckboxSelectMultiple(
+            attrs={'class': 'h-4 w-4 rounded border-gray-300 text-teal-600'}
+        ),
+        help_text="Opsional. Kosongkan untuk semua hari."
+    )
+
+    slot_minutes = forms.TypedChoiceField(
+        label="Durasi Slot",
+        choices=SLOT_LENGTH_CHOICES,
+        coerce=int,
+        empty_value=60,
+        initial=60,
+        widget=forms.Select(
+            attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm sm:text-sm'}
+        ),
+        required=False
+    )
+
     class Meta:
         model = VenueSchedule
 
@@ -113,6 +168,18 @@ class VenueScheduleForm(forms.ModelForm):
         self.fields['date'].help_text = "Pilih tanggal untuk jadwal venue"
         self.fields['start_time'].help_text = "Format 24 jam (mis. 09:00)"
 
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('date')
+        end_date = cleaned_data.get('end_date') or start_date
+        if start_date and end_date:
+            if end_date < start_date:
+                self.add_error('end_date', "Tanggal akhir tidak boleh sebelum tanggal mulai.")
+            elif (end_date - start_date).days >= MAX_GENERATE_DAYS:
+                self.add_error('end_date', f"Rentang tanggal maksimal {MAX_GENERATE_DAYS} hari.")
+            cleaned_data['end_date'] = end_date
+        return cleaned_data
+
 
 class EquipmentForm(forms.ModelForm):
     class Meta:
@@ -231,6 +298,77 @@ class CoachScheduleForm(forms.ModelForm):
         self.fields['date'].help_text = "Pilih tanggal sesi"
         self.fields['start_time'].help_text = "Format 24 jam (mis. 08:00)"
 
+class AvailabilityTemplateForm(forms.Form):
+    """Pola ketersediaan mingguan untuk VenueAvailability / CoachAvailability."""
+    weekdays = forms.TypedMultipleChoiceField(
+        label="Hari",
+        choices=WEEKDAY_CHOICES,
+        coerce=int,
+        required=False,
+        help_text="Kosongkan untuk semua hari."
+    )
+    start_time = forms.TimeField(label="Jam Mulai")
+    end_time = forms.TimeField(label="Jam Selesai")
+    slot_minutes = forms.TypedChoiceField(
+        label="Durasi Slot",
+        choices=SLOT_LENGTH_CHOICES,
+        coerce=int,
+        empty_value=60,
+        required=False
+    )
+    valid_from = forms.DateField(label="Berlaku Mulai", required=False)
+    valid_until = forms.DateField(label="Berlaku Sampai", required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if start_time and end_time and end_time <= start_time:
+            self.add_error('end_time', "Jam selesai harus setelah jam mulai.")
+
+        valid_from = cleaned_data.get('valid_from')
+        valid_until = cleaned_data.get('valid_until')
+        if valid_from and valid_until and valid_until < valid_from:
+            self.add_error('valid_until', "Tanggal akhir tidak boleh sebelum tanggal mulai.")
+
+        weekdays = cleaned_data.get('weekdays') or [day for day, _ in WEEKDAY_CHOICES]
+        cleaned_data['weekdays'] = ''.join(str(day) for day in sorted(set(weekdays)))
+        cleaned_data['slot_minutes'] = cleaned_data.get('slot_minutes') or 60
+        return cleaned_data
+
+class RevenueFilterForm(forms.Form):
+    """Filter laporan pendapatan: rentang tanggal main, periode, dan halaman detail booking."""
+    GRANULARITY_CHOICES = [
+        ('', 'Tanpa periode'),
+        ('day', 'Harian'),
+        ('week', 'Mingguan'),
+        ('month', 'Bulanan'),
+    ]
+
+    start_date = forms.DateField(label="Dari Tanggal", required=False)
+    end_date = forms.DateField(label="Sampai Tanggal", required=False)
+    granularity = forms.ChoiceField(label="Periode", choices=GRANULARITY_CHOICES, required=False)
+    page = forms.IntegerField(min_value=1, required=False)
+    page_size = forms.IntegerField(min_value=1, max_value=MAX_BOOKINGS_PER_VENUE, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            self.add_error('end_date', "Tanggal akhir tidak boleh sebelum tanggal mulai.")
+        return cleaned_data
+
+    def report_kwargs(self):
+        cd = self.cleaned_data
+        return {
+            'start_date': cd.get('start_date'),
+            'end_date': cd.get('end_date'),
+            'granularity': cd.get('granularity') or None,
+            'page': cd.get('page') or 1,
+            'per_page': cd.get('page_size') or DEFAULT_BOOKINGS_PER_VENUE,
+        }
+
 class ReviewForm(forms.ModelForm):
     class Meta:
         model = Review
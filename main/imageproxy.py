@@ -0,0 +1,330 @@
+"""
+Cache disk untuk proxy_image.
+
+Gambar dari URL luar diambil sekali, diubah ukurannya ke lebar bucket
+terdekat (tanpa memperbesar) dan disimpan per varian (URL, lebar, format)
+di IMAGE_PROXY_CACHE_DIR (default MEDIA_ROOT/proxy_cache). Nama file adalah
+hash SHA-256 dari kunci varian dan dipakai juga sebagai ETag, sehingga
+permintaan berikutnya cukup membaca file atau dijawab 304.
+
+Ukuran total cache dibatasi IMAGE_PROXY_MAX_BYTES. Setiap cache hit
+memperbarui mtime file; evict() menghapus file dengan mtime tertua lebih
+dulu (LRU) sampai total di bawah batas. Menyapu direktori cache itu O(n),
+jadi tidak dijalankan setiap miss: proses menyapu setelah ia sendiri
+menulis (1 - EVICT_TO) * batas byte sejak sapuan terakhir, dan
+`evict_image_cache` bisa dijalankan berkala (cron) agar tulisan dari
+beberapa worker tetap terkendali.
+
+Jalur async (aget_variant) dipakai view proxy_image: pengambilan ke host
+luar berjalan di thread pool khusus berukuran IMAGE_PROXY_MAX_FETCHES
+lewat satu requests.Session bersama (koneksi di-pool), dan request
+bersamaan untuk URL yang sama menunggu future yang sama. Pool dan peta
+future berlaku per proses, bukan per event loop (di bawah WSGI setiap
+request async mendapat event loop sendiri). Request yang menunggu tidak
+memegang thread executor bawaan loop, jadi host luar yang lambat tidak
+menahan cache hit yang membaca disk lewat executor itu.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from django.conf import settings
+from PIL import Image, UnidentifiedImageError
+from requests.adapters import HTTPAdapter
+
+WIDTH_BUCKETS = (160, 320, 640, 960, 1280)
+FETCH_TIMEOUT = (3.05, 10)
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_FETCHES = 8
+EVICT_TO = 0.9
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'png': ('PNG', 'image/png'),
+}
+
+
+class ProxyImageError(Exception):
+    """Gambar sumber tidak bisa diambil atau bukan gambar."""
+
+
+def cache_dir():
+    return getattr(settings, 'IMAGE_PROXY_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'proxy_cache'))
+
+
+def max_cache_bytes():
+    return getattr(settings, 'IMAGE_PROXY_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+
+def max_fetches():
+    return getattr(settings, 'IMAGE_PROXY_MAX_FETCHES', DEFAULT_MAX_FETCHES)
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(max_fetches(), 10))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+http_session = _build_session()
+
+
+def width_bucket(width):
+    """Lebar bucket terkecil yang >= `width`; None berarti ukuran asli."""
+    try:
+        width = int(width)
+    except (TypeError, ValueError):
+        return None
+    if width <= 0:
+        return None
+    for bucket in WIDTH_BUCKETS:
+        if width <= bucket:
+            return bucket
+    return WIDTH_BUCKETS[-1]
+
+
+def choose_format(request):
+    """Format keluaran dari ?format=, atau WebP bila klien menerimanya."""
+    requested = request.GET.get('format', '').lower()
+    if requested == 'jpg':
+        requested = 'jpeg'
+    if requested in FORMATS:
+        return requested
+    if 'image/webp' in request.headers.get('Accept', ''):
+        return 'webp'
+    return None
+
+
+def variant_key(url, width, fmt):
+    raw = f"{url}\n{width or 'orig'}\n{fmt or 'source'}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def variant_path(key):
+    return os.path.join(cache_dir(), key[:2], key)
+
+
+def cached_variant(key):
+    """(path, content_type) bila varian sudah ada di cache; mtime diperbarui untuk LRU."""
+    path = variant_path(key)
+    try:
+        with open(path + '.type') as type_file:
+            content_type = type_file.read().strip()
+        os.utime(path)
+    except OSError:
+        return None
+    return path, content_type
+
+
+def fetch_source(url):
+    try:
+        with http_session.get(url, timeout=FETCH_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > MAX_SOURCE_BYTES:
+                    raise ProxyImageError("Gambar terlalu besar.")
+                chunks.append(chunk)
+    except requests.RequestException as e:
+        raise ProxyImageError(f"Error fetching image: {e}")
+    return b''.join(chunks)
+
+
+def render_variant(data, width, fmt):
+    """Bytes varian dan content type-nya; gambar dikecilkan ke `width` bila lebih lebar."""
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ProxyImageError("URL bukan gambar yang valid.")
+
+    source_format = (image.format or '').lower()
+    if fmt is None:
+        if width is None or image.width <= width:
+            content_type = Image.MIME.get(image.format, 'application/octet-stream')
+            return data, content_type
+        fmt = source_format if source_format in FORMATS else 'png'
+
+    if width is not None and image.width > width:
+        height = max(round(image.height * width / image.width), 1)
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+    pil_format, content_type = FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA')
+
+    output = BytesIO()
+    options = {'quality': 80} if pil_format in ('JPEG', 'WEBP') else {'optimize': True}
+    image.save(output, pil_format, **options)
+    return output.getvalue(), content_type
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def store_variant(key, data, content_type):
+    path = variant_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_atomic(path + '.type', content_type.encode())
+    _write_atomic(path, data)
+    if _note_written(len(data)):
+        evict()
+    return path
+
+
+_written_lock = threading.Lock()
+_written = 0  # byte varian yang ditulis proses ini sejak sapuan terakhir
+
+
+def _note_written(size):
+    """True bila tulisan proses ini sejak sapuan terakhir sudah memakan sisa ruang setelah evict()."""
+    global _written
+    with _written_lock:
+        _written += size
+        return _written >= max_cache_bytes() * (1 - EVICT_TO)
+
+
+def evict(limit=None):
+    """Menghapus varian yang paling lama tidak dipakai sampai total ukuran di bawah batas."""
+    global _written
+    limit = max_cache_bytes() if limit is None else limit
+    with _written_lock:
+        _written = 0
+    entries, total = [], 0
+    for root, _, files in os.walk(cache_dir()):
+        for name in files:
+            if name.endswith('.type') or name.startswith('.tmp-'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    if total <= limit:
+        return 0
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= limit * EVICT_TO:
+            break
+        for victim in (path, path + '.type'):
+            try:
+                os.unlink(victim)
+            except OSError:
+                pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def get_variant(url, width, fmt):
+    """(path, content_type) varian; mengambil dan merender sumber bila belum ada di cache."""
+    key = variant_key(url, width, fmt)
+    cached = cached_variant(key)
+    if cached is not None:
+        return cached
+    data, content_type = render_variant(fetch_shared(url), width, fmt)
+    return store_variant(key, data, content_type), content_type
+
+
+# --- Pengambilan bersama (per proses) ---
+
+_fetch_lock = threading.Lock()
+_fetch_pool = None  # (batas, ThreadPoolExecutor); dibuat ulang bila setting berubah
+_inflight = {}
+
+
+def _fetch_executor():
+    global _fetch_pool
+    limit = max_fetches()
+    with _fetch_lock:
+        if _fetch_pool is None or _fetch_pool[0] != limit:
+            if _fetch_pool is not None:
+                _fetch_pool[1].shutdown(wait=False)
+            _fetch_pool = (limit, ThreadPoolExecutor(max_workers=limit, thread_name_prefix='imageproxy-fetch'))
+        return _fetch_pool[1]
+
+
+def submit_fetch(url):
+    """
+    Future fetch_source(url) di pool pengambilan (paling banyak
+    IMAGE_PROXY_MAX_FETCHES sekaligus per proses). Selama pengambilan URL
+    yang sama masih berjalan, future yang sama dikembalikan.
+    """
+    executor = _fetch_executor()
+    with _fetch_lock:
+        future = _inflight.get(url)
+        started = future is None
+        if started:
+            future = _inflight[url] = executor.submit(fetch_source, url)
+    if started:
+        # di luar lock: callback langsung dijalankan bila pengambilan sudah selesai
+        future.add_done_callback(lambda done: _forget(url, done))
+    return future
+
+
+def _forget(url, future):
+    with _fetch_lock:
+        if _inflight.get(url) is future:
+            del _inflight[url]
+
+
+def fetch_shared(url):
+    """fetch_source() lewat pool pengambilan; memblokir thread pemanggil."""
+    return submit_fetch(url).result()
+
+
+# --- Jalur async ---
+
+async def afetch_source(url):
+    """fetch_source() lewat pool pengambilan tanpa memegang thread selama menunggu."""
+    # shield: request yang dibatalkan tidak ikut membatalkan pengambilan milik yang lain
+    return await asyncio.shield(asyncio.wrap_future(submit_fetch(url)))
+
+
+async def aget_variant(url, width, fmt):
+    """Versi async get_variant()."""
+    key = variant_key(url, width, fmt)
+    cached = await asyncio.to_thread(cached_variant, key)
+    if cached is not None:
+        return cached
+    data = await afetch_source(url)
+
+    def render_and_store():
+        # request lain dengan varian yang sama mungkin sudah menyimpannya
+        cached = cached_variant(key)
+        if cached is not None:
+            return cached
+        variant, content_type = render_variant(data, width, fmt)
+        return store_variant(key, variant, content_type), content_type
+
+    return await asyncio.to_thread(render_and_store)
+
+
+def read_file(path):
+    with open(path, 'rb') as image_file:
+        return image_file.read()
+
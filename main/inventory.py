@@ -0,0 +1,118 @@
+"""
+Ledger peralatan per slot waktu.
+
+Equipment.stock_quantity adalah jumlah unit yang dimiliki venue. Unit yang
+sedang dipesan dicatat per (equipment, tanggal, jam mulai) di
+EquipmentUsage, sehingga booking di jam yang berbeda tidak saling
+mengurangi stok dan pembatalan cukup mengurangi angka di slotnya.
+
+Sisa unit satu slot dihitung dengan satu query (subquery ke ledger).
+Pemesanan beberapa alat sekaligus mengunci baris ledger-nya
+(select_for_update) lalu diklaim dengan satu UPDATE bersyarat
+    reserved = reserved + qty WHERE reserved <= stock - qty
+dengan stock sebagai nilai literal, sehingga syaratnya hanya membaca baris
+yang di-update (tanpa join ke Equipment yang di Postgres menjadi subquery
+IN yang tidak dievaluasi ulang setelah menunggu lock). Klaim dianggap gagal
+bila jumlah baris yang ter-update kurang dari jumlah alat.
+"""
+from django.db import transaction as db_transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Equipment, EquipmentUsage
+
+
+class InsufficientStock(Exception):
+    """Sisa unit pada slot tidak cukup; pesannya aman ditampilkan ke pengguna."""
+
+
+def _quantities(items):
+    """{equipment_id: jumlah} dari daftar (Equipment atau id, jumlah)."""
+    quantities = {}
+    for item, quantity in items:
+        equipment_id = getattr(item, 'pk', item)
+        quantities[equipment_id] = quantities.get(equipment_id, 0) + int(quantity)
+    return {equipment_id: quantity for equipment_id, quantity in quantities.items() if quantity > 0}
+
+
+def _per_equipment(quantities):
+    return Case(
+        *[When(equipment_id=equipment_id, then=Value(quantity)) for equipment_id, quantity in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def with_availability(queryset, day, start_time):
+    """Menambahkan `reserved_quantity` dan `available_quantity` untuk slot (day, start_time)."""
+    reserved = EquipmentUsage.objects.filter(
+        equipment=OuterRef('pk'), date=day, start_time=start_time
+    ).values('reserved')[:1]
+    return queryset.annotate(
+        reserved_quantity=Coalesce(Subquery(reserved), Value(0)),
+    ).annotate(
+        available_quantity=F('stock_quantity') - F('reserved_quantity'),
+    )
+
+
+def _shortage_message(day, start_time, quantities):
+    for equipment in with_availability(Equipment.objects.filter(id__in=quantities), day, start_time):
+        if equipment.available_quantity < quantities[equipment.id]:
+            remaining = max(equipment.available_quantity, 0)
+            return f"Stock untuk {equipment.name} tidak mencukupi (tersisa {remaining})."
+    return "Stock peralatan tidak mencukupi."
+
+
+def reserve_equipment(day, start_time, items):
+    """
+    Memesan semua alat di `items` pada slot (day, start_time), semua atau
+    tidak sama sekali. Melempar InsufficientStock bila salah satu tidak cukup.
+    """
+    quantities = _quantities(items)
+    if not quantities:
+        return
+
+    with db_transaction.atomic():
+        EquipmentUsage.objects.bulk_create(
+            [EquipmentUsage(equipment_id=equipment_id, date=day, start_time=start_time) for equipment_id in quantities],
+            ignore_conflicts=True,
+        )
+        # urutan id tetap agar dua klaim yang berebut beberapa alat tidak deadlock
+        list(
+            EquipmentUsage.objects.select_for_update()
+            .filter(equipment_id__in=quantities, date=day, start_time=start_time)
+            .order_by('equipment_id').values_list('pk', flat=True)
+        )
+        stock = dict(Equipment.objects.filter(pk__in=quantities).values_list('pk', 'stock_quantity'))
+        fits = Q()
+        for equipment_id, quantity in quantities.items():
+            fits |= Q(equipment_id=equipment_id, reserved__lte=stock.get(equipment_id, 0) - quantity)
+        claimed = EquipmentUsage.objects.filter(fits, date=day, start_time=start_time).update(
+            reserved=F('reserved') + _per_equipment(quantities)
+        )
+        if claimed == len(quantities):
+            return
+        db_transaction.set_rollback(True)
+
+    raise InsufficientStock(_shortage_message(day, start_time, quantities))
+
+
+def release_equipment(day, start_time, items):
+    """Mengembalikan unit yang dipesan di slot (day, start_time)."""
+    quantities = _quantities(items)
+    if not quantities:
+        return
+    EquipmentUsage.objects.filter(equipment_id__in=quantities, date=day, start_time=start_time).update(
+        reserved=Greatest(F('reserved') - _per_equipment(quantities), Value(0))
+    )
+
+
+def booking_equipment_items(booking):
+    return list(booking.equipment_details.values_list('equipment_id', 'quantity'))
+
+
+def release_booking_equipment(booking):
+    """Mengembalikan semua alat sebuah booking ke slot jadwal venue-nya."""
+    schedule = booking.venue_schedule
+    if schedule is not None:
+        release_equipment(schedule.date, schedule.start_time, booking_equipment_items(booking))
@@ -0,0 +1,83 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from main.autocomplete import DEFAULT_MAX_KEYS, build, normalize
+
+SYLLABLES = ('ka', 'ri', 'sa', 'to', 'me', 'lu', 'pa', 'ng', 'da', 'wi', 'an', 'di', 'bu', 'ya', 'se', 'no')
+PREFIXES = ('Lapangan', 'Arena', 'GOR', 'Stadion', 'Sport Center')
+
+
+def fake_name(rng, words):
+    return ' '.join(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title() for _ in range(words))
+
+
+def fake_entries(count, rng):
+    """Entri sintetis: 60% venue, 40% coach, ditambah area dan olahraga."""
+    entries = []
+    for pk in range(count):
+        if pk % 5 < 3:
+            entries.append(('venue', pk, f'{rng.choice(PREFIXES)} {fake_name(rng, rng.randint(1, 3))}'))
+        else:
+            entries.append(('coach', pk, fake_name(rng, 2)))
+    entries += [('area', pk, fake_name(rng, 1)) for pk in range(50)]
+    entries += [('sport', pk, fake_name(rng, 1)) for pk in range(20)]
+    return entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark indeks autocomplete di memori: waktu bangun, memori per kunci, dan latensi "
+        "pencarian prefix. Memakai data sintetis, tanpa database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=50000, help="Jumlah venue + coach (default 50000).")
+        parser.add_argument('--lookups', type=int, default=20000, help="Jumlah pencarian (default 20000).")
+        parser.add_argument('--max-keys', type=int, default=DEFAULT_MAX_KEYS, help="Anggaran kunci indeks.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        entries = fake_entries(options['entries'], rng)
+
+        started = time.perf_counter()
+        index = build(entries, max_keys=options['max_keys'])
+        build_ms = (time.perf_counter() - started) * 1000
+        # dibangun sekali lagi di bawah tracemalloc; tracing memperlambat alokasi
+        del index
+        tracemalloc.start()
+        index = build(entries, max_keys=options['max_keys'])
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = index.stats()
+        self.stdout.write(
+            f"{stats['entries']} entri, {stats['keys']} kunci ({stats['skipped']} entri terlewat), "
+            f"dibangun dalam {build_ms:.0f} ms, ~{memory / 1024 / 1024:.1f} MiB "
+            f"({memory / max(stats['keys'], 1):.0f} byte/kunci)"
+        )
+
+        labels = [normalize(label) for _, _, label in entries]
+        queries = []
+        for _ in range(options['lookups']):
+            words = rng.choice(labels).split(' ')
+            word = rng.choice(words)
+            queries.append(word[:rng.randint(1, min(len(word), 5))])
+
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+        self.stdout.write(
+            f"{len(queries)} pencarian: p50 {p50 * 1e6:.1f} µs, p99 {p99 * 1e6:.1f} µs, maks {timings[-1] * 1e6:.1f} µs"
+        )
+
+        started = time.perf_counter()
+        for pk in range(1000):
+            index.add('venue', -pk - 1, f'Arena Baru {fake_name(rng, 2)}')
+        self.stdout.write(f"1000 tambahan incremental: {(time.perf_counter() - started) * 1000:.1f} ms")
@@ -0,0 +1,91 @@
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from main import serializers
+from main.models import (
+    Booking, BookingEquipment, CoachProfile, CoachSchedule, Equipment, LocationArea,
+    SportCategory, Transaction, UserProfile, Venue, VenueSchedule,
+)
+
+
+def build_bookings(count):
+    """Booking di memori (tanpa database) dengan relasi yang biasa diambil select_related/prefetch."""
+    sport = SportCategory(id=1, name='Futsal')
+    area = LocationArea(id=1, name='Jakarta')
+    venues = [
+        Venue(id=i, name=f'Venue {i}', description='Lapangan', price_per_hour=Decimal('150000'),
+              location=area, sport_category=sport, main_image='https://example.com/v.jpg')
+        for i in range(1, 21)
+    ]
+    coach_user = User(id=1, username='coach', first_name='Budi', last_name='Santoso')
+    coach_user.profile = UserProfile(id=1, user=coach_user, phone_number='0812')
+    coach = CoachProfile(id=1, user=coach_user, rate_per_hour=Decimal('100000'), main_sport_trained=sport)
+    customer = User(id=2, username='customer', first_name='Sari')
+    racket = Equipment(id=1, name='Raket', rental_price=Decimal('20000'), stock_quantity=10)
+
+    start = date(2026, 1, 1)
+    booked_at = datetime(2026, 1, 1, 8, 0)
+    bookings = []
+    for i in range(count):
+        day = start + timedelta(days=i % 60)
+        hour = 8 + i % 12
+        schedule = VenueSchedule(
+            id=i + 1, venue=venues[i % len(venues)], date=day,
+            start_time=dt_time(hour), end_time=dt_time(hour + 1),
+        )
+        booking = Booking(
+            id=i + 1, customer=customer, venue_schedule=schedule,
+            total_price=Decimal('190000'), booking_time=booked_at,
+        )
+        if i % 3 == 0:
+            booking.coach_schedule = CoachSchedule(
+                id=i + 1, coach=coach, date=day, start_time=schedule.start_time, end_time=schedule.end_time,
+            )
+        booking.transaction = Transaction(
+            id=i + 1, status='PENDING', payment_method='CASH', transaction_time=booked_at,
+            revenue_venue=Decimal('170000'), revenue_coach=Decimal('0'),
+        )
+        booking._prefetched_objects_cache = {'equipment_details': [
+            BookingEquipment(id=i + 1, equipment=racket, quantity=2, sub_total=Decimal('40000')),
+        ]}
+        bookings.append(booking)
+    return bookings
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark serializer daftar booking: biaya per baris untuk setiap bentuk payload."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Jumlah booking (default 10000).")
+        parser.add_argument('--repeat', type=int, default=3, help="Ulangan per kasus; diambil yang tercepat.")
+
+    def handle(self, *args, **options):
+        count, repeat = options['count'], options['repeat']
+        bookings = build_bookings(count)
+        cases = {
+            'booking_record': lambda b, c: serializers.booking_record(b, c),
+            'my_booking_payload': serializers.my_booking_payload,
+            'history_booking_payload': serializers.history_booking_payload,
+        }
+        encoder = 'orjson' if serializers.orjson is not None else 'json'
+        self.stdout.write(f"{count} booking, encoder {encoder}, terbaik dari {repeat} ulangan")
+
+        for name, serialize in cases.items():
+            best_build = best_dump = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cache = serializers.DisplayCache()
+                rows = [serialize(booking, cache) for booking in bookings]
+                built = time.perf_counter()
+                serializers.dumps(rows)
+                dumped = time.perf_counter()
+                best_build = min(best_build or float('inf'), built - started)
+                best_dump = min(best_dump or float('inf'), dumped - built)
+            self.stdout.write(
+                f"{name:<26} {best_build / count * 1e6:7.2f} us/baris dict  "
+                f"{best_dump / count * 1e6:7.2f} us/baris JSON"
+            )
@@ -0,0 +1,107 @@
+import time
+import uuid
+from datetime import date, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction as db_transaction
+from django.test.utils import CaptureQueriesContext
+
+from main.models import (
+    CoachAvailability, CoachProfile, CoachSchedule, LocationArea, SportCategory, Venue,
+    VenueAvailability, VenueSchedule,
+)
+from main.slot_search import search_free_slots
+
+OPEN_HOUR, CLOSE_HOUR = 8, 22
+
+
+def seed(venue_count, coach_count, days, start_date):
+    """
+    Mengisi data uji: setiap venue/coach keempat memakai pola mingguan,
+    sisanya baris jadwal per jam dengan sebagian slot sudah dibooking.
+    """
+    tag = uuid.uuid4().hex[:8]
+    sport = SportCategory.objects.create(name=f'Bench {tag}')
+    area = LocationArea.objects.create(name=f'Bench {tag}')
+    owner = User.objects.create(username=f'bench_owner_{tag}')
+
+    venues = Venue.objects.bulk_create([
+        Venue(owner=owner, name=f'Venue {i:05d}', description='Bench', location=area,
+              sport_category=sport, price_per_hour=Decimal('100000'))
+        for i in range(venue_count)
+    ])
+    users = User.objects.bulk_create([User(username=f'bench_coach_{tag}_{i}') for i in range(coach_count)])
+    coaches = CoachProfile.objects.bulk_create([
+        CoachProfile(user=user, rate_per_hour=Decimal('75000'), main_sport_trained=sport) for user in users
+    ])
+    CoachProfile.service_areas.through.objects.bulk_create([
+        CoachProfile.service_areas.through(coachprofile_id=coach.id, locationarea_id=area.id) for coach in coaches
+    ])
+
+    hours = range(OPEN_HOUR, CLOSE_HOUR)
+    dates = [start_date + timedelta(days=d) for d in range(days)]
+    for model, owners, field, template_model in (
+        (VenueSchedule, venues, 'venue', VenueAvailability),
+        (CoachSchedule, coaches, 'coach', CoachAvailability),
+    ):
+        template_model.objects.bulk_create([
+            template_model(start_time=dt_time(OPEN_HOUR), end_time=dt_time(CLOSE_HOUR), **{field: owner})
+            for owner in owners[::4]
+        ])
+        model.objects.bulk_create(
+            (
+                model(date=day, start_time=dt_time(hour), end_time=dt_time(hour + 1),
+                      is_booked=(i + hour) % 5 == 0, **{field: owner})
+                for i, owner in enumerate(owners) if i % 4
+                for day in dates
+                for hour in hours
+            ),
+            batch_size=2000,
+        )
+    return sport, area
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark pencarian slot kosong venue + coach pada data uji ribuan venue dan coach. "
+        "Semua data dibuat dalam transaksi yang di-rollback."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=2000, help="Jumlah venue (default 2000).")
+        parser.add_argument('--coaches', type=int, default=2000, help="Jumlah coach (default 2000).")
+        parser.add_argument('--days', type=int, default=3, help="Jumlah hari jadwal (default 3).")
+        parser.add_argument('--repeat', type=int, default=3, help="Ulangan per kasus; diambil yang tercepat.")
+
+    def handle(self, *args, **options):
+        start_date = date.today() + timedelta(days=1)
+        end_date = start_date + timedelta(days=options['days'] - 1)
+        with db_transaction.atomic():
+            started = time.perf_counter()
+            sport, area = seed(options['venues'], options['coaches'], options['days'], start_date)
+            self.stdout.write(
+                f"{options['venues']} venue, {options['coaches']} coach, {options['days']} hari "
+                f"diisi dalam {time.perf_counter() - started:.1f} s"
+            )
+            for label, hour_from, hour_to, with_coach in (
+                ('sepanjang hari', 0, 24, False),
+                ('jam 18-21', 18, 21, False),
+                ('jam 18-21, ada coach', 18, 21, True),
+            ):
+                best = None
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        results = search_free_slots(
+                            sport, area, start_date, end_date, hour_from, hour_to, with_coach
+                        )
+                        elapsed = time.perf_counter() - started
+                    best = min(best or float('inf'), elapsed)
+                slots = sum(len(venue_slots) for venue_slots in results.values())
+                self.stdout.write(
+                    f"{label:<22} {best * 1000:8.1f} ms  {len(ctx.captured_queries)} query  "
+                    f"{len(results)} venue  {slots} slot"
+                )
+            db_transaction.set_rollback(True)
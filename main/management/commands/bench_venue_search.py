@@ -0,0 +1,83 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction as db_transaction
+from django.db.models import Q
+
+from main.models import LocationArea, SportCategory, Venue
+from main.venue_search import reindex_venues, search_backend, search_venues
+
+SYLLABLES = ('ka', 'ri', 'sa', 'to', 'me', 'lu', 'pa', 'ng', 'da', 'wi')
+RARE_WORD = 'senayan'
+RARE_COUNT = 10
+
+
+def word(i):
+    return ''.join(SYLLABLES[int(digit)] for digit in f'{i:03d}')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark pencarian venue: indeks teks vs icontains pada jumlah venue yang bertambah. "
+        "Semua data dibuat dalam transaksi yang di-rollback."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000', help="Jumlah venue per tahap (default 1000,10000,50000).")
+        parser.add_argument('--repeat', type=int, default=5, help="Ulangan per kasus; diambil yang tercepat.")
+
+    def timed(self, queryset, repeat):
+        """Waktu satu halaman Paginator: COUNT(*) lalu 6 baris pertama."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset[:6])
+            best = min(best or float('inf'), time.perf_counter() - started)
+        return best * 1000
+
+    def handle(self, *args, **options):
+        if search_backend() is None:
+            raise CommandError(f"Database {connection.vendor} tidak punya indeks pencarian venue.")
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError("--sizes harus berupa daftar angka, mis. 1000,10000.")
+
+        with db_transaction.atomic():
+            tag = uuid.uuid4().hex[:8]
+            sport = SportCategory.objects.create(name=f'Bench {tag}')
+            area = LocationArea.objects.create(name=f'Bench {tag}')
+            owner = User.objects.create(username=f'bench_owner_{tag}')
+            venues = Venue.objects.filter(owner=owner)
+            created = 0
+
+            self.stdout.write(f"{'venue':>8} {'reindex':>10} {'kueri':<12} {'indeks':>10} {'icontains':>10}")
+            for size in sizes:
+                Venue.objects.bulk_create(
+                    (
+                        # kata langka hanya di RARE_COUNT venue pertama, kata umum di 1/1000 venue
+                        Venue(owner=owner, location=area, sport_category=sport, price_per_hour=Decimal('100000'),
+                              name=f'Arena {word(i % 1000)} {RARE_WORD if i < RARE_COUNT else ""}'.strip(),
+                              description=f'Lapangan {word((i * 7) % 1000)} dekat {word((i * 13) % 1000)}')
+                        for i in range(created, size)
+                    ),
+                    batch_size=2000,
+                )
+                created = max(created, size)
+
+                started = time.perf_counter()
+                reindex_venues()
+                reindex_ms = (time.perf_counter() - started) * 1000
+
+                for query in (RARE_WORD, word(123)):
+                    indexed = search_venues(venues, query, columns=('name', 'description')).order_by('-search_rank', 'id')
+                    scan = venues.filter(Q(name__icontains=query) | Q(description__icontains=query)).order_by('id')
+                    self.stdout.write(
+                        f"{created:>8} {reindex_ms:>8.1f}ms {query:<12} "
+                        f"{self.timed(indexed, options['repeat']):>8.2f}ms {self.timed(scan, options['repeat']):>8.2f}ms"
+                    )
+            db_transaction.set_rollback(True)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from main.imageproxy import evict
+
+
+class Command(BaseCommand):
+    help = (
+        "Menghapus varian proxy_image yang paling lama tidak dipakai sampai cache "
+        "di bawah IMAGE_PROXY_MAX_BYTES. Cocok untuk cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-bytes', type=int, default=None,
+            help="Batas ukuran cache (byte); default IMAGE_PROXY_MAX_BYTES.",
+        )
+
+    def handle(self, *args, **options):
+        removed = evict(limit=options['max_bytes'])
+        self.stdout.write(self.style.SUCCESS(f"{removed} varian dihapus dari cache gambar."))
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from main.models import CoachSchedule, VenueSchedule
+from main.schedules import DELETE_BATCH_SIZE, delete_free_slots
+
+
+class Command(BaseCommand):
+    help = (
+        "Menghapus slot VenueSchedule dan CoachSchedule yang sudah lewat dan tidak pernah dibooking. "
+        "Slot yang punya booking tetap disimpan untuk riwayat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            help="Hapus slot dengan tanggal sebelum tanggal ini (YYYY-MM-DD). Default: hari ini dikurangi --keep-days.",
+        )
+        parser.add_argument('--keep-days', type=int, default=0, help="Jumlah hari lampau yang tetap disimpan (default 0).")
+        parser.add_argument('--batch-size', type=int, default=DELETE_BATCH_SIZE, help="Jumlah id per DELETE.")
+        parser.add_argument('--dry-run', action='store_true', help="Hanya hitung, tanpa menghapus.")
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = date.fromisoformat(options['before'])
+            except ValueError:
+                raise CommandError("Format --before harus YYYY-MM-DD.")
+        else:
+            cutoff = date.today() - timedelta(days=options['keep_days'])
+        if cutoff > date.today():
+            raise CommandError("--before tidak boleh setelah hari ini.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size minimal 1.")
+
+        for model in (VenueSchedule, CoachSchedule):
+            expired = model.objects.filter(date__lt=cutoff)
+            name = model._meta.verbose_name_plural
+            if options['dry_run']:
+                count = expired.filter(Q(is_booked=False, booking__isnull=True)).count()
+                self.stdout.write(f"{name}: {count} slot akan dihapus (sebelum {cutoff}).")
+                continue
+            deleted, kept = delete_free_slots(expired, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {deleted} slot dihapus, {kept} slot berbooking disimpan (sebelum {cutoff})."
+            ))
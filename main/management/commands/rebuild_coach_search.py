@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.coach_search import rebuild_coach_search
+
+
+class Command(BaseCommand):
+    help = (
+        "Menghitung ulang nama pencarian dan trigram semua coach, "
+        "mis. setelah nama User diubah lewat queryset.update()."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_coach_search()
+        self.stdout.write(self.style.SUCCESS(f"Indeks nama {count} coach dibangun ulang."))
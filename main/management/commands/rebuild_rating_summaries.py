@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = "Membangun ulang ringkasan rating Venue dan CoachProfile dari tabel Review."
+
+    def handle(self, *args, **options):
+        venues, coaches = rebuild_rating_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f"{venues} ringkasan venue dan {coaches} ringkasan coach dibangun ulang."
+        ))
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.revenue import rebuild_revenue_rollups
+
+
+class Command(BaseCommand):
+    help = "Membangun ulang rollup pendapatan harian venue dan coach dari tabel Transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help="Hanya bangun ulang tanggal main sejak tanggal ini (YYYY-MM-DD).",
+        )
+
+    def handle(self, *args, **options):
+        since = options.get('since')
+        if since:
+            try:
+                since = date.fromisoformat(since)
+            except ValueError:
+                raise CommandError("Format --since harus YYYY-MM-DD.")
+
+        venues, coaches = rebuild_revenue_rollups(start_date=since)
+        self.stdout.write(self.style.SUCCESS(
+            f"{venues} baris rollup venue dan {coaches} baris rollup coach dibangun ulang."
+        ))
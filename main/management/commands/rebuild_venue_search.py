@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import Venue
+from main.venue_search import reindex_venues, search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Membangun ulang indeks pencarian venue (tsvector di PostgreSQL, FTS5 di SQLite), "
+        "mis. setelah bulk_create atau queryset.update() pada Venue."
+    )
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend is None:
+            raise CommandError("Database ini tidak punya indeks pencarian venue; pencarian memakai icontains.")
+        reindex_venues()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indeks pencarian {backend} dibangun ulang untuk {Venue.objects.count()} venue."
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from main.ratings import sync_venue_rating_avg
+from main.venue_sort import rebuild_next_available, refresh_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Menghitung ulang kolom urutan venue (rating_avg dan next_available_slot). "
+        "Dengan --stale-only hanya venue yang slot terdekatnya sudah lewat, cocok untuk cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-only', action='store_true',
+            help="Hanya hitung ulang next_available_slot yang sudah lewat.",
+        )
+
+    def handle(self, *args, **options):
+        if options['stale_only']:
+            changed = refresh_stale()
+            self.stdout.write(self.style.SUCCESS(f"{changed} slot terdekat venue diperbarui."))
+            return
+        venues = sync_venue_rating_avg()
+        changed = rebuild_next_available()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rating {venues} venue disalin, {changed} slot terdekat venue diperbarui."
+        ))
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    """Mengisi ringkasan rating dari review yang sudah ada."""
+    Review = apps.get_model('main', 'Review')
+    aggregates = {'review_count': Count('id'), 'rating_sum': Sum('rating')}
+    for star in range(1, 6):
+        aggregates[f'star_{star}'] = Count('id', filter=Q(rating=star))
+
+    for model_name, key, field in (
+        ('VenueRatingSummary', 'target_venue', 'venue_id'),
+        ('CoachRatingSummary', 'target_coach', 'coach_id'),
+    ):
+        Summary = apps.get_model('main', model_name)
+        rows = Review.objects.filter(**{f'{key}__isnull': False}).values(key).annotate(**aggregates).order_by()
+        summaries = []
+        for row in rows:
+            target_id = row.pop(key)
+            summaries.append(Summary(
+                rating_avg=row['rating_sum'] / row['review_count'],
+                **{field: target_id},
+                **row,
+            ))
+        Summary.objects.bulk_create(summaries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_alter_coachprofile_profile_picture_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoachRatingSummary',
+            fields=[
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_avg', models.FloatField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('coach', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='main.coachprofile')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='VenueRatingSummary',
+            fields=[
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_avg', models.FloatField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('venue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='main.venue')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_recurring_availability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer', '-booking_time'], name='booking_customer_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coachschedule',
+            index=models.Index(condition=models.Q(('is_booked', False)), fields=['date', 'start_time', 'coach'], name='coachsched_open_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['target_venue', '-created_at'], name='review_venue_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['target_coach', '-created_at'], name='review_coach_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'booking'], name='transaction_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venueschedule',
+            index=models.Index(condition=models.Q(('is_booked', False)), fields=['venue', 'date', 'start_time'], name='venuesched_open_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_daily_revenue(apps, schema_editor):
+    """Mengisi rollup pendapatan harian dari transaksi CONFIRMED yang sudah ada."""
+    Transaction = apps.get_model('main', 'Transaction')
+    for model_name, owner_key, date_key, field, revenue_field in (
+        ('VenueDailyRevenue', 'booking__venue_schedule__venue', 'booking__venue_schedule__date', 'venue_id', 'revenue_venue'),
+        ('CoachDailyRevenue', 'booking__coach_schedule__coach', 'booking__coach_schedule__date', 'coach_id', 'revenue_coach'),
+    ):
+        Rollup = apps.get_model('main', model_name)
+        rows = (
+            Transaction.objects.filter(status='CONFIRMED', **{f'{owner_key}__isnull': False})
+            .values(owner_key, date_key)
+            .annotate(revenue=Sum(revenue_field), booking_count=Count('id'))
+            .order_by()
+        )
+        Rollup.objects.bulk_create([
+            Rollup(date=row[date_key], revenue=row['revenue'] or 0,
+                   booking_count=row['booking_count'], **{field: row[owner_key]})
+            for row in rows
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoachDailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('booking_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('coach', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='main.coachprofile')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('coach', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VenueDailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('booking_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='main.venue')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('venue', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_revenue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def backfill_equipment_usage(apps, schema_editor):
+    """
+    Mengisi ledger dari booking yang masih aktif dan mengembalikan
+    stock_quantity menjadi jumlah unit yang dimiliki: pembayaran lama
+    mengurangi stok secara permanen untuk setiap booking CONFIRMED.
+    """
+    BookingEquipment = apps.get_model('main', 'BookingEquipment')
+    Equipment = apps.get_model('main', 'Equipment')
+    EquipmentUsage = apps.get_model('main', 'EquipmentUsage')
+
+    active = BookingEquipment.objects.filter(booking__transaction__status__in=['PENDING', 'CONFIRMED'])
+    rows = (
+        active.values('equipment', 'booking__venue_schedule__date', 'booking__venue_schedule__start_time')
+        .annotate(reserved=Sum('quantity'))
+        .order_by()
+    )
+    EquipmentUsage.objects.bulk_create([
+        EquipmentUsage(
+            equipment_id=row['equipment'],
+            date=row['booking__venue_schedule__date'],
+            start_time=row['booking__venue_schedule__start_time'],
+            reserved=row['reserved'],
+        )
+        for row in rows
+    ])
+
+    consumed = (
+        BookingEquipment.objects.filter(booking__transaction__status='CONFIRMED')
+        .values('equipment').annotate(quantity=Sum('quantity')).order_by()
+    )
+    for row in consumed:
+        Equipment.objects.filter(pk=row['equipment']).update(stock_quantity=F('stock_quantity') + row['quantity'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_daily_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('reserved', models.PositiveIntegerField(default=0)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='main.equipment')),
+            ],
+            options={
+                'ordering': ['date', 'start_time'],
+                'unique_together': {('equipment', 'date', 'start_time')},
+            },
+        ),
+        migrations.RunPython(backfill_equipment_usage, migrations.RunPython.noop),
+    ]
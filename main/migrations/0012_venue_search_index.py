@@ -0,0 +1,58 @@
+from django.db import migrations
+
+FTS_COLUMNS = "name, location, sport, description"
+
+
+def create_search_index(apps, schema_editor):
+    """Kolom tsvector + GIN (PostgreSQL) atau tabel FTS5 (SQLite), lalu isi dari venue yang ada."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE main_venue ADD COLUMN search_document tsvector")
+        schema_editor.execute(
+            """
+            UPDATE main_venue AS v SET search_document =
+                setweight(to_tsvector('simple', COALESCE(v.name, '')), 'A') ||
+                setweight(to_tsvector('simple', COALESCE(l.name, '')), 'B') ||
+                setweight(to_tsvector('simple', COALESCE(s.name, '')), 'C') ||
+                setweight(to_tsvector('simple', COALESCE(v.description, '')), 'D')
+            FROM main_venue AS x
+            LEFT JOIN main_locationarea AS l ON l.id = x.location_id
+            LEFT JOIN main_sportcategory AS s ON s.id = x.sport_category_id
+            WHERE x.id = v.id
+            """
+        )
+        schema_editor.execute("CREATE INDEX venue_search_document_gin ON main_venue USING GIN (search_document)")
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE main_venue_fts USING fts5({FTS_COLUMNS}, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f"""
+            INSERT INTO main_venue_fts (rowid, {FTS_COLUMNS})
+            SELECT v.id, v.name, COALESCE(l.name, ''), COALESCE(s.name, ''), COALESCE(v.description, '')
+            FROM main_venue AS v
+            LEFT JOIN main_locationarea AS l ON l.id = v.location_id
+            LEFT JOIN main_sportcategory AS s ON s.id = v.sport_category_id
+            """
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS venue_search_document_gin")
+        schema_editor.execute("ALTER TABLE main_venue DROP COLUMN IF EXISTS search_document")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS main_venue_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_equipment_usage_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:57
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    result = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def fill_coach_search(apps, schema_editor):
+    """Mengisi search_name; trigram di tabel (selain PostgreSQL) atau index GIN pg_trgm."""
+    CoachProfile = apps.get_model('main', 'CoachProfile')
+    CoachNameTrigram = apps.get_model('main', 'CoachNameTrigram')
+    vendor = schema_editor.connection.vendor
+
+    coaches = list(CoachProfile.objects.select_related('user'))
+    for coach in coaches:
+        parts = (coach.user.first_name, coach.user.last_name, coach.user.username)
+        coach.search_name = ' '.join(part for part in parts if part).lower()[:320]
+    CoachProfile.objects.bulk_update(coaches, ['search_name'], batch_size=500)
+
+    if vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX coach_search_name_trgm ON main_coachprofile USING GIN (search_name gin_trgm_ops)"
+        )
+        return
+    CoachNameTrigram.objects.bulk_create([
+        CoachNameTrigram(coach=coach, trigram=trigram)
+        for coach in coaches
+        for trigram in sorted(trigrams(coach.search_name))
+    ], batch_size=2000)
+
+
+def drop_coach_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS coach_search_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_venue_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coachprofile',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=320),
+        ),
+        migrations.CreateModel(
+            name='CoachNameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('coach', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_trigrams', to='main.coachprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram', 'coach'], name='coach_trigram_idx')],
+                'unique_together': {('coach', 'trigram')},
+            },
+        ),
+        migrations.RunPython(fill_coach_search, drop_coach_search_index),
+    ]
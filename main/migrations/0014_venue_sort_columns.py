@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:10
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def fill_sort_columns(apps, schema_editor):
+    """
+    Menyalin rating_avg dari ringkasan dan mengisi next_available_slot dari
+    baris jadwal kosong. Slot virtual dari pola mingguan baru ikut setelah
+    command refresh_venue_sort_columns dijalankan.
+    """
+    Venue = apps.get_model('main', 'Venue')
+    VenueRatingSummary = apps.get_model('main', 'VenueRatingSummary')
+    VenueSchedule = apps.get_model('main', 'VenueSchedule')
+
+    ratings = dict(VenueRatingSummary.objects.values_list('venue_id', 'rating_avg'))
+    now = timezone.localtime()
+    upcoming = Q(date__gt=now.date()) | Q(date=now.date(), start_time__gte=now.time())
+    free = (
+        VenueSchedule.objects.filter(upcoming, is_booked=False, is_available=True)
+        .order_by('venue_id', 'date', 'start_time').values_list('venue_id', 'date', 'start_time')
+    )
+    next_slots = {}
+    for venue_id, day, start_time in free.iterator():
+        next_slots.setdefault(venue_id, timezone.make_aware(datetime.combine(day, start_time)))
+
+    venues = list(Venue.objects.only('id'))
+    for venue in venues:
+        venue.rating_avg = ratings.get(venue.id, 0)
+        venue.next_available_slot = next_slots.get(venue.id)
+    Venue.objects.bulk_update(venues, ['rating_avg', 'next_available_slot'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_coach_name_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venue',
+            name='next_available_slot',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['-rating_avg', 'id'], name='venue_rating_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['price_per_hour', 'id'], name='venue_price_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['next_available_slot', 'id'], name='venue_next_slot_sort_idx'),
+        ),
+        migrations.RunPython(fill_sort_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_venue_sort_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SharedVersion',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.CharField(max_length=32)),
+                ('previous', models.CharField(blank=True, default='', max_length=32)),
+            ],
+        ),
+    ]
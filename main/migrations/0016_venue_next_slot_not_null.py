@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:34
+
+import datetime
+from django.db import migrations, models
+
+NO_AVAILABLE_SLOT = datetime.datetime(9999, 1, 1, 0, 0, tzinfo=datetime.timezone.utc)
+
+
+def fill_missing_slots(apps, schema_editor):
+    Venue = apps.get_model('main', 'Venue')
+    Venue.objects.filter(next_available_slot__isnull=True).update(next_available_slot=NO_AVAILABLE_SLOT)
+
+
+def clear_missing_slots(apps, schema_editor):
+    Venue = apps.get_model('main', 'Venue')
+    Venue.objects.filter(next_available_slot=NO_AVAILABLE_SLOT).update(next_available_slot=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_shared_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_missing_slots, clear_missing_slots),
+        migrations.AlterField(
+            model_name='venue',
+            name='next_available_slot',
+            field=models.DateTimeField(default=NO_AVAILABLE_SLOT, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_venue_next_slot_not_null'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='coachschedule',
+            name='coachsched_open_slot_idx',
+        ),
+    ]
@@ -1,7 +1,13 @@
+from datetime import datetime, timezone as dt_timezone
+
 from django.db import models
 from django.contrib.auth.models import User 
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+# Venue.next_available_slot untuk venue tanpa slot kosong: kolomnya NOT NULL
+# agar ORDER BY bisa dilayani index biasa, dan nilai ini selalu paling akhir
+NO_AVAILABLE_SLOT = datetime(9999, 1, 1, tzinfo=dt_timezone.utc)
+
 class SportCategory(models.Model):
     name = models.CharField(max_length=50, unique=True) 
     def __str__(self):
@@ -57,9 +63,20 @@ class Venue(models.Model):
     ]
     payment_options = models.CharField(max_length=20, choices=PAYMENT_CHOICES, default='TRANSFER')
 
+    # Kolom urutan daftar venue, dijaga oleh ratings dan venue_sort (lihat signals)
+    rating_avg = models.FloatField(default=0, editable=False)
+    next_available_slot = models.DateTimeField(default=NO_AVAILABLE_SLOT, editable=False)
+
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating_avg', 'id'], name='venue_rating_sort_idx'),
+            models.Index(fields=['price_per_hour', 'id'], name='venue_price_sort_idx'),
+            models.Index(fields=['next_available_slot', 'id'], name='venue_next_slot_sort_idx'),
+        ]
+
 class VenueSchedule(models.Model):
     """Jadwal ketersediaan per lapangan."""
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='schedules')
@@ -76,6 +93,14 @@ class VenueSchedule(models.Model):
     class Meta:
         unique_together = (('venue', 'date', 'start_time'),)
         ordering = ['date', 'start_time']
+        indexes = [
+            # Daftar slot yang masih bisa dibooking per venue (create_booking, api_booking_form_data)
+            models.Index(
+                fields=['venue', 'date', 'start_time'],
+                condition=models.Q(is_booked=False),
+                name='venuesched_open_idx',
+            ),
+        ]
 
 class Equipment(models.Model):
     """Data alat yang disewakan oleh Venue."""
@@ -110,6 +135,9 @@ class CoachProfile(models.Model):
     service_areas = models.ManyToManyField('LocationArea', related_name='coaches_serving')
     is_verified = models.BooleanField(default=False)
 
+    # nama depan, belakang, dan username (huruf kecil) untuk pencarian; diisi signal
+    search_name = models.CharField(max_length=320, blank=True, default='', editable=False)
+
     def __str__(self):
         return self.user.get_full_name() or self.user.username
 
@@ -128,6 +156,7 @@ class CoachSchedule(models.Model):
     is_booked = models.BooleanField(default=False)
 
     class Meta:
+        # query jadwal coach selalu memfilter coach_id IN (...), jadi index unik ini yang dipakai
         unique_together = (('coach', 'date', 'start_time'),)
         ordering = ['date', 'start_time']
 
@@ -149,6 +178,12 @@ class Booking(models.Model):
     booking_time = models.DateTimeField(auto_now_add=True)
     total_price = models.DecimalField(max_digits=10, decimal_places=0)
 
+    class Meta:
+        indexes = [
+            # my_bookings / booking_history: booking milik customer, terbaru dulu
+            models.Index(fields=['customer', '-booking_time'], name='booking_customer_time_idx'),
+        ]
+
     def __str__(self):
         return f"Booking #{self.id} oleh {self.customer.username}"
 
@@ -180,6 +215,12 @@ class Transaction(models.Model):
     revenue_coach = models.DecimalField(max_digits=10, decimal_places=0, default=0) 
     revenue_platform = models.DecimalField(max_digits=10, decimal_places=0, default=0)
 
+    class Meta:
+        indexes = [
+            # Laporan pendapatan: transaksi per status lalu join ke booking
+            models.Index(fields=['status', 'booking'], name='transaction_status_idx'),
+        ]
+
     def __str__(self):
         return f"Transaksi #{self.id} - {self.status}"
     
@@ -197,4 +238,179 @@ class Review(models.Model):
     
     rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['target_venue', '-created_at'], name='review_venue_recent_idx'),
+            models.Index(fields=['target_coach', '-created_at'], name='review_coach_recent_idx'),
+        ]
+
+class RatingSummary(models.Model):
+    """Ringkasan rating yang disimpan per target, dihitung ulang saat Review berubah."""
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def histogram(self):
+        return {
+            1: self.star_1,
+            2: self.star_2,
+            3: self.star_3,
+            4: self.star_4,
+            5: self.star_5,
+        }
+
+class VenueRatingSummary(RatingSummary):
+    venue = models.OneToOneField(
+        Venue, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary'
+    )
+
+    def __str__(self):
+        return f"Rating {self.venue_id}: {self.rating_avg:.1f} ({self.review_count})"
+
+class CoachRatingSummary(RatingSummary):
+    coach = models.OneToOneField(
+        CoachProfile, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary'
+    )
+
+    def __str__(self):
+        return f"Rating coach {self.coach_id}: {self.rating_avg:.1f} ({self.review_count})"
+
+class RecurringAvailability(models.Model):
+    """
+    Pola ketersediaan mingguan, mis. Senin–Jumat 16:00–22:00 per 1 jam.
+    Slot dihitung saat dibaca dan baru disimpan sebagai baris jadwal saat dibooking.
+    """
+    WEEKDAY_LABELS = ('Sen', 'Sel', 'Rab', 'Kam', 'Jum', 'Sab', 'Min')
+
+    # Hari aktif sebagai digit weekday() Python, mis. "01234" = Senin–Jumat
+    weekdays = models.CharField(max_length=7, default='0123456')
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=60, validators=[MinValueValidator(15)])
+
+    valid_from = models.DateField(null=True, blank=True)
+    valid_until = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def weekday_set(self):
+        return frozenset(int(d) for d in self.weekdays if d.isdigit())
+
+    def covers(self, day):
+        if not self.is_active or day.weekday() not in self.weekday_set:
+            return False
+        if self.valid_from and day < self.valid_from:
+            return False
+        if self.valid_until and day > self.valid_until:
+            return False
+        return True
+
+    def weekday_display(self):
+        return ', '.join(self.WEEKDAY_LABELS[d] for d in sorted(self.weekday_set))
+
+class VenueAvailability(RecurringAvailability):
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='availability_templates')
+
+    def __str__(self):
+        return f"{self.venue.name} - {self.weekday_display()} ({self.start_time}-{self.end_time})"
+
+class CoachAvailability(RecurringAvailability):
+    coach = models.ForeignKey(CoachProfile, on_delete=models.CASCADE, related_name='availability_templates')
+
+    def __str__(self):
+        return f"{self.coach} - {self.weekday_display()} ({self.start_time}-{self.end_time})"
+
+# --- ROLLUP PENDAPATAN ---
+
+class DailyRevenue(models.Model):
+    """Pendapatan transaksi CONFIRMED per target per tanggal main, diperbarui saat Transaction berubah."""
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+    booking_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+class VenueDailyRevenue(DailyRevenue):
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='daily_revenue')
+
+    class Meta:
+        unique_together = (('venue', 'date'),)
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.venue_id} @ {self.date}: {self.revenue} ({self.booking_count})"
+
+class CoachDailyRevenue(DailyRevenue):
+    coach = models.ForeignKey(CoachProfile, on_delete=models.CASCADE, related_name='daily_revenue')
+
+    class Meta:
+        unique_together = (('coach', 'date'),)
+        ordering = ['date']
+
+    def __str__(self):
+        return f"Coach {self.coach_id} @ {self.date}: {self.revenue} ({self.booking_count})"
+
+# --- INDEKS PENCARIAN ---
+
+class CoachNameTrigram(models.Model):
+    """Trigram search_name coach untuk pencarian nama di luar PostgreSQL (lihat coach_search)."""
+    coach = models.ForeignKey(CoachProfile, on_delete=models.CASCADE, related_name='name_trigrams')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = (('coach', 'trigram'),)
+        indexes = [
+            models.Index(fields=['trigram', 'coach'], name='coach_trigram_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.coach_id}: {self.trigram!r}"
+
+# --- LEDGER PERALATAN ---
+
+class EquipmentUsage(models.Model):
+    """Jumlah unit peralatan yang sudah dipesan pada satu slot (tanggal + jam mulai)."""
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='usage')
+    date = models.DateField()
+    start_time = models.TimeField()
+    reserved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('equipment', 'date', 'start_time'),)
+        ordering = ['date', 'start_time']
+
+    def __str__(self):
+        return f"{self.equipment_id} @ {self.date} {self.start_time}: {self.reserved}"
+
+# --- VERSI CACHE ---
+
+class SharedVersion(models.Model):
+    """Versi cache di memori proses yang dibaca semua worker (lihat versions)."""
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.CharField(max_length=32)
+    # versi sebelum bump terakhir, ditulis dalam UPDATE yang sama
+    previous = models.CharField(max_length=32, blank=True, default='')
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
@@ -0,0 +1,145 @@
+"""
+Keyset (cursor) pagination untuk endpoint JSON.
+
+Halaman berikutnya dicari dengan WHERE (sort_key, id) > (nilai terakhir)
+alih-alih OFFSET, sehingga biaya per halaman tetap sedalam apa pun klien
+menggulir. Cursor bersifat opaque bagi klien (base64 dari nilai kunci
+urutan baris terakhir). COUNT(*) hanya dijalankan bila klien meminta
+`include_total=1`.
+
+Mode cursor aktif bila request membawa parameter `cursor` (kosong untuk
+halaman pertama) atau `limit`; tanpa itu endpoint tetap memakai perilaku
+lamanya.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+MAX_PAGE_SIZE = 100
+
+
+class CursorError(ValueError):
+    """Cursor atau limit dari klien tidak valid."""
+
+
+def wants_cursor(request):
+    return 'cursor' in request.GET or 'limit' in request.GET
+
+
+def _json_default(value):
+    # isoformat() penuh: DjangoJSONEncoder memotong mikrodetik, seek jadi tidak tepat
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} tidak bisa dipakai sebagai kunci cursor")
+
+
+def encode_cursor(ordering, values):
+    payload = json.dumps({'o': ','.join(ordering), 'v': values}, default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(ordering, cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload['v']
+        signature = payload['o']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise CursorError("Cursor tidak valid.")
+    if signature != ','.join(ordering) or len(values) != len(ordering):
+        raise CursorError("Cursor tidak cocok dengan urutan daftar ini.")
+    return values
+
+
+def _field_value(obj, path):
+    for attr in path.split('__'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _after(ordering, values):
+    """Q untuk baris setelah `values` menurut `ordering` (boleh campur asc/desc)."""
+    condition = Q()
+    equal_prefix = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+
+class CursorPage:
+    def __init__(self, items, next_cursor, page_size, total_count=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+        self.total_count = total_count
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def meta(self):
+        meta = {
+            'next_cursor': self.next_cursor,
+            'has_next': self.has_next,
+            'page_size': self.page_size,
+        }
+        if self.total_count is not None:
+            meta['total_count'] = self.total_count
+        return meta
+
+
+def cursor_paginate(queryset, ordering, cursor=None, page_size=20, include_total=False):
+    """
+    Mengambil satu halaman dari `queryset` berurutan `ordering`.
+
+    Field terakhir di `ordering` harus unik (biasanya 'id' atau '-id') dan
+    semua field urutan tidak boleh NULL.
+    """
+    total_count = queryset.count() if include_total else None
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        try:
+            queryset = queryset.filter(_after(ordering, decode_cursor(ordering, cursor)))
+        except (ValidationError, ValueError, TypeError):
+            raise CursorError("Cursor tidak valid.")
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(ordering, [_field_value(last, f.lstrip('-')) for f in ordering])
+    return CursorPage(rows, next_cursor, page_size, total_count)
+
+
+def paginate_request(request, queryset, ordering, default_size=20):
+    """cursor_paginate() dengan parameter `cursor`, `limit` dan `include_total` dari request."""
+    try:
+        page_size = int(request.GET.get('limit') or default_size)
+    except ValueError:
+        raise CursorError("Limit harus berupa angka.")
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise CursorError(f"Limit harus antara 1 dan {MAX_PAGE_SIZE}.")
+
+    return cursor_paginate(
+        queryset, ordering,
+        cursor=request.GET.get('cursor') or None,
+        page_size=page_size,
+        include_total=request.GET.get('include_total') in ('1', 'true'),
+    )
@@ -0,0 +1,130 @@
+"""
+Ringkasan rating per Venue dan CoachProfile.
+
+Setiap perubahan Review menghitung ulang satu baris ringkasan untuk target
+terkait (satu agregat ber-index pada FK target), sehingga halaman yang
+menampilkan rating cukup membaca satu baris tanpa memindai tabel review.
+Baris ringkasan dikunci (select_for_update) sebelum agregat dihitung, jadi
+dua penulisan review bersamaan untuk target yang sama berjalan berurutan
+dan yang kedua ikut menghitung review milik yang pertama.
+Rata-rata venue juga disalin ke Venue.rating_avg untuk urutan daftar
+venue (lihat venue_sort).
+"""
+from django.db import transaction as db_transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import CoachProfile, CoachRatingSummary, Review, Venue, VenueRatingSummary
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def _rating_aggregates():
+    aggregates = {
+        'review_count': Count('id'),
+        'rating_sum': Sum('rating'),
+    }
+    for star in STARS:
+        aggregates[f'star_{star}'] = Count('id', filter=Q(rating=star))
+    return aggregates
+
+
+def _summary_values(reviews):
+    values = reviews.aggregate(**_rating_aggregates())
+    values['rating_sum'] = values['rating_sum'] or 0
+    count = values['review_count']
+    values['rating_avg'] = values['rating_sum'] / count if count else 0
+    return values
+
+
+def _refresh_summary(model, lookup, reviews):
+    """Mengunci baris ringkasan `lookup` lalu menghitung ulang nilainya dari `reviews`."""
+    model.objects.get_or_create(**lookup)
+    summary = model.objects.select_for_update().get(**lookup)
+    values = _summary_values(reviews)
+    for field, value in values.items():
+        setattr(summary, field, value)
+    summary.save(update_fields=[*values, 'updated_at'])
+    return summary
+
+
+def refresh_venue_rating(venue_id):
+    if not venue_id:
+        return None
+    with db_transaction.atomic():
+        summary = _refresh_summary(
+            VenueRatingSummary, {'venue_id': venue_id}, Review.objects.filter(target_venue_id=venue_id)
+        )
+        Venue.objects.filter(pk=venue_id).update(rating_avg=summary.rating_avg)
+    return summary
+
+
+def refresh_coach_rating(coach_id):
+    if not coach_id:
+        return None
+    with db_transaction.atomic():
+        return _refresh_summary(
+            CoachRatingSummary, {'coach_id': coach_id}, Review.objects.filter(target_coach_id=coach_id)
+        )
+
+
+def refresh_review_targets(review, only_existing=False):
+    """Dipanggil setiap kali Review disimpan/dihapus (lihat signals)."""
+    venue_id, coach_id = review.target_venue_id, review.target_coach_id
+    if only_existing:
+        if venue_id and not Venue.objects.filter(pk=venue_id).exists():
+            venue_id = None
+        if coach_id and not CoachProfile.objects.filter(pk=coach_id).exists():
+            coach_id = None
+    refresh_venue_rating(venue_id)
+    refresh_coach_rating(coach_id)
+
+
+def rating_of(obj):
+    """Mengembalikan (rata-rata, jumlah review) dari ringkasan; (0, 0) kalau belum ada."""
+    try:
+        summary = obj.rating_summary
+    except (VenueRatingSummary.DoesNotExist, CoachRatingSummary.DoesNotExist):
+        return 0, 0
+    return summary.rating_avg, summary.review_count
+
+
+def sync_venue_rating_avg():
+    """Menyalin rating_avg semua ringkasan ke Venue.rating_avg dengan satu UPDATE."""
+    return Venue.objects.update(rating_avg=Coalesce(
+        Subquery(VenueRatingSummary.objects.filter(venue=OuterRef('pk')).values('rating_avg')),
+        Value(0.0),
+    ))
+
+
+def rebuild_rating_summaries():
+    """Membangun ulang seluruh ringkasan dari tabel Review."""
+    def build(model, key, target_field):
+        rows = (
+            Review.objects.filter(**{f'{key}__isnull': False})
+            .values(key)
+            .annotate(**_rating_aggregates())
+            .order_by()
+        )
+        summaries = []
+        for row in rows:
+            target_id = row.pop(key)
+            count = row['review_count']
+            summaries.append(model(
+                rating_avg=row['rating_sum'] / count if count else 0,
+                **{f'{target_field}_id': target_id},
+                **row,
+            ))
+        return summaries
+
+    with db_transaction.atomic():
+        VenueRatingSummary.objects.all().delete()
+        CoachRatingSummary.objects.all().delete()
+        venues = VenueRatingSummary.objects.bulk_create(
+            build(VenueRatingSummary, 'target_venue', 'venue')
+        )
+        coaches = CoachRatingSummary.objects.bulk_create(
+            build(CoachRatingSummary, 'target_coach', 'coach')
+        )
+        sync_venue_rating_avg()
+    return len(venues), len(coaches)
@@ -0,0 +1,76 @@
+"""
+Cache data referensi (SportCategory, LocationArea).
+
+Kedua tabel hampir tidak pernah berubah, jadi isinya disimpan di memori
+proses. Setiap tabel punya versi bersama (lihat versions) yang diganti
+oleh signal post_save/post_delete (termasuk simpan lewat admin); proses
+yang melihat versi berbeda memuat ulang tabelnya, proses lain paling
+lambat setelah SHARED_VERSION_TTL detik. Versi yang sama dipakai sebagai
+ETag endpoint JSON sehingga klien bisa menerima 304.
+
+Perubahan lewat queryset.update()/bulk_create() tidak memicu signal;
+panggil bump_version() setelahnya.
+"""
+import threading
+
+from . import versions
+from .models import LocationArea, SportCategory
+
+REFDATA_MODELS = {
+    'sport_categories': SportCategory,
+    'location_areas': LocationArea,
+}
+VERSION_NAME = 'refdata:{}'
+
+_local = {}
+_lock = threading.Lock()
+
+
+def _name_for(model):
+    for name, candidate in REFDATA_MODELS.items():
+        if candidate is model:
+            return name
+    raise KeyError(model)
+
+
+def get_version(name):
+    return versions.get(VERSION_NAME.format(name))
+
+
+def bump_version(model):
+    versions.bump(VERSION_NAME.format(_name_for(model)))
+
+
+def get_rows(name):
+    """Daftar instance (urut id) dari cache proses, dimuat ulang bila versinya berubah."""
+    version = get_version(name)
+    cached = _local.get(name)
+    if cached is not None and cached[0] == version:
+        return list(cached[1])
+    rows = tuple(REFDATA_MODELS[name].objects.order_by('id'))
+    with _lock:
+        _local[name] = (version, rows)
+    return list(rows)
+
+
+def sport_categories():
+    return get_rows('sport_categories')
+
+
+def location_areas():
+    return get_rows('location_areas')
+
+
+def by_name(rows):
+    return sorted(rows, key=lambda row: row.name)
+
+
+def refdata_etag(*names):
+    """ETag kuat dari versi tabel-tabel referensi yang dipakai sebuah respons."""
+    found = versions.get_many([VERSION_NAME.format(name) for name in names])
+    return '-'.join(found[VERSION_NAME.format(name)] for name in names)
+
+
+def clear_local_cache():
+    _local.clear()
+    versions.clear_local_cache()
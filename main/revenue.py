@@ -0,0 +1,294 @@
+"""
+Laporan pendapatan venue/coach dan rollup harian yang mendasarinya.
+
+Total dibaca dari VenueDailyRevenue / CoachDailyRevenue (satu baris per
+target per tanggal main), yang dihitung ulang per (target, tanggal) setiap
+kali Transaction berubah (lihat signals). Laporan venue memakai jumlah
+query tetap berapa pun banyaknya venue dan booking:
+1. daftar venue milik owner,
+2. total & jumlah booking per venue dari rollup,
+3. total per periode (hari/minggu/bulan) bila granularity diminta,
+4. satu halaman detail booking per venue (ROW_NUMBER() per venue).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, DateField, F, Sum, Window
+from django.db.models.functions import RowNumber, TruncDay, TruncMonth, TruncWeek
+
+from .models import (
+    Booking, CoachDailyRevenue, CoachSchedule, Transaction, Venue, VenueDailyRevenue,
+    VenueSchedule,
+)
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+DEFAULT_BOOKINGS_PER_VENUE = 20
+MAX_BOOKINGS_PER_VENUE = 100
+
+
+# --- Rollup harian ---
+
+def _refresh_day(model, owner_field, owner_id, day, transactions, revenue_field):
+    values = transactions.aggregate(revenue=Sum(revenue_field), booking_count=Count('id'))
+    lookup = {f'{owner_field}_id': owner_id, 'date': day}
+    if not values['booking_count']:
+        model.objects.filter(**lookup).delete()
+        return None
+    row, _ = model.objects.update_or_create(defaults=values, **lookup)
+    return row
+
+
+def refresh_venue_day(venue_id, day):
+    return _refresh_day(
+        VenueDailyRevenue, 'venue', venue_id, day,
+        Transaction.objects.filter(
+            status='CONFIRMED',
+            booking__venue_schedule__venue_id=venue_id,
+            booking__venue_schedule__date=day,
+        ),
+        'revenue_venue',
+    )
+
+
+def refresh_coach_day(coach_id, day):
+    return _refresh_day(
+        CoachDailyRevenue, 'coach', coach_id, day,
+        Transaction.objects.filter(
+            status='CONFIRMED',
+            booking__coach_schedule__coach_id=coach_id,
+            booking__coach_schedule__date=day,
+        ),
+        'revenue_coach',
+    )
+
+
+def refresh_schedule_revenue(venue_schedule_ids=(), coach_schedule_ids=()):
+    """Menghitung ulang rollup untuk (target, tanggal) dari jadwal-jadwal yang diberikan."""
+    venue_keys = set(
+        VenueSchedule.objects.filter(id__in=[i for i in venue_schedule_ids if i])
+        .values_list('venue_id', 'date')
+    )
+    coach_keys = set(
+        CoachSchedule.objects.filter(id__in=[i for i in coach_schedule_ids if i])
+        .values_list('coach_id', 'date')
+    )
+    for venue_id, day in venue_keys:
+        refresh_venue_day(venue_id, day)
+    for coach_id, day in coach_keys:
+        refresh_coach_day(coach_id, day)
+
+
+def refresh_booking_revenue(booking_id):
+    """Dipanggil saat Transaction sebuah booking disimpan/dihapus (lihat signals)."""
+    row = (
+        Booking.objects.filter(pk=booking_id)
+        .values('venue_schedule__venue_id', 'venue_schedule__date',
+                'coach_schedule__coach_id', 'coach_schedule__date')
+        .first()
+    )
+    if row is None:
+        return
+    if row['venue_schedule__venue_id']:
+        refresh_venue_day(row['venue_schedule__venue_id'], row['venue_schedule__date'])
+    if row['coach_schedule__coach_id']:
+        refresh_coach_day(row['coach_schedule__coach_id'], row['coach_schedule__date'])
+
+
+def rebuild_revenue_rollups(start_date=None):
+    """
+    Membangun ulang rollup dari tabel Transaction (backfill/perbaikan).
+    Dengan `start_date`, hanya tanggal main sejak tanggal itu yang dibangun ulang.
+    """
+    def build(model, owner_key, date_key, owner_field, revenue_field):
+        transactions = Transaction.objects.filter(status='CONFIRMED', **{f'{owner_key}__isnull': False})
+        if start_date:
+            transactions = transactions.filter(**{f'{date_key}__gte': start_date})
+        rows = (
+            transactions.values(owner_key, date_key)
+            .annotate(revenue=Sum(revenue_field), booking_count=Count('id'))
+            .order_by()
+        )
+        return [
+            model(
+                date=row[date_key], revenue=row['revenue'] or 0, booking_count=row['booking_count'],
+                **{f'{owner_field}_id': row[owner_key]}
+            )
+            for row in rows
+        ]
+
+    with db_transaction.atomic():
+        for model in (VenueDailyRevenue, CoachDailyRevenue):
+            stale = model.objects.all()
+            if start_date:
+                stale = stale.filter(date__gte=start_date)
+            stale.delete()
+        venues = VenueDailyRevenue.objects.bulk_create(build(
+            VenueDailyRevenue, 'booking__venue_schedule__venue', 'booking__venue_schedule__date',
+            'venue', 'revenue_venue',
+        ))
+        coaches = CoachDailyRevenue.objects.bulk_create(build(
+            CoachDailyRevenue, 'booking__coach_schedule__coach', 'booking__coach_schedule__date',
+            'coach', 'revenue_coach',
+        ))
+    return len(venues), len(coaches)
+
+
+def coach_revenue_total(coach):
+    """Total pendapatan coach dari rollup."""
+    return coach.daily_revenue.aggregate(total=Sum('revenue'))['total'] or Decimal('0')
+
+
+# --- Laporan venue ---
+
+def _venue_rollups(owner, start_date=None, end_date=None):
+    rollups = VenueDailyRevenue.objects.filter(venue__owner=owner)
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        rollups = rollups.filter(date__lte=end_date)
+    return rollups
+
+
+def _booking_pages(owner, start_date, end_date, page, per_page):
+    """Halaman `page` detail booking untuk setiap venue, dalam satu query."""
+    bookings = Booking.objects.filter(
+        transaction__status='CONFIRMED',
+        venue_schedule__venue__owner=owner,
+    )
+    if start_date:
+        bookings = bookings.filter(venue_schedule__date__gte=start_date)
+    if end_date:
+        bookings = bookings.filter(venue_schedule__date__lte=end_date)
+
+    offset = (page - 1) * per_page
+    bookings = (
+        bookings
+        .annotate(row_number=Window(
+            RowNumber(),
+            partition_by=[F('venue_schedule__venue')],
+            order_by=[F('venue_schedule__date').desc(), F('venue_schedule__start_time').desc(), F('id').desc()],
+        ))
+        .filter(row_number__gt=offset, row_number__lte=offset + per_page)
+        .select_related('customer', 'venue_schedule', 'transaction', 'coach_schedule__coach__user')
+        .order_by('venue_schedule__venue', 'row_number')
+    )
+
+    pages = defaultdict(list)
+    for booking in bookings:
+        pages[booking.venue_schedule.venue_id].append(booking)
+    return pages
+
+
+def venue_revenue_report(owner, start_date=None, end_date=None, granularity=None,
+                         page=1, per_page=DEFAULT_BOOKINGS_PER_VENUE):
+    """
+    Laporan pendapatan semua venue milik `owner`.
+
+    Mengembalikan dict berisi total keseluruhan dan daftar per venue
+    (venue, total_revenue, booking_count, bookings, has_more_bookings,
+    serta buckets per periode bila `granularity` diisi).
+    """
+    if granularity and granularity not in GRANULARITIES:
+        raise ValueError(f"Granularity tidak dikenal: {granularity}")
+    page = max(int(page or 1), 1)
+    per_page = min(max(int(per_page or DEFAULT_BOOKINGS_PER_VENUE), 1), MAX_BOOKINGS_PER_VENUE)
+
+    venues = list(
+        Venue.objects.filter(owner=owner)
+        .select_related('sport_category', 'location')
+        .order_by('id')
+    )
+    rollups = _venue_rollups(owner, start_date, end_date)
+
+    totals = {
+        row['venue']: row
+        for row in rollups.values('venue').annotate(
+            total=Sum('revenue'), count=Sum('booking_count')
+        ).order_by()
+    }
+
+    buckets = defaultdict(list)
+    if granularity:
+        trunc = GRANULARITIES[granularity]('date', output_field=DateField())
+        rows = (
+            rollups.annotate(period=trunc)
+            .values('venue', 'period')
+            .annotate(total=Sum('revenue'), count=Sum('booking_count'))
+            .order_by('venue', 'period')
+        )
+        for row in rows:
+            buckets[row['venue']].append({
+                'period': row['period'],
+                'total_revenue': row['total'] or Decimal('0'),
+                'booking_count': row['count'],
+            })
+
+    pages = _booking_pages(owner, start_date, end_date, page, per_page) if venues else {}
+
+    venue_reports = []
+    total_revenue = Decimal('0')
+    total_count = 0
+    for venue in venues:
+        row = totals.get(venue.id, {})
+        venue_total = row.get('total') or Decimal('0')
+        venue_count = row.get('count', 0)
+        total_revenue += venue_total
+        total_count += venue_count
+        venue_reports.append({
+            'venue': venue,
+            'total_revenue': venue_total,
+            'booking_count': venue_count,
+            'bookings': pages.get(venue.id, []),
+            'has_more_bookings': venue_count > page * per_page,
+            'buckets': buckets.get(venue.id, []),
+        })
+
+    return {
+        'total_revenue': total_revenue,
+        'booking_count': total_count,
+        'granularity': granularity,
+        'page': page,
+        'per_page': per_page,
+        'venues': venue_reports,
+    }
+
+
+def revenue_booking_payload(booking):
+    """Bentuk JSON satu booking di laporan pendapatan."""
+    return {
+        'id': booking.id,
+        'customer_username': booking.customer.username,
+        'date': booking.venue_schedule.date.strftime('%a, %d %b %Y'),
+        'start_time': booking.venue_schedule.start_time.strftime('%H:%M'),
+        'end_time': booking.venue_schedule.end_time.strftime('%H:%M'),
+        'coach': booking.coach_schedule.coach.user.username if booking.coach_schedule else None,
+        'revenue': float(booking.transaction.revenue_venue or 0),
+    }
+
+
+def venue_report_payload(report):
+    """Bentuk JSON satu venue di laporan pendapatan (dipakai view web dan API Flutter)."""
+    venue = report['venue']
+    return {
+        'venue_id': venue.id,
+        'venue_name': venue.name,
+        'sport_category': venue.sport_category.name if venue.sport_category else None,
+        'location': venue.location.name if venue.location else None,
+        'total_revenue': float(report['total_revenue']),
+        'booking_count': report['booking_count'],
+        'bookings': [revenue_booking_payload(b) for b in report['bookings']],
+        'has_more_bookings': report['has_more_bookings'],
+        'buckets': [
+            {
+                'period': bucket['period'].isoformat(),
+                'total_revenue': float(bucket['total_revenue']),
+                'booking_count': bucket['booking_count'],
+            }
+            for bucket in report['buckets']
+        ],
+    }
@@ -0,0 +1,129 @@
+"""
+Role pengguna per request.
+
+- ProfileBackend memuat UserProfile bersama User (select_related), jadi
+  user.profile di view, decorator, dan template tidak memicu query lagi.
+- RoleMiddleware memasang request.role (lazy), dihitung dari User dan
+  UserProfile yang dimuat ulang dari database di setiap request. Role
+  tidak disimpan di session atau cache proses, jadi perubahan role
+  (termasuk lewat queryset.update()) langsung berlaku di semua worker.
+- role_required() menggantikan user_passes_test(lambda user: ...profile.is_...).
+"""
+from functools import wraps
+from typing import NamedTuple
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import resolve_url
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject
+
+ADMIN = 'ADMIN'
+VENUE_OWNER = 'VENUE_OWNER'
+COACH = 'COACH'
+CUSTOMER = 'CUSTOMER'
+
+ROLE_FLAGS = {
+    ADMIN: 'is_admin',
+    VENUE_OWNER: 'is_venue_owner',
+    COACH: 'is_coach',
+    CUSTOMER: 'is_customer',
+}
+DASHBOARDS = {
+    ADMIN: 'admin_dashboard',
+    VENUE_OWNER: 'venue_dashboard',
+    COACH: 'coach_profile',
+    CUSTOMER: 'home',
+}
+
+
+class Role(NamedTuple):
+    is_authenticated: bool = False
+    is_admin: bool = False
+    has_profile: bool = False
+    is_customer: bool = False
+    is_venue_owner: bool = False
+    is_coach: bool = False
+
+    def has(self, role):
+        return getattr(self, ROLE_FLAGS[role])
+
+    @property
+    def name(self):
+        """Satu nama role; admin lebih dulu, lalu pemilik venue, coach, customer."""
+        for role in (ADMIN, VENUE_OWNER, COACH):
+            if self.has(role):
+                return role
+        return CUSTOMER
+
+    @property
+    def dashboard(self):
+        """Nama URL dashboard untuk role ini."""
+        if not self.is_authenticated:
+            return 'index'
+        return DASHBOARDS[self.name]
+
+
+ANONYMOUS = Role()
+
+
+def role_for_user(user):
+    if not user.is_authenticated:
+        return ANONYMOUS
+    # RelatedObjectDoesNotExist adalah turunan AttributeError
+    profile = getattr(user, 'profile', None)
+    return Role(
+        is_authenticated=True,
+        is_admin=user.is_superuser or user.is_staff,
+        has_profile=profile is not None,
+        is_customer=bool(profile and profile.is_customer),
+        is_venue_owner=bool(profile and profile.is_venue_owner),
+        is_coach=bool(profile and profile.is_coach),
+    )
+
+
+def get_request_role(request):
+    return role_for_user(request.user)
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend yang mengambil UserProfile dalam query yang sama dengan User."""
+
+    def get_user(self, user_id):
+        user_model = get_user_model()
+        try:
+            user = user_model._default_manager.select_related('profile').get(pk=user_id)
+        except user_model.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+@sync_and_async_middleware
+def RoleMiddleware(get_response):
+    """
+    Memasang request.role; harus berada setelah AuthenticationMiddleware.
+    Mendukung async agar view async (proxy_image) tidak dipindah ke thread sync.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            request.role = SimpleLazyObject(lambda: get_request_role(request))
+            return await get_response(request)
+    else:
+        def middleware(request):
+            request.role = SimpleLazyObject(lambda: get_request_role(request))
+            return get_response(request)
+    return middleware
+
+
+def role_required(role, login_url='home'):
+    """Seperti user_passes_test, tetapi memeriksa request.role."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.role.has(role):
+                return view_func(request, *args, **kwargs)
+            return redirect_to_login(request.get_full_path(), resolve_url(login_url))
+        return _wrapped_view
+    return decorator
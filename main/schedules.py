@@ -0,0 +1,445 @@
+"""
+Pembuatan slot jadwal (VenueSchedule / CoachSchedule).
+
+Satu permintaan generate cukup memakai satu query untuk mengecek slot yang
+sudah ada dan satu bulk insert, berapa pun jumlah tanggal dan slot per hari.
+
+Slot dari pola mingguan (VenueAvailability / CoachAvailability) hanya
+dihitung saat dibaca ("slot virtual", id=None) dan baru disimpan sebagai
+baris jadwal ketika dibooking.
+
+Penghapusan massal (delete_slots) berjalan per batch DELETE_BATCH_SIZE id
+agar tidak melewati batas parameter SQLite dan tidak menahan kunci tulis
+terlalu lama. Slot yang sudah dibooking atau masih punya Booking tidak
+pernah ikut terhapus.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils.formats import date_format
+
+from .models import CoachAvailability, CoachSchedule
+
+MAX_GENERATE_DAYS = 92
+VIRTUAL_HORIZON_DAYS = 28
+SLOT_KEY_RE = re.compile(r'^(\d+)-(\d{8})-(\d{4})$')
+ALL_WEEKDAYS = frozenset(range(7))
+DELETE_BATCH_SIZE = 500
+
+
+def iter_slot_times(day, start_time, end_time, slot_minutes=60):
+    """Memecah rentang jam dalam satu hari menjadi (mulai, selesai) per slot."""
+    current = datetime.combine(day, start_time)
+    end_dt = datetime.combine(day, end_time)
+    step = timedelta(minutes=slot_minutes)
+    while current < end_dt:
+        next_dt = min(current + step, end_dt)
+        yield current.time(), next_dt.time()
+        current = next_dt
+
+
+def iter_slot_keys(start_date, end_date, start_time, end_time, weekdays=None, slot_minutes=60):
+    """Menghasilkan (tanggal, mulai, selesai) untuk setiap slot dalam rentang tanggal."""
+    weekdays = ALL_WEEKDAYS if not weekdays else frozenset(weekdays)
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            for slot_start, slot_end in iter_slot_times(day, start_time, end_time, slot_minutes):
+                yield day, slot_start, slot_end
+        day += timedelta(days=1)
+
+
+def _minute_span(start_time, end_time):
+    """[mulai, selesai) dalam menit; selesai 00:00 berarti tengah malam."""
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    return start, end if end > start else 24 * 60
+
+
+def _overlaps(span, spans):
+    return any(span[0] < other_end and other_start < span[1] for other_start, other_end in spans)
+
+
+def generate_slots(model, owner_field, owner, start_date, end_date, start_time, end_time,
+                   weekdays=None, slot_minutes=60, is_available=True):
+    """
+    Membuat slot yang belum ada untuk `owner` (venue atau coach) dan
+    mengembalikan daftar slot yang baru dibuat, urut tanggal dan jam.
+    Slot yang tumpang tindih dengan slot yang sudah ada (mis. 10:30-11:00
+    di dalam 10:00-11:00) dilewati.
+    """
+    keys = list(iter_slot_keys(start_date, end_date, start_time, end_time, weekdays, slot_minutes))
+    if not keys:
+        return []
+
+    owner_filter = {owner_field: owner}
+
+    with db_transaction.atomic():
+        existing = {}
+        rows = model.objects.filter(date__range=(start_date, end_date), **owner_filter).values_list(
+            'date', 'start_time', 'end_time'
+        )
+        for day, slot_start, slot_end in rows:
+            existing.setdefault(day, []).append(_minute_span(slot_start, slot_end))
+
+        new_keys = {
+            (day, slot_start) for day, slot_start, slot_end in keys
+            if not _overlaps(_minute_span(slot_start, slot_end), existing.get(day, ()))
+        }
+        if not new_keys:
+            return []
+
+        model.objects.bulk_create(
+            [
+                model(date=day, start_time=slot_start, end_time=slot_end,
+                      is_available=is_available, **owner_filter)
+                for day, slot_start, slot_end in keys
+                if (day, slot_start) in new_keys
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        # bulk_create tidak memicu signal; slot_index dan venue_sort mengimpor modul ini
+        from .slot_index import invalidate
+        invalidate(owner_field, getattr(owner, 'pk', owner))
+        if owner_field == 'venue':
+            from .venue_sort import schedule_refresh
+            schedule_refresh(getattr(owner, 'pk', owner))
+
+        # bulk_create dengan ignore_conflicts tidak mengisi primary key,
+        # jadi baris baru diambil ulang dalam satu query.
+        created = model.objects.filter(
+            date__range=(start_date, end_date),
+            start_time__in={slot_start for _, slot_start in new_keys},
+            **owner_filter
+        ).order_by('date', 'start_time')
+        return [slot for slot in created if (slot.date, slot.start_time) in new_keys]
+
+
+class SlotFilterError(ValueError):
+    """Filter penghapusan jadwal tidak valid; pesannya ditampilkan ke klien."""
+
+
+def parse_slot_filter(data):
+    """
+    Filter penghapusan dari body JSON: `selected_schedules` (daftar id) atau
+    rentang `date_from`/`date_to` dengan `weekdays` (0=Senin) dan jendela
+    `start_time`/`end_time` (HH:MM) opsional. Melempar SlotFilterError.
+    """
+    ids = data.get('selected_schedules') or []
+    if ids:
+        try:
+            return {'ids': [int(pk) for pk in ids]}
+        except (TypeError, ValueError):
+            raise SlotFilterError("Id jadwal tidak valid.")
+
+    if not data.get('date_from'):
+        raise SlotFilterError("Tidak ada jadwal yang dipilih.")
+    try:
+        start_date = date.fromisoformat(data['date_from'])
+        end_date = date.fromisoformat(data.get('date_to') or data['date_from'])
+    except (TypeError, ValueError):
+        raise SlotFilterError("Format tanggal harus YYYY-MM-DD.")
+    if end_date < start_date:
+        raise SlotFilterError("Tanggal akhir tidak boleh sebelum tanggal mulai.")
+
+    try:
+        weekdays = {int(day) for day in data.get('weekdays') or []}
+        start_time = time.fromisoformat(data['start_time']) if data.get('start_time') else None
+        end_time = time.fromisoformat(data['end_time']) if data.get('end_time') else None
+    except (TypeError, ValueError):
+        raise SlotFilterError("Format hari atau jam tidak valid.")
+    if not weekdays <= ALL_WEEKDAYS:
+        raise SlotFilterError("Hari harus di antara 0 (Senin) dan 6 (Minggu).")
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'weekdays': weekdays,
+        'start_time': start_time,
+        'end_time': end_time,
+    }
+
+
+def slot_filter_queryset(model, owner_field, owner, ids=None, start_date=None, end_date=None,
+                         weekdays=None, start_time=None, end_time=None):
+    """Queryset slot milik `owner` yang cocok dengan filter parse_slot_filter()."""
+    queryset = model.objects.filter(**{owner_field: owner})
+    if ids is not None:
+        return queryset.filter(pk__in=ids)
+    queryset = queryset.filter(date__range=(start_date, end_date))
+    if weekdays and set(weekdays) != ALL_WEEKDAYS:
+        # week_day Django: 1=Minggu ... 7=Sabtu
+        queryset = queryset.filter(date__week_day__in=[(day + 1) % 7 + 1 for day in weekdays])
+    if start_time:
+        queryset = queryset.filter(start_time__gte=start_time)
+    if end_time:
+        queryset = queryset.filter(end_time__lte=end_time)
+    return queryset
+
+
+def _chunks(values, size):
+    for index in range(0, len(values), size):
+        yield values[index:index + size]
+
+
+def delete_free_slots(queryset, batch_size=DELETE_BATCH_SIZE):
+    """
+    Menghapus slot di `queryset` yang belum dibooking, per batch id.
+    Mengembalikan (jumlah terhapus, jumlah dilewati karena sudah dibooking).
+    """
+    model = queryset.model
+    free = Q(is_booked=False, booking__isnull=True)
+    deleted = 0
+    while True:
+        pks = list(queryset.filter(free).order_by().values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        with db_transaction.atomic():
+            _, per_model = model.objects.filter(free, pk__in=pks).delete()
+        deleted += per_model.get(model._meta.label, 0)
+    return deleted, queryset.count()
+
+
+def delete_slots(model, owner_field, owner, batch_size=DELETE_BATCH_SIZE, **slot_filter):
+    """
+    delete_free_slots() untuk filter hasil parse_slot_filter(); daftar id
+    yang panjang dipecah per batch sebelum dikirim ke database.
+    """
+    ids = slot_filter.pop('ids', None)
+    if ids is None:
+        return delete_free_slots(slot_filter_queryset(model, owner_field, owner, **slot_filter), batch_size)
+
+    deleted = skipped = 0
+    for chunk in _chunks(list(dict.fromkeys(ids)), batch_size):
+        chunk_deleted, chunk_skipped = delete_free_slots(
+            slot_filter_queryset(model, owner_field, owner, ids=chunk), batch_size
+        )
+        deleted += chunk_deleted
+        skipped += chunk_skipped
+    return deleted, skipped
+
+
+def slot_payload(slot):
+    """Bentuk JSON slot baru yang dipakai klien Flutter dan halaman kelola jadwal."""
+    return {
+        'id': slot.id,
+        'date_str_iso': slot.date.strftime('%Y-%m-%d'),
+        'date_str_display': date_format(slot.date, "l, d M Y"),
+        'start_time': slot.start_time.strftime('%H:%M'),
+        'end_time': slot.end_time.strftime('%H:%M'),
+        'is_booked': slot.is_booked,
+        'is_available': slot.is_available,
+    }
+
+
+def availability_payload(template):
+    """Bentuk JSON pola ketersediaan mingguan."""
+    return {
+        'id': template.id,
+        'weekdays': sorted(template.weekday_set),
+        'weekdays_display': template.weekday_display(),
+        'start_time': template.start_time.strftime('%H:%M'),
+        'end_time': template.end_time.strftime('%H:%M'),
+        'slot_minutes': template.slot_minutes,
+        'valid_from': template.valid_from.isoformat() if template.valid_from else None,
+        'valid_until': template.valid_until.isoformat() if template.valid_until else None,
+        'is_active': template.is_active,
+    }
+
+
+# --- Slot virtual dari pola mingguan ---
+
+def slot_key(owner_id, day, start_time):
+    """Kunci slot yang stabil walau barisnya belum ada, mis. "12-20261020-1600"."""
+    return f"{owner_id}-{day:%Y%m%d}-{start_time:%H%M}"
+
+
+def parse_slot_key(value):
+    """Kebalikan slot_key(); mengembalikan (owner_id, tanggal, jam mulai) atau None."""
+    match = SLOT_KEY_RE.match(str(value or ''))
+    if not match:
+        return None
+    try:
+        owner_id = int(match.group(1))
+        day = datetime.strptime(match.group(2), '%Y%m%d').date()
+        start_time = datetime.strptime(match.group(3), '%H%M').time()
+    except ValueError:
+        return None
+    return owner_id, day, start_time
+
+
+def template_slot_end(templates, day, start_time):
+    """Jam selesai slot yang dimulai pada `start_time` menurut salah satu pola, atau None."""
+    for template in templates:
+        if not template.covers(day):
+            continue
+        for slot_start, slot_end in iter_slot_times(day, template.start_time, template.end_time,
+                                                    template.slot_minutes):
+            if slot_start == start_time:
+                return slot_end
+    return None
+
+
+def expand_templates(templates, start_date, end_date):
+    """Semua (tanggal, mulai, selesai) dari pola dalam rentang; pola pertama menang bila tumpang tindih."""
+    slots = {}
+    for template in templates:
+        day = start_date
+        while day <= end_date:
+            if template.covers(day):
+                for slot_start, slot_end in iter_slot_times(day, template.start_time,
+                                                            template.end_time, template.slot_minutes):
+                    slots.setdefault((day, slot_start), slot_end)
+            day += timedelta(days=1)
+    return sorted((day, slot_start, slot_end) for (day, slot_start), slot_end in slots.items())
+
+
+def with_virtual_slots(model, owner_field, owner, rows, start_date, end_date=None, not_before=None):
+    """
+    Menggabungkan baris jadwal `rows` dengan slot virtual dari pola milik `owner`.
+
+    Slot virtual yang bertabrakan dengan baris apa pun (termasuk yang sudah
+    dibooking atau ditutup pemilik) tidak ditampilkan. Setiap slot mendapat
+    atribut `slot_key`; slot virtual punya id=None.
+    """
+    rows = list(rows)
+    for row in rows:
+        row.slot_key = slot_key(owner.pk, row.date, row.start_time)
+
+    templates = [t for t in owner.availability_templates.all() if t.is_active]
+    if not templates:
+        return rows
+
+    end_date = end_date or start_date + timedelta(days=VIRTUAL_HORIZON_DAYS - 1)
+    taken = set(
+        model.objects.filter(date__range=(start_date, end_date), **{owner_field: owner})
+        .values_list('date', 'start_time')
+    )
+
+    virtual = []
+    for day, slot_start, slot_end in expand_templates(templates, start_date, end_date):
+        if (day, slot_start) in taken:
+            continue
+        if not_before and datetime.combine(day, slot_start) < not_before:
+            continue
+        slot = model(date=day, start_time=slot_start, end_time=slot_end, **{owner_field: owner})
+        slot.slot_key = slot_key(owner.pk, day, slot_start)
+        virtual.append(slot)
+
+    return sorted(rows + virtual, key=lambda s: (s.date, s.start_time))
+
+
+def find_slot(model, owner_field, ref, queryset=None):
+    """
+    Mencari slot berdasarkan id baris atau slot_key. Untuk kunci yang belum
+    punya baris, dikembalikan slot virtual (belum disimpan) bila pola
+    pemiliknya mencakup jam tersebut. Melempar model.DoesNotExist bila tidak ada.
+    """
+    queryset = model.objects.all() if queryset is None else queryset
+    if str(ref).isdigit():
+        return queryset.get(pk=ref)
+
+    parsed = parse_slot_key(ref)
+    if parsed is None:
+        raise model.DoesNotExist("Kunci slot tidak valid.")
+    owner_id, day, start_time = parsed
+
+    row_id = (
+        model.objects.filter(date=day, start_time=start_time, **{f'{owner_field}_id': owner_id})
+        .values_list('pk', flat=True).first()
+    )
+    if row_id is not None:
+        return queryset.get(pk=row_id)
+
+    owner_model = model._meta.get_field(owner_field).related_model
+    try:
+        owner = owner_model.objects.get(pk=owner_id)
+    except owner_model.DoesNotExist:
+        raise model.DoesNotExist("Pemilik slot tidak ditemukan.")
+    end_time = template_slot_end(owner.availability_templates.all(), day, start_time)
+    if end_time is None:
+        raise model.DoesNotExist("Slot tidak ada dalam pola ketersediaan.")
+    return model(date=day, start_time=start_time, end_time=end_time, **{owner_field: owner})
+
+
+def materialize_slot_at(model, owner_field, owner, day, start_time):
+    """
+    Mengambil baris slot (owner, tanggal, jam), membuatnya dulu dari pola
+    mingguan bila belum ada. Tidak mengunci apa pun: klaim slot dilakukan
+    dengan UPDATE bersyarat (lihat booking.claim_slot). Melempar
+    model.DoesNotExist bila slot tidak ada.
+    """
+    lookup = {owner_field: owner, 'date': day, 'start_time': start_time}
+    try:
+        return model.objects.get(**lookup)
+    except model.DoesNotExist:
+        pass
+
+    end_time = template_slot_end(owner.availability_templates.all(), day, start_time)
+    if end_time is None:
+        raise model.DoesNotExist("Slot tidak ada dalam pola ketersediaan.")
+
+    try:
+        with db_transaction.atomic():
+            return model.objects.create(end_time=end_time, **lookup)
+    except IntegrityError:
+        # Request lain sudah membuat baris yang sama lebih dulu.
+        return model.objects.get(**lookup)
+
+
+def materialize_slot(model, owner_field, owner, ref):
+    """
+    Seperti materialize_slot_at(), tetapi menerima id baris atau slot_key
+    dari klien. Dengan owner=None, pemilik diambil dari slot_key.
+    """
+    owner_filter = {owner_field: owner} if owner is not None else {}
+    if str(ref).isdigit():
+        return model.objects.get(pk=ref, **owner_filter)
+
+    parsed = parse_slot_key(ref)
+    if parsed is None:
+        raise model.DoesNotExist("Kunci slot tidak valid.")
+    owner_id, day, start_time = parsed
+    if owner is None:
+        owner_model = model._meta.get_field(owner_field).related_model
+        owner = owner_model.objects.filter(pk=owner_id).first()
+    if owner is None or owner.pk != owner_id:
+        raise model.DoesNotExist("Kunci slot tidak valid.")
+    return materialize_slot_at(model, owner_field, owner, day, start_time)
+
+
+def virtual_coach_slots(day, start_time, end_time=None, **coach_filters):
+    """
+    Slot coach virtual pada tanggal dan jam mulai tertentu dari pola
+    CoachAvailability, untuk coach yang belum punya baris jadwal di jam itu.
+    `end_time`, bila diisi, mensyaratkan slot coach menutupi jam selesai tersebut.
+    """
+    weekday = str(day.weekday())
+    templates = (
+        CoachAvailability.objects.filter(
+            is_active=True,
+            weekdays__contains=weekday,
+            start_time__lte=start_time,
+            end_time__gt=start_time,
+            **{f'coach__{k}': v for k, v in coach_filters.items()}
+        )
+        # dikorelasikan per coach agar memakai index unik (coach, date, start_time)
+        .exclude(Exists(CoachSchedule.objects.filter(coach_id=OuterRef('coach_id'), date=day, start_time=start_time)))
+        .select_related('coach', 'coach__user', 'coach__main_sport_trained')
+        .order_by('coach_id', 'id')
+    )
+
+    slots = {}
+    for template in templates:
+        if template.coach_id in slots:
+            continue
+        slot_end = template_slot_end([template], day, start_time)
+        if slot_end is None or (end_time and slot_end < end_time):
+            continue
+        slot = CoachSchedule(coach=template.coach, date=day, start_time=start_time, end_time=slot_end)
+        slot.slot_key = slot_key(template.coach_id, day, start_time)
+        slots[template.coach_id] = slot
+    return list(slots.values())
@@ -0,0 +1,305 @@
+"""
+Serializer daftar booking untuk my_bookings, booking_history, API detail
+dan endpoint JSON-nya (show_json, show_my_bookings_json,
+show_booking_history_json).
+
+- booking_list_queryset() memberi rencana query tetap: select_related untuk
+  relasi tunggal, satu prefetch untuk peralatan, dan only() agar kolom yang
+  tidak pernah dikirim (deskripsi coach, foto profil, dst.) tidak dibaca.
+- DisplayCache menyimpan string tanggal/jam yang sudah diformat selama satu
+  respons; banyak booking berbagi tanggal dan jam yang sama.
+- dumps()/json_response() memakai orjson bila terpasang, selain itu json
+  standar dengan separator ringkas.
+- with_latest_reviews() menempelkan review terbaru customer untuk venue dan
+  coach tiap booking sebagai anotasi Subquery, jadi riwayat booking tetap
+  satu query berapa pun jumlah review yang pernah ditulis.
+"""
+import json
+
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.http import HttpResponse
+
+from .models import BookingEquipment, Review
+
+try:
+    import orjson
+except ImportError:  # opsional, lihat docstring modul
+    orjson = None
+
+BOOKING_LIST_RELATED = (
+    'customer',
+    'venue_schedule__venue__location',
+    'venue_schedule__venue__sport_category',
+    'coach_schedule__coach__user__profile',
+    'coach_schedule__coach__main_sport_trained',
+    'transaction',
+)
+
+BOOKING_LIST_ONLY = (
+    'id', 'customer', 'venue_schedule', 'coach_schedule', 'total_price', 'booking_time',
+    'customer__id', 'customer__username', 'customer__first_name', 'customer__last_name',
+    'venue_schedule__id', 'venue_schedule__venue', 'venue_schedule__date',
+    'venue_schedule__start_time', 'venue_schedule__end_time',
+    'venue_schedule__venue__id', 'venue_schedule__venue__name', 'venue_schedule__venue__description',
+    'venue_schedule__venue__price_per_hour', 'venue_schedule__venue__main_image',
+    'venue_schedule__venue__location', 'venue_schedule__venue__sport_category',
+    'venue_schedule__venue__location__id', 'venue_schedule__venue__location__name',
+    'venue_schedule__venue__sport_category__id', 'venue_schedule__venue__sport_category__name',
+    'coach_schedule__id', 'coach_schedule__coach',
+    'coach_schedule__coach__id', 'coach_schedule__coach__rate_per_hour',
+    'coach_schedule__coach__user', 'coach_schedule__coach__main_sport_trained',
+    'coach_schedule__coach__user__id', 'coach_schedule__coach__user__username',
+    'coach_schedule__coach__user__first_name', 'coach_schedule__coach__user__last_name',
+    'coach_schedule__coach__user__profile__id', 'coach_schedule__coach__user__profile__user',
+    'coach_schedule__coach__user__profile__phone_number',
+    'coach_schedule__coach__main_sport_trained__id', 'coach_schedule__coach__main_sport_trained__name',
+    'transaction__id', 'transaction__booking', 'transaction__status', 'transaction__payment_method',
+    'transaction__transaction_time', 'transaction__revenue_venue', 'transaction__revenue_coach',
+)
+
+
+def booking_list_queryset(queryset, compact=True):
+    """
+    Menerapkan rencana query daftar booking pada `queryset`.
+    compact=False melewati only() untuk template yang butuh kolom lain.
+    """
+    equipment = BookingEquipment.objects.select_related('equipment')
+    if compact:
+        equipment = equipment.only(
+            'id', 'booking', 'quantity', 'sub_total',
+            'equipment__id', 'equipment__name', 'equipment__rental_price',
+        )
+    queryset = queryset.select_related(*BOOKING_LIST_RELATED).prefetch_related(
+        Prefetch('equipment_details', queryset=equipment)
+    )
+    return queryset.only(*BOOKING_LIST_ONLY) if compact else queryset
+
+
+class DisplayCache:
+    """String tanggal/jam yang sudah diformat, dipakai ulang dalam satu respons."""
+
+    def __init__(self):
+        self._dates = {}
+        self._times = {}
+
+    def date(self, value):
+        """(ISO, tampilan panjang) untuk sebuah tanggal."""
+        cached = self._dates.get(value)
+        if cached is None:
+            cached = self._dates[value] = (value.isoformat(), value.strftime('%A, %d %B %Y'))
+        return cached
+
+    def time(self, value):
+        cached = self._times.get(value)
+        if cached is None:
+            cached = self._times[value] = value.strftime('%H:%M')
+        return cached
+
+
+def dumps(data):
+    """JSON ringkas dalam bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def json_response(data, status=200):
+    """Pengganti JsonResponse (termasuk safe=False) dengan encoder di atas."""
+    return HttpResponse(dumps(data), content_type='application/json', status=status)
+
+
+def _name(user):
+    return user.get_full_name() or user.username
+
+
+def _transaction(booking):
+    # RelatedObjectDoesNotExist adalah turunan AttributeError
+    return getattr(booking, 'transaction', None)
+
+
+def _money(value):
+    return float(value or 0)
+
+
+def booking_record(booking, cache, extended=True):
+    """Bentuk {"model", "pk", "fields"} milik show_json dan kembarannya."""
+    schedule = booking.venue_schedule
+    coach_schedule = booking.coach_schedule
+    fields = {
+        'venue_schedule': schedule.id,
+        'coach_schedule': coach_schedule.id if coach_schedule else None,
+        'customer': booking.customer_id,
+        'customer_name': _name(booking.customer),
+        'venue_name': schedule.venue.name,
+        'date': cache.date(schedule.date)[0],
+        'start_time': cache.time(schedule.start_time),
+        'end_time': cache.time(schedule.end_time),
+        'coach_name': _name(coach_schedule.coach.user) if coach_schedule else '-',
+        'total_price': str(booking.total_price),
+        'booking_time': booking.booking_time.isoformat() if booking.booking_time else None,
+    }
+    if extended:
+        transaction = _transaction(booking)
+        fields['payment_method'] = transaction.payment_method if transaction else 'CASH'
+        fields['equipments'] = [
+            {'name': item.equipment.name, 'quantity': item.quantity}
+            for item in booking.equipment_details.all()
+        ]
+    return {'model': 'main.booking', 'pk': booking.pk, 'fields': fields}
+
+
+def _schedule(schedule, cache):
+    iso, display = cache.date(schedule.date)
+    return {
+        'date': iso,
+        'date_display': display,
+        'start_time': cache.time(schedule.start_time),
+        'end_time': cache.time(schedule.end_time),
+    }
+
+
+def my_booking_payload(booking, cache):
+    """Satu booking PENDING untuk my_bookings (AJAX JSON)."""
+    venue = booking.venue_schedule.venue
+    coach = booking.coach_schedule.coach if booking.coach_schedule else None
+    transaction = _transaction(booking)
+    return {
+        'id': booking.id,
+        'venue': {
+            'id': venue.id,
+            'name': venue.name,
+            'description': venue.description or '',
+            'sport_category': venue.sport_category.name if venue.sport_category else None,
+            'location': venue.location.name if venue.location else None,
+            'price_per_hour': _money(venue.price_per_hour),
+            'image_url': venue.main_image or None,
+        },
+        'schedule': {'id': booking.venue_schedule.id, **_schedule(booking.venue_schedule, cache)},
+        'coach': {
+            'id': coach.id,
+            'name': _name(coach.user),
+            'rate_per_hour': _money(coach.rate_per_hour),
+            'specialization': coach.main_sport_trained.name if coach.main_sport_trained else '',
+        } if coach else None,
+        'equipments': [
+            {
+                'id': item.equipment.id,
+                'name': item.equipment.name,
+                'quantity': item.quantity,
+                'rental_price': _money(item.equipment.rental_price),
+                'sub_total': _money(item.sub_total),
+            }
+            for item in booking.equipment_details.all()
+        ],
+        'transaction': {
+            'id': transaction.id,
+            'status': transaction.status,
+            'status_display': transaction.get_status_display(),
+            'payment_method': transaction.payment_method,
+            'revenue_venue': _money(transaction.revenue_venue),
+            'revenue_coach': _money(transaction.revenue_coach),
+            'transaction_time': transaction.transaction_time.isoformat(),
+        } if transaction else None,
+        'total_price': _money(booking.total_price),
+        'booking_time': booking.booking_time.isoformat(),
+        'can_edit': True,
+        'can_cancel': True,
+    }
+
+
+REVIEW_TARGETS = {
+    'venue': ('target_venue', 'venue_schedule__venue'),
+    'coach': ('target_coach', 'coach_schedule__coach'),
+}
+REVIEW_FIELDS = ('id', 'rating', 'comment', 'created_at')
+
+
+def with_latest_reviews(queryset, customer):
+    """
+    Menambahkan anotasi latest_<venue|coach>_review_<field> berisi review
+    terbaru `customer` untuk venue dan coach setiap booking.
+    """
+    annotations = {}
+    for kind, (target, outer) in REVIEW_TARGETS.items():
+        latest = Review.objects.filter(customer=customer, **{target: OuterRef(outer)}).order_by('-created_at', '-id')
+        for field in REVIEW_FIELDS:
+            annotations[f'latest_{kind}_review_{field}'] = Subquery(latest.values(field)[:1])
+    return queryset.annotate(**annotations)
+
+
+def latest_review(booking, kind):
+    """Review hasil with_latest_reviews() untuk `kind` ('venue'/'coach'), atau None."""
+    values = {field: getattr(booking, f'latest_{kind}_review_{field}', None) for field in REVIEW_FIELDS}
+    if values['id'] is None:
+        return None
+    return Review(customer_id=booking.customer_id, **values)
+
+
+def _review(review):
+    if review is None:
+        return None
+    return {
+        'id': review.id,
+        'rating': review.rating,
+        'comment': review.comment,
+        'created_at': review.created_at.isoformat(),
+    }
+
+
+def history_booking_payload(booking, cache):
+    """Satu booking untuk booking_history (AJAX JSON); queryset-nya melalui with_latest_reviews()."""
+    venue = booking.venue_schedule.venue
+    coach = booking.coach_schedule.coach if booking.coach_schedule else None
+    transaction = booking.transaction
+    coach_data = None
+    if coach is not None:
+        profile = getattr(coach.user, 'profile', None)
+        coach_data = {
+            'id': coach.id,
+            'name': _name(coach.user),
+            'phone_number': profile.phone_number if profile else None,
+        }
+    return {
+        'id': booking.id,
+        'venue': {
+            'id': venue.id,
+            'name': venue.name,
+            'location': venue.location.name if venue.location else None,
+        },
+        'schedule': _schedule(booking.venue_schedule, cache),
+        'coach': coach_data,
+        'equipment': [
+            {
+                'id': item.equipment.id,
+                'name': item.equipment.name,
+                'quantity': item.quantity,
+                'price': str(item.equipment.rental_price),
+            }
+            for item in booking.equipment_details.all()
+        ],
+        'total_price': str(booking.total_price),
+        'transaction': {
+            'payment_method': transaction.payment_method,
+            'status': transaction.status,
+            'status_display': transaction.get_status_display(),
+        },
+        'venue_review': _review(latest_review(booking, 'venue')),
+        'coach_review': _review(latest_review(booking, 'coach')) if coach else None,
+        'booking_time': booking.booking_time.isoformat(),
+    }
+
+
+def booking_detail_payload(booking):
+    """Booking untuk form edit di aplikasi Flutter (api_booking_detail)."""
+    transaction = _transaction(booking)
+    return {
+        'id': booking.pk,
+        'venue_id': booking.venue_schedule.venue_id,
+        'schedule_id': booking.venue_schedule_id,
+        'coach_schedule_id': booking.coach_schedule_id,
+        'payment_method': transaction.payment_method if transaction else 'CASH',
+        'equipments': [
+            {'id': item.equipment_id, 'name': item.equipment.name, 'quantity': item.quantity}
+            for item in booking.equipment_details.all()
+        ],
+    }
@@ -0,0 +1,218 @@
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    Booking, CoachAvailability, CoachProfile, CoachSchedule, LocationArea, Review, SportCategory,
+    Transaction, Venue, VenueAvailability, VenueSchedule,
+)
+from . import autocomplete
+from .coach_search import coach_search_name, index_coach
+from .ratings import refresh_review_targets
+from .refdata import bump_version
+from .revenue import refresh_booking_revenue, refresh_schedule_revenue
+from .slot_index import invalidate as invalidate_slot_index
+from .venue_search import reindex_venues, remove_venue
+from .venue_sort import schedule_refresh as refresh_next_available_slot
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, **kwargs):
+    refresh_review_targets(instance)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, origin=None, **kwargs):
+    if origin is None or isinstance(origin, Review):
+        refresh_review_targets(instance)
+        return
+    # Review ikut terhapus karena cascade (venue/coach/user dihapus); target
+    # mungkin ikut hilang, jadi hitung ulang setelah commit.
+    db_transaction.on_commit(lambda: refresh_review_targets(instance, only_existing=True))
+
+
+# --- Rollup pendapatan harian ---
+
+@receiver(post_init, sender=Transaction)
+def remember_transaction_status(sender, instance, **kwargs):
+    # lewat __dict__ agar field yang di-defer tidak memicu query
+    instance._rollup_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Transaction)
+def update_revenue_rollup_on_save(sender, instance, **kwargs):
+    previous, instance._rollup_status = instance._rollup_status, instance.status
+    # Transaksi yang tidak pernah CONFIRMED tidak memengaruhi rollup
+    if 'CONFIRMED' in (previous, instance.status):
+        refresh_booking_revenue(instance.booking_id)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_revenue_rollup_on_delete(sender, instance, **kwargs):
+    if instance.status == 'CONFIRMED':
+        refresh_booking_revenue(instance.booking_id)
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_schedules(sender, instance, **kwargs):
+    instance._rollup_schedules = (
+        instance.__dict__.get('venue_schedule_id'), instance.__dict__.get('coach_schedule_id')
+    )
+
+
+@receiver(post_save, sender=Booking)
+def update_revenue_rollup_on_reschedule(sender, instance, created, **kwargs):
+    previous = instance._rollup_schedules
+    current = instance._rollup_schedules = (instance.venue_schedule_id, instance.coach_schedule_id)
+    if created or previous == current:
+        return
+    if not Transaction.objects.filter(booking=instance, status='CONFIRMED').exists():
+        return
+    refresh_schedule_revenue(
+        venue_schedule_ids=(previous[0], current[0]),
+        coach_schedule_ids=(previous[1], current[1]),
+    )
+
+
+# --- Cache data referensi ---
+
+@receiver(post_save, sender=SportCategory)
+@receiver(post_delete, sender=SportCategory)
+@receiver(post_save, sender=LocationArea)
+@receiver(post_delete, sender=LocationArea)
+def bump_refdata_version(sender, **kwargs):
+    # setelah commit: versi baru yang terlihat sebelum commit akan di-cache bersama baris lama
+    db_transaction.on_commit(lambda: bump_version(sender))
+
+
+# --- Indeks ketersediaan slot ---
+
+@receiver(post_save, sender=VenueSchedule)
+@receiver(post_delete, sender=VenueSchedule)
+@receiver(post_save, sender=VenueAvailability)
+@receiver(post_delete, sender=VenueAvailability)
+def invalidate_venue_slot_index(sender, instance, **kwargs):
+    invalidate_slot_index('venue', instance.venue_id)
+
+
+@receiver(post_save, sender=VenueSchedule)
+@receiver(post_delete, sender=VenueSchedule)
+@receiver(post_save, sender=VenueAvailability)
+@receiver(post_delete, sender=VenueAvailability)
+def update_next_available_slot(sender, instance, **kwargs):
+    refresh_next_available_slot(instance.venue_id)
+
+
+@receiver(post_save, sender=CoachSchedule)
+@receiver(post_delete, sender=CoachSchedule)
+@receiver(post_save, sender=CoachAvailability)
+@receiver(post_delete, sender=CoachAvailability)
+def invalidate_coach_slot_index(sender, instance, **kwargs):
+    invalidate_slot_index('coach', instance.coach_id)
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_save, sender=CoachProfile)
+def reset_slot_index_for_new_owner(sender, instance, created, **kwargs):
+    # id yang dipakai ulang (mis. SQLite) tidak boleh mewarisi bitmap lama
+    if created:
+        invalidate_slot_index('venue' if sender is Venue else 'coach', instance.pk)
+
+
+# --- Indeks pencarian venue ---
+
+@receiver(post_save, sender=Venue)
+def index_venue_on_save(sender, instance, **kwargs):
+    reindex_venues('id', instance.pk)
+
+
+@receiver(post_delete, sender=Venue)
+def remove_venue_from_index(sender, instance, **kwargs):
+    remove_venue(instance.pk)
+
+
+@receiver(post_save, sender=LocationArea)
+@receiver(post_save, sender=SportCategory)
+def reindex_venues_on_refdata_rename(sender, instance, created, **kwargs):
+    if not created:
+        reindex_venues('location_id' if sender is LocationArea else 'sport_category_id', instance.pk)
+
+
+@receiver(post_delete, sender=LocationArea)
+def reindex_venues_without_location(sender, instance, **kwargs):
+    # location venue sudah di-SET_NULL lewat update(), tanpa signal Venue
+    reindex_venues('location_id', None)
+
+
+# --- Indeks pencarian nama coach ---
+
+@receiver(pre_save, sender=CoachProfile)
+def fill_coach_search_name(sender, instance, **kwargs):
+    instance.search_name = coach_search_name(instance.user)
+
+
+@receiver(post_init, sender=CoachProfile)
+def remember_coach_search_name(sender, instance, **kwargs):
+    instance._indexed_search_name = instance.__dict__.get('search_name')
+
+
+@receiver(post_save, sender=CoachProfile)
+def index_coach_name(sender, instance, created, **kwargs):
+    if created or instance.search_name != instance._indexed_search_name:
+        index_coach(instance)
+        instance._indexed_search_name = instance.search_name
+
+
+@receiver(post_save, sender=User)
+def reindex_coach_on_user_rename(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and set(update_fields) == {'last_login'}):
+        return
+    for coach in CoachProfile.objects.filter(user=instance).exclude(search_name=coach_search_name(instance)):
+        coach.user = instance
+        coach.save(update_fields=['search_name'])
+
+
+# --- Autocomplete di memori proses ---
+
+@receiver(post_init, sender=Venue)
+def remember_venue_name(sender, instance, **kwargs):
+    instance._autocomplete_name = instance.__dict__.get('name')
+
+
+@receiver(post_init, sender=CoachProfile)
+def remember_coach_autocomplete_name(sender, instance, **kwargs):
+    instance._autocomplete_name = instance.__dict__.get('search_name')
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_save, sender=CoachProfile)
+def update_autocomplete_name(sender, instance, created, **kwargs):
+    name = instance.name if sender is Venue else instance.search_name
+    if not created and name == instance._autocomplete_name:
+        return
+    instance._autocomplete_name = name
+    if sender is Venue:
+        kind, label = 'venue', instance.name
+    else:
+        user = instance.user
+        kind, label = 'coach', autocomplete.coach_label(user.first_name, user.last_name, user.username)
+    pk = instance.pk
+    db_transaction.on_commit(lambda: autocomplete.update(kind, pk, label))
+
+
+@receiver(post_save, sender=LocationArea)
+@receiver(post_save, sender=SportCategory)
+def update_autocomplete_refdata(sender, instance, **kwargs):
+    kind, pk, label = ('area' if sender is LocationArea else 'sport'), instance.pk, instance.name
+    db_transaction.on_commit(lambda: autocomplete.update(kind, pk, label))
+
+
+@receiver(post_delete, sender=Venue)
+@receiver(post_delete, sender=CoachProfile)
+@receiver(post_delete, sender=LocationArea)
+@receiver(post_delete, sender=SportCategory)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    kind = {Venue: 'venue', CoachProfile: 'coach', LocationArea: 'area', SportCategory: 'sport'}[sender]
+    pk = instance.pk
+    db_transaction.on_commit(lambda: autocomplete.remove(kind, pk))
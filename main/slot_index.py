@@ -0,0 +1,178 @@
+"""
+Indeks ketersediaan slot per (venue, tanggal) dan (coach, tanggal).
+
+Setiap entri berisi dua bitmap 48 bit, satu bit per 30 menit:
+- starts: bit i menyala bila ada slot kosong yang dimulai pada menit i*30,
+- cover: bit i menyala bila 30 menit itu berada di dalam slot kosong.
+Slot kosong adalah baris jadwal yang belum dibooking dan masih available,
+ditambah slot virtual dari pola mingguan yang belum punya baris.
+"Coach mana yang kosong pada jam slot ini?" jadi operasi bit, bukan
+query rentang.
+
+Bitmap disimpan di cache SLOT_INDEX_CACHE (default 'default', yaitu
+local-memory bila CACHES tidak diatur) dan dibangun ulang dari
+VenueSchedule/CoachSchedule saat miss, dua query untuk banyak pemilik
+sekaligus. Kunci memuat versi per pemilik; signal jadwal/pola,
+claim_slot dan generate_slots mengganti versi itu (lihat invalidate()).
+Hari yang punya slot tidak sejajar 30 menit disimpan sebagai UNINDEXED
+dan pemanggilnya kembali ke query biasa.
+"""
+import uuid
+from datetime import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+
+from .models import CoachAvailability, CoachSchedule, VenueAvailability, VenueSchedule
+from .schedules import iter_slot_times
+
+RESOLUTION_MINUTES = 30
+BITS = 24 * 60 // RESOLUTION_MINUTES
+INDEX_TIMEOUT = 24 * 60 * 60
+UNINDEXED = None
+
+KINDS = {
+    'venue': (VenueSchedule, VenueAvailability),
+    'coach': (CoachSchedule, CoachAvailability),
+}
+VERSION_KEY = 'slotidx:version:{}:{}'
+MASK_KEY = 'slotidx:{}:{}:{}:{:%Y%m%d}'
+
+
+def _cache():
+    return caches[getattr(settings, 'SLOT_INDEX_CACHE', 'default')]
+
+
+def bit_of(value):
+    """Posisi bit untuk sebuah jam, atau None bila tidak sejajar resolusi."""
+    minutes = value.hour * 60 + value.minute
+    if value.second or value.microsecond or minutes % RESOLUTION_MINUTES:
+        return None
+    return minutes // RESOLUTION_MINUTES
+
+
+def span_bits(start_time, end_time):
+    """Bitmap rentang [mulai, selesai); None bila salah satu ujung tidak sejajar."""
+    first = bit_of(start_time)
+    # slot yang berakhir tepat tengah malam
+    last = BITS if end_time == time.min else bit_of(end_time)
+    if first is None or last is None or last <= first:
+        return None
+    return ((1 << (last - first)) - 1) << first
+
+
+def _versions(kind, owner_ids):
+    cache = _cache()
+    keys = {owner_id: VERSION_KEY.format(kind, owner_id) for owner_id in owner_ids}
+    found = cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in found]
+    if missing:
+        # cache.add agar proses yang berlomba memakai versi yang sama
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        found.update(cache.get_many(missing))
+    return {owner_id: found.get(key) for owner_id, key in keys.items()}
+
+
+def bump(kind, owner_id):
+    _cache().set(VERSION_KEY.format(kind, owner_id), uuid.uuid4().hex, timeout=None)
+
+
+def invalidate(kind, owner_id):
+    """
+    Mengganti versi indeks milik pemilik sekarang dan sekali lagi setelah
+    commit: proses lain bisa saja membangun ulang bitmap dari data lama
+    sebelum transaksi ini selesai.
+    """
+    bump(kind, owner_id)
+    db_transaction.on_commit(lambda: bump(kind, owner_id))
+
+
+def invalidate_slot(slot):
+    if isinstance(slot, VenueSchedule):
+        invalidate('venue', slot.venue_id)
+    else:
+        invalidate('coach', slot.coach_id)
+
+
+def build_masks(kind, owner_ids, day):
+    """{owner_id: (starts, cover) atau UNINDEXED} langsung dari database."""
+    schedule_model, template_model = KINDS[kind]
+    field = f'{kind}_id'
+    masks = {owner_id: (0, 0) for owner_id in owner_ids}
+    taken, free = set(), []
+
+    rows = schedule_model.objects.filter(**{f'{field}__in': owner_ids}, date=day).values_list(
+        field, 'start_time', 'end_time', 'is_booked', 'is_available'
+    )
+    for owner_id, start, end, is_booked, is_available in rows:
+        taken.add((owner_id, start))
+        if not is_booked and is_available:
+            free.append((owner_id, start, end))
+
+    weekday = str(day.weekday())
+    templates = template_model.objects.filter(
+        **{f'{field}__in': owner_ids}, is_active=True, weekdays__contains=weekday
+    ).order_by('id')
+    for template in templates:
+        if not template.covers(day):
+            continue
+        owner_id = getattr(template, field)
+        for start, end in iter_slot_times(day, template.start_time, template.end_time, template.slot_minutes):
+            if (owner_id, start) not in taken:
+                taken.add((owner_id, start))
+                free.append((owner_id, start, end))
+
+    for owner_id, start, end in free:
+        if masks[owner_id] is UNINDEXED:
+            continue
+        start_bit, cover = bit_of(start), span_bits(start, end)
+        if start_bit is None or cover is None:
+            masks[owner_id] = UNINDEXED
+            continue
+        starts, covered = masks[owner_id]
+        masks[owner_id] = (starts | 1 << start_bit, covered | cover)
+    return masks
+
+
+def get_masks(kind, owner_ids, day):
+    """Bitmap (starts, cover) per pemilik pada `day`; yang belum ada di cache dibangun sekaligus."""
+    owner_ids = list(dict.fromkeys(owner_ids))
+    if not owner_ids:
+        return {}
+    cache = _cache()
+    versions = _versions(kind, owner_ids)
+    keys = {owner_id: MASK_KEY.format(kind, owner_id, versions[owner_id], day) for owner_id in owner_ids}
+    found = cache.get_many(keys.values())
+
+    masks, missing = {}, []
+    for owner_id, key in keys.items():
+        if key in found:
+            masks[owner_id] = found[key]
+        else:
+            missing.append(owner_id)
+    if missing:
+        built = build_masks(kind, missing, day)
+        cache.set_many({keys[owner_id]: mask for owner_id, mask in built.items()}, timeout=INDEX_TIMEOUT)
+        masks.update(built)
+    return masks
+
+
+def starts_at(mask, start_time):
+    """Ada slot kosong yang dimulai pada `start_time`? None bila indeks tidak bisa menjawab."""
+    bit = bit_of(start_time)
+    if mask is UNINDEXED or bit is None:
+        return None
+    return bool(mask[0] >> bit & 1)
+
+
+def covers(mask, start_time, end_time):
+    """
+    Apakah [mulai, selesai) seluruhnya berada di waktu kosong? Syarat perlu
+    (bukan cukup) untuk adanya satu slot yang menutupinya. None bila tidak bisa dijawab.
+    """
+    need = span_bits(start_time, end_time)
+    if mask is UNINDEXED or need is None:
+        return None
+    return mask[1] & need == need
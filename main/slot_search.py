@@ -0,0 +1,267 @@
+"""
+Pencarian slot kosong venue + coach untuk satu olahraga, area, rentang
+tanggal, dan jendela jam (api_search_slots).
+
+Semua venue dan coach yang cocok diproses sekaligus dengan jumlah query
+tetap, berapa pun jumlah venue, coach, atau harinya:
+
+1. baris VenueSchedule di jendela pencarian (kosong maupun terisi),
+2. pola VenueAvailability untuk slot virtual,
+3. jumlah coach kosong per (tanggal, mulai, selesai) lewat GROUP BY,
+4. pola CoachAvailability, dan
+5. baris CoachSchedule milik coach berpola (agar slot virtualnya tidak dobel),
+6. nama venue untuk urutan dan halaman hasil.
+
+Coach dihitung cocok bila slotnya dimulai pada jam yang sama dan selesai
+tidak lebih awal dari slot venue, sama seperti api_get_coaches_for_schedule.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, time
+from typing import NamedTuple
+
+from django.db.models import Count, Q
+
+from .models import (
+    CoachAvailability, CoachProfile, CoachSchedule, LocationArea, SportCategory, Venue,
+    VenueAvailability, VenueSchedule,
+)
+from .schedules import expand_templates, slot_key
+
+MAX_SEARCH_DAYS = 14
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class SearchError(ValueError):
+    """Parameter pencarian tidak valid; pesannya ditampilkan ke klien."""
+
+
+class FreeSlot(NamedTuple):
+    venue_id: int
+    schedule_id: int  # None untuk slot virtual
+    date: date
+    start_time: time
+    end_time: time
+    coach_count: int = 0
+
+    @property
+    def slot_key(self):
+        return slot_key(self.venue_id, self.date, self.start_time)
+
+
+def _int_param(params, name, default, low, high):
+    raw = params.get(name, '')
+    if raw in ('', None):
+        return default
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise SearchError(f"Parameter {name} harus berupa angka.")
+    if not low <= value <= high:
+        raise SearchError(f"Parameter {name} harus di antara {low} dan {high}.")
+    return value
+
+
+def _date_param(params, name, default):
+    raw = params.get(name, '')
+    if not raw:
+        return default
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise SearchError(f"Format {name} harus YYYY-MM-DD.")
+
+
+def parse_search_params(params, today):
+    """Memvalidasi query string pencarian; melempar SearchError bila tidak valid."""
+    try:
+        sport = SportCategory.objects.get(pk=int(params.get('sport', '')))
+        area = LocationArea.objects.get(pk=int(params.get('area', '')))
+    except (SportCategory.DoesNotExist, LocationArea.DoesNotExist, ValueError):
+        raise SearchError("Parameter sport dan area wajib diisi dengan id yang valid.")
+
+    start_date = _date_param(params, 'date_from', today)
+    end_date = _date_param(params, 'date_to', start_date)
+    if start_date < today:
+        raise SearchError("date_from tidak boleh sebelum hari ini.")
+    if end_date < start_date:
+        raise SearchError("date_to tidak boleh sebelum date_from.")
+    if (end_date - start_date).days >= MAX_SEARCH_DAYS:
+        raise SearchError(f"Rentang tanggal maksimal {MAX_SEARCH_DAYS} hari.")
+
+    hour_from = _int_param(params, 'hour_from', 0, 0, 23)
+    hour_to = _int_param(params, 'hour_to', 24, 1, 24)
+    if hour_to <= hour_from:
+        raise SearchError("hour_to harus lebih besar dari hour_from.")
+
+    return {
+        'sport': sport,
+        'area': area,
+        'start_date': start_date,
+        'end_date': end_date,
+        'hour_from': hour_from,
+        'hour_to': hour_to,
+        'with_coach': params.get('with_coach') in ('1', 'true'),
+        'limit': _int_param(params, 'limit', DEFAULT_LIMIT, 1, MAX_LIMIT),
+        'offset': _int_param(params, 'offset', 0, 0, 2**31),
+    }
+
+
+def _window(hour_from, hour_to):
+    return time(hour_from), (time.max if hour_to == 24 else time(hour_to))
+
+
+def _templates_by_owner(queryset, owner_field, start_date, end_date):
+    templates = defaultdict(list)
+    overlapping = queryset.filter(
+        Q(valid_from__isnull=True) | Q(valid_from__lte=end_date),
+        Q(valid_until__isnull=True) | Q(valid_until__gte=start_date),
+        is_active=True,
+    ).order_by('id')
+    for template in overlapping:
+        templates[getattr(template, f'{owner_field}_id')].append(template)
+    return templates
+
+
+def free_venue_slots(sport, area, start_date, end_date, hour_from, hour_to, not_before=None):
+    """Slot venue kosong (baris dan virtual) per venue_id, urut tanggal dan jam."""
+    window_start, window_end = _window(hour_from, hour_to)
+    venue_filter = {'venue__sport_category': sport, 'venue__location': area}
+
+    rows = VenueSchedule.objects.filter(
+        date__range=(start_date, end_date),
+        start_time__gte=window_start,
+        start_time__lt=window_end,
+        **venue_filter
+    ).values_list('id', 'venue_id', 'date', 'start_time', 'end_time', 'is_booked', 'is_available')
+
+    slots = defaultdict(list)
+    taken = set()
+    for pk, venue_id, day, start, end, is_booked, is_available in rows:
+        taken.add((venue_id, day, start))
+        if not is_booked and is_available and end <= window_end:
+            slots[venue_id].append(FreeSlot(venue_id, pk, day, start, end))
+
+    templates = _templates_by_owner(
+        VenueAvailability.objects.filter(start_time__lt=window_end, end_time__gt=window_start, **venue_filter),
+        'venue', start_date, end_date,
+    )
+    for venue_id, venue_templates in templates.items():
+        for day, start, end in expand_templates(venue_templates, start_date, end_date):
+            if not window_start <= start < window_end or end > window_end:
+                continue
+            if (venue_id, day, start) not in taken:
+                slots[venue_id].append(FreeSlot(venue_id, None, day, start, end))
+
+    result = {}
+    for venue_id, venue_slots in slots.items():
+        if not_before:
+            venue_slots = [s for s in venue_slots if datetime.combine(s.date, s.start_time) >= not_before]
+        if venue_slots:
+            result[venue_id] = sorted(venue_slots, key=lambda s: (s.date, s.start_time))
+    return result
+
+
+def free_coach_counts(sport, area, start_date, end_date, hour_from, hour_to):
+    """{(tanggal, mulai): Counter({selesai: jumlah coach kosong})} untuk coach olahraga dan area ini."""
+    window_start, window_end = _window(hour_from, hour_to)
+    coach_ids = CoachProfile.objects.filter(main_sport_trained=sport, service_areas=area).values('id')
+
+    counts = defaultdict(Counter)
+    grouped = (
+        CoachSchedule.objects.filter(
+            coach_id__in=coach_ids,
+            date__range=(start_date, end_date),
+            start_time__gte=window_start,
+            start_time__lt=window_end,
+            is_booked=False,
+            is_available=True,
+        )
+        .values('date', 'start_time', 'end_time')
+        .annotate(coaches=Count('coach_id', distinct=True))
+        .order_by()
+    )
+    for row in grouped:
+        counts[(row['date'], row['start_time'])][row['end_time']] += row['coaches']
+
+    coach_templates = CoachAvailability.objects.filter(
+        coach_id__in=coach_ids, start_time__lt=window_end, end_time__gt=window_start
+    )
+    templates = _templates_by_owner(coach_templates, 'coach', start_date, end_date)
+    if templates:
+        taken = set(
+            CoachSchedule.objects.filter(
+                coach_id__in=coach_templates.values('coach_id'),
+                date__range=(start_date, end_date),
+                start_time__gte=window_start,
+                start_time__lt=window_end,
+            ).values_list('coach_id', 'date', 'start_time')
+        )
+        for coach_id, coach_templates in templates.items():
+            for day, start, end in expand_templates(coach_templates, start_date, end_date):
+                if window_start <= start < window_end and (coach_id, day, start) not in taken:
+                    counts[(day, start)][end] += 1
+    return counts
+
+
+def search_free_slots(sport, area, start_date, end_date, hour_from, hour_to,
+                      with_coach=False, not_before=None):
+    """
+    {venue_id: [FreeSlot, ...]} untuk venue yang punya slot kosong, dengan
+    coach_count terisi. with_coach=True hanya menyisakan slot yang punya coach.
+    """
+    venue_slots = free_venue_slots(sport, area, start_date, end_date, hour_from, hour_to, not_before)
+    if not venue_slots:
+        return {}
+    coach_counts = free_coach_counts(sport, area, start_date, end_date, hour_from, hour_to)
+
+    result = {}
+    for venue_id, slots in venue_slots.items():
+        counted = []
+        for slot in slots:
+            ends = coach_counts.get((slot.date, slot.start_time), {})
+            count = sum(n for end, n in ends.items() if end >= slot.end_time)
+            if count or not with_coach:
+                counted.append(slot._replace(coach_count=count))
+        if counted:
+            result[venue_id] = counted
+    return result
+
+
+def search_page(params, not_before):
+    """Hasil pencarian untuk satu halaman venue (urut nama) dalam bentuk JSON."""
+    results = search_free_slots(
+        params['sport'], params['area'], params['start_date'], params['end_date'],
+        params['hour_from'], params['hour_to'], params['with_coach'], not_before,
+    )
+    # satu query untuk semua venue olahraga/area ini, bukan IN dengan ribuan id
+    venues = [
+        row for row in Venue.objects.filter(sport_category=params['sport'], location=params['area'])
+        .order_by('name', 'id').values_list('id', 'name', 'price_per_hour', 'main_image')
+        if row[0] in results
+    ]
+    page = venues[params['offset']:params['offset'] + params['limit']]
+
+    return {
+        'success': True,
+        'total_venues': len(venues),
+        'venues': [
+            {
+                'id': venue_id,
+                'name': name,
+                'price_per_hour': float(price or 0),
+                'image': image or '',
+                'slots': [
+                    {
+                        'schedule_id': slot.schedule_id or slot.slot_key,
+                        'date': slot.date.isoformat(),
+                        'start_time': slot.start_time.strftime('%H:%M'),
+                        'end_time': slot.end_time.strftime('%H:%M'),
+                        'coach_count': slot.coach_count,
+                    }
+                    for slot in results[venue_id]
+                ],
+            }
+            for venue_id, name, price, image in page
+        ],
+    }
@@ -0,0 +1,111 @@
+"""
+Respons JSON/NDJSON/CSV yang ditulis bertahap dari queryset.
+
+Baris dibaca dengan `.iterator(chunk_size=...)` dan dikirim per potongan
+lewat StreamingHttpResponse, sehingga daftar besar (export admin, semua
+booking) tidak pernah ditampung utuh di memori worker, baik sebagai list
+of dict maupun sebagai string JSON.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.query import QuerySet
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 500
+FLUSH_BYTES = 64 * 1024
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+def iter_rows(rows, chunk_size=CHUNK_SIZE):
+    if isinstance(rows, QuerySet):
+        return rows.iterator(chunk_size=chunk_size)
+    return iter(rows)
+
+
+def _buffered(parts):
+    """Menggabungkan potongan kecil supaya tidak mengirim satu write per baris."""
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def iter_json_array(rows, serialize):
+    yield '['
+    for index, row in enumerate(iter_rows(rows)):
+        yield (',' if index else '') + _dumps(serialize(row))
+    yield ']'
+
+
+def iter_json_object(key, rows, serialize, extra=None):
+    """{"<key>": [...], ...extra} dengan array ditulis bertahap."""
+    yield '{' + _dumps(key) + ':'
+    yield from iter_json_array(rows, serialize)
+    for name, value in (extra or {}).items():
+        yield ',' + _dumps(name) + ':' + _dumps(value)
+    yield '}'
+
+
+def iter_ndjson(rows, serialize):
+    for row in iter_rows(rows):
+        yield _dumps(serialize(row)) + '\n'
+
+
+class _Echo:
+    """Objek mirip file untuk csv.writer yang langsung mengembalikan baris."""
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, serialize, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in iter_rows(rows):
+        item = serialize(row)
+        yield writer.writerow([item.get(column, '') for column in columns])
+
+
+def streaming_json_response(parts, status=200):
+    return StreamingHttpResponse(_buffered(parts), content_type='application/json', status=status)
+
+
+def stream_json_array(rows, serialize):
+    """Pengganti JsonResponse(list, safe=False) untuk daftar besar."""
+    return streaming_json_response(iter_json_array(rows, serialize))
+
+
+def stream_json_object(key, rows, serialize, extra=None):
+    """Pengganti JsonResponse({key: list, ...}) untuk daftar besar."""
+    return streaming_json_response(iter_json_object(key, rows, serialize, extra))
+
+
+def export_format(request):
+    value = request.GET.get('export', '').lower()
+    return value if value in EXPORT_FORMATS else None
+
+
+def stream_export(rows, serialize, fmt, filename, columns=None):
+    """Unduhan NDJSON atau CSV; `columns` wajib untuk CSV."""
+    if fmt == 'csv':
+        response = StreamingHttpResponse(
+            _buffered(iter_csv(rows, serialize, columns)), content_type='text/csv; charset=utf-8'
+        )
+        extension = 'csv'
+    else:
+        response = StreamingHttpResponse(
+            _buffered(iter_ndjson(rows, serialize)), content_type='application/x-ndjson'
+        )
+        extension = 'ndjson'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
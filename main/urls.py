@@ -31,6 +31,7 @@ urlpatterns = [
     path('venue/<int:venue_id>/schedules/delete/', views.venue_schedule_delete, name='venue_schedule_delete'),
     path('dashboard/venue/<int:venue_id>/schedules/manage/', views.venue_manage_schedule_view, name='venue_manage_schedule'),
     path('ajax/schedule/<int:schedule_id>/coaches/', views.get_available_coaches, name='get_available_coaches'),
+    path('ajax/schedule/<slug:schedule_id>/coaches/', views.get_available_coaches, name='get_available_coaches_by_key'),
     path('ajax/filter-coaches/', views.filter_coaches_ajax, name='filter_coaches_ajax'),
     path('ajax/coach-detail/<int:coach_id>/', views.get_coach_detail_ajax, name='get_coach_detail_ajax'),
     path('booking/update/<int:booking_id>/', views.update_booking, name='update_booking'),
@@ -50,9 +51,12 @@ urlpatterns = [
     path('my-bookings/json/', views.show_my_bookings_json, name='my_bookings_json'), 
     path('booking-history/json/', views.show_booking_history_json, name='booking_history_json'),
     path('api/venues/', views.api_filter_venues, name='api_filter_venues'),
+    path('api/slots/search/', views.api_search_slots, name='api_search_slots'),
+    path('api/autocomplete/', views.api_autocomplete, name='api_autocomplete'),
     path('api/booking/<int:venue_id>/form/', views.api_booking_form_data, name='api_booking_form_data'),
     path('api/booking/<int:venue_id>/create/', views.api_create_booking, name='api_create_booking'),
     path('api/schedule/<int:schedule_id>/coaches/', views.api_get_coaches_for_schedule, name='api_get_coaches_for_schedule'),
+    path('api/schedule/<slug:schedule_id>/coaches/', views.api_get_coaches_for_schedule, name='api_get_coaches_for_schedule_by_key'),
     path('api/booking/<int:booking_id>/cancel/', views.api_cancel_booking, name='api_cancel_booking'),
     path('api/booking/<int:booking_id>/update/', views.api_update_booking, name='api_update_booking'),
     path('api/booking/<int:booking_id>/detail/', views.api_booking_detail, name='api_booking_detail'),
@@ -61,6 +65,8 @@ urlpatterns = [
     path('api/venue/revenue/', views.api_venue_revenue, name='api_venue_revenue'),
     path('api/venue/<int:venue_id>/manage/', views.api_venue_manage, name='api_venue_manage'),
     path('api/venue/<int:venue_id>/delete/', views.api_venue_delete, name='api_venue_delete'),
+    path('api/venue/<int:venue_id>/availability/', views.api_venue_availability, name='api_venue_availability'),
+    path('api/coach/availability/', views.api_coach_availability, name='api_coach_availability'),
     path('coach/profile/json/', views.get_coach_profile_json, name='get_coach_profile_json'),
     path('coach/profile/delete/', views.delete_coach_profile_ajax, name='delete_coach_profile_ajax'),
     path('api/sport-categories/', views.get_sport_categories_json, name='get_sport_categories_json'),
@@ -0,0 +1,171 @@
+"""
+Indeks pencarian teks venue (nama, area, olahraga, deskripsi).
+
+- PostgreSQL: kolom tsvector main_venue.search_document dengan index GIN,
+  bobot A (nama), B (area), C (olahraga), D (deskripsi); peringkat ts_rank.
+- SQLite: tabel bayangan FTS5 main_venue_fts dengan rowid = id venue;
+  peringkat bm25 dengan bobot kolom yang setara.
+- Database lain: kembali ke icontains tanpa peringkat.
+
+Kolom dan tabel dibuat oleh migrasi 0012 di luar model, jadi tidak
+terlihat oleh ORM. Signal Venue, LocationArea dan SportCategory memanggil
+reindex_venues()/remove_venue(); data yang ditulis lewat bulk_create atau
+queryset.update() perlu `manage.py rebuild_venue_search`.
+
+Setiap kata kueri dicocokkan sebagai awalan kata ("sena" menemukan
+"Senayan"), semua kata harus ada.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Venue
+
+COLUMNS = ('name', 'location', 'sport', 'description')
+WEIGHTS = {'name': 'A', 'location': 'B', 'sport': 'C', 'description': 'D'}
+# sama dengan bobot bawaan ts_rank {D, C, B, A} = {0.1, 0.2, 0.4, 1.0}
+BM25_WEIGHTS = '10.0, 4.0, 2.0, 1.0'
+FALLBACK_LOOKUPS = {
+    'name': 'name__icontains',
+    'location': 'location__name__icontains',
+    'sport': 'sport_category__name__icontains',
+    'description': 'description__icontains',
+}
+FTS_TABLE = 'main_venue_fts'
+MAX_TERMS = 8
+# huruf dan angka saja; garis bawah dan tanda baca memisahkan kata seperti unicode61
+TERM_RE = re.compile(r'[^\W_]+')
+REINDEX_BY = ('id', 'location_id', 'sport_category_id')
+
+PG_DOCUMENT = """
+    setweight(to_tsvector('simple', COALESCE(v.name, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(l.name, '')), 'B') ||
+    setweight(to_tsvector('simple', COALESCE(s.name, '')), 'C') ||
+    setweight(to_tsvector('simple', COALESCE(v.description, '')), 'D')
+"""
+
+
+def search_backend():
+    """'postgresql', 'sqlite', atau None bila indeks tidak tersedia."""
+    return connection.vendor if connection.vendor in ('postgresql', 'sqlite') else None
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def _fts5_match(terms, columns):
+    expression = ' AND '.join(f'"{term}"*' for term in terms)
+    if set(columns) == set(COLUMNS):
+        return expression
+    return '{%s} : (%s)' % (' '.join(columns), expression)
+
+
+def _tsquery(terms, columns):
+    weights = '' if set(columns) == set(COLUMNS) else ''.join(WEIGHTS[c] for c in columns)
+    return ' & '.join(f'{term}:*{weights}' for term in terms)
+
+
+def _fallback_filter(terms, columns):
+    condition = Q()
+    for term in terms:
+        any_column = Q()
+        for column in columns:
+            any_column |= Q(**{FALLBACK_LOOKUPS[column]: term})
+        condition &= any_column
+    return condition
+
+
+def search_venues(queryset, query, columns=COLUMNS):
+    """
+    `queryset` Venue yang cocok dengan `query` pada `columns`, dengan anotasi
+    search_rank (makin besar makin relevan). Urutannya tidak diubah.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0)).none()
+    backend = search_backend()
+    if backend == 'postgresql':
+        tsquery = _tsquery(terms, columns)
+        return queryset.filter(
+            RawSQL("search_document @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField())
+        ).annotate(search_rank=RawSQL(
+            "ts_rank(search_document, to_tsquery('simple', %s))", (tsquery,), output_field=FloatField()
+        ))
+    if backend == 'sqlite':
+        match = _fts5_match(terms, columns)
+        return queryset.filter(id__in=matching_venue_ids(query, columns)).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {BM25_WEIGHTS}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "main_venue"."id"',
+            (match,), output_field=FloatField(),
+        ))
+    return queryset.filter(_fallback_filter(terms, columns)).annotate(search_rank=Value(0.0))
+
+
+def matching_venue_ids(query, columns=COLUMNS):
+    """Subquery id venue yang cocok, untuk filter `venue__in=` di tabel lain."""
+    terms = search_terms(query)
+    if not terms:
+        return Venue.objects.none().values('id')
+    backend = search_backend()
+    if backend == 'sqlite':
+        return RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (_fts5_match(terms, columns),))
+    if backend == 'postgresql':
+        return search_venues(Venue.objects.all(), query, columns).values('id')
+    return Venue.objects.filter(_fallback_filter(terms, columns)).values('id')
+
+
+def reindex_venues(by=None, value=None):
+    """
+    Menulis ulang dokumen pencarian venue dengan `by` = `value` (by salah satu
+    REINDEX_BY; value None berarti kolom itu NULL), atau semua venue bila by=None.
+    """
+    backend = search_backend()
+    if backend is None:
+        return
+    if by is None:
+        where, params = '', ()
+    elif by not in REINDEX_BY:
+        raise ValueError(f"reindex_venues: kolom {by} tidak didukung")
+    elif value is None:
+        where, params = f'v.{by} IS NULL', ()
+    else:
+        where, params = f'v.{by} = %s', (value,)
+
+    with connection.cursor() as cursor:
+        if backend == 'postgresql':
+            cursor.execute(
+                f"""
+                UPDATE main_venue AS v SET search_document = {PG_DOCUMENT}
+                FROM main_venue AS x
+                LEFT JOIN main_locationarea AS l ON l.id = x.location_id
+                LEFT JOIN main_sportcategory AS s ON s.id = x.sport_category_id
+                WHERE x.id = v.id {'AND ' + where if where else ''}
+                """,
+                params,
+            )
+            return
+        if where:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT v.id FROM main_venue AS v WHERE {where})', params)
+        else:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f"""
+            INSERT INTO {FTS_TABLE} (rowid, name, location, sport, description)
+            SELECT v.id, v.name, COALESCE(l.name, ''), COALESCE(s.name, ''), COALESCE(v.description, '')
+            FROM main_venue AS v
+            LEFT JOIN main_locationarea AS l ON l.id = v.location_id
+            LEFT JOIN main_sportcategory AS s ON s.id = v.sport_category_id
+            {'WHERE ' + where if where else ''}
+            """,
+            params,
+        )
+
+
+def remove_venue(venue_id):
+    # di PostgreSQL dokumen ikut terhapus bersama barisnya
+    if search_backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (venue_id,))
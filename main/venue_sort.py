@@ -0,0 +1,142 @@
+"""
+Urutan daftar venue berdasarkan rating, harga, atau slot kosong terdekat.
+
+Setiap urutan memakai kolom di tabel Venue yang punya index (field, id),
+sehingga daftar yang diurutkan cukup index scan + LIMIT tanpa subquery
+per baris:
+- rating_avg: salinan VenueRatingSummary.rating_avg, ditulis oleh
+  ratings.refresh_venue_rating() setiap kali Review berubah;
+- price_per_hour: kolom biasa;
+- next_available_slot: awal slot kosong terdekat (baris VenueSchedule
+  yang belum dibooking dan available, atau slot virtual dari pola
+  mingguan), NO_AVAILABLE_SLOT bila tidak ada sehingga diurutkan paling
+  akhir tanpa NULLS LAST.
+
+next_available_slot dihitung ulang setelah commit untuk setiap venue yang
+jadwal/polanya berubah (signal, claim_slot, generate_slots). Nilainya
+juga basi begitu waktunya lewat. Request baca tidak pernah menulis:
+jalankan `refresh_venue_sort_columns --stale-only` berkala (mis. cron
+tiap 5 menit) untuk menghitung ulang venue seperti itu.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NO_AVAILABLE_SLOT, Venue, VenueAvailability, VenueSchedule
+from .schedules import VIRTUAL_HORIZON_DAYS, expand_templates
+
+SORTS = {
+    'rating': ['-rating_avg', 'id'],
+    'price': ['price_per_hour', 'id'],
+    'next_available': ['next_available_slot', 'id'],
+}
+REFRESH_BATCH_SIZE = 500
+
+_pending = threading.local()
+
+
+class SortError(ValueError):
+    """Parameter sort tidak dikenal; pesannya ditampilkan ke klien."""
+
+
+def venue_ordering(sort, default):
+    """Urutan untuk parameter `sort`; `default` bila kosong."""
+    if not sort:
+        return default
+    try:
+        return SORTS[sort]
+    except KeyError:
+        raise SortError(f"Parameter sort harus salah satu dari: {', '.join(SORTS)}.")
+
+
+def next_free_slot(venue_id, templates, now):
+    """Datetime (aware) awal slot kosong terdekat mulai `now`, atau NO_AVAILABLE_SLOT."""
+    local = timezone.localtime(now)
+    today, clock = local.date(), local.time()
+    upcoming = Q(date__gt=today) | Q(date=today, start_time__gte=clock)
+    first = (
+        VenueSchedule.objects.filter(upcoming, venue_id=venue_id, is_booked=False, is_available=True)
+        .order_by('date', 'start_time').values_list('date', 'start_time').first()
+    )
+
+    if templates:
+        # slot virtual hanya perlu dicari sampai baris kosong pertama
+        end_date = first[0] if first else today + timedelta(days=VIRTUAL_HORIZON_DAYS - 1)
+        taken = set(
+            VenueSchedule.objects.filter(venue_id=venue_id, date__range=(today, end_date))
+            .values_list('date', 'start_time')
+        )
+        for day, slot_start, _ in expand_templates(templates, today, end_date):
+            if (day, slot_start) in taken or (day == today and slot_start < clock):
+                continue
+            if first is None or (day, slot_start) < first:
+                first = (day, slot_start)
+            break
+
+    if first is None:
+        return NO_AVAILABLE_SLOT
+    return timezone.make_aware(datetime.combine(*first))
+
+
+def slot_or_none(value):
+    """next_available_slot untuk respons JSON; None bila venue tidak punya slot kosong."""
+    return None if value == NO_AVAILABLE_SLOT else value
+
+
+def refresh_next_available(venue_ids, now=None):
+    """Menghitung ulang next_available_slot `venue_ids`; mengembalikan jumlah yang berubah."""
+    now = now or timezone.now()
+    current = dict(Venue.objects.filter(pk__in=set(venue_ids)).values_list('id', 'next_available_slot'))
+    templates = {}
+    for template in VenueAvailability.objects.filter(venue_id__in=current, is_active=True).order_by('id'):
+        templates.setdefault(template.venue_id, []).append(template)
+
+    changed = []
+    for venue_id, previous in current.items():
+        value = next_free_slot(venue_id, templates.get(venue_id, ()), now)
+        if value != previous:
+            changed.append(Venue(pk=venue_id, next_available_slot=value))
+    # bulk_update tidak memicu signal Venue (indeks pencarian, autocomplete)
+    Venue.objects.bulk_update(changed, ['next_available_slot'], batch_size=REFRESH_BATCH_SIZE)
+    return len(changed)
+
+
+def _flush():
+    venue_ids = getattr(_pending, 'venue_ids', None)
+    if venue_ids:
+        _pending.venue_ids = set()
+        refresh_next_available(venue_ids)
+
+
+def schedule_refresh(venue_id):
+    """
+    Menghitung ulang next_available_slot `venue_id` setelah commit. Banyak
+    perubahan dalam satu transaksi (mis. hapus massal) digabung jadi satu
+    perhitungan per venue.
+    """
+    if not venue_id:
+        return
+    if not hasattr(_pending, 'venue_ids'):
+        _pending.venue_ids = set()
+    _pending.venue_ids.add(venue_id)
+    db_transaction.on_commit(_flush)
+
+
+def refresh_stale(now=None):
+    """Menghitung ulang venue yang slot terdekatnya sudah lewat (range scan pada index); untuk cron."""
+    now = now or timezone.now()
+    stale = list(Venue.objects.filter(next_available_slot__lt=now).values_list('id', flat=True))
+    return refresh_next_available(stale, now) if stale else 0
+
+
+def rebuild_next_available(now=None):
+    """Menghitung ulang next_available_slot semua venue; mengembalikan jumlah yang berubah."""
+    now = now or timezone.now()
+    venue_ids = list(Venue.objects.order_by('id').values_list('id', flat=True))
+    return sum(
+        refresh_next_available(venue_ids[i:i + REFRESH_BATCH_SIZE], now)
+        for i in range(0, len(venue_ids), REFRESH_BATCH_SIZE)
+    )
@@ -0,0 +1,90 @@
+"""
+Nomor versi bersama untuk cache yang disimpan di memori proses (refdata,
+autocomplete).
+
+Versi disimpan di tabel SharedVersion, jadi semua worker dan host melihat
+nilai yang sama apa pun backend CACHES-nya (LocMemCache bawaan hanya
+berlaku di satu proses). Versi adalah token acak, bukan penghitung: versi
+dari transaksi yang di-rollback tidak akan terpakai ulang.
+
+Agar request biasa tidak selalu membaca database, versi yang sudah dibaca
+dipakai lagi selama SHARED_VERSION_TTL detik (default 2). Perubahan dari
+proses lain terlihat paling lambat setelah itu; perubahan dari proses ini
+terlihat begitu transaksi yang mem-bump di-commit.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F
+
+from .models import SharedVersion
+
+DEFAULT_TTL = 2
+
+_lock = threading.Lock()
+_local = {}
+
+
+def _ttl():
+    return getattr(settings, 'SHARED_VERSION_TTL', DEFAULT_TTL)
+
+
+def _remember(name, version):
+    with _lock:
+        _local[name] = (version, time.monotonic())
+
+
+def get_many(names):
+    """{nama: versi}; hanya versi yang sudah lebih tua dari TTL yang dibaca dari database."""
+    now, ttl = time.monotonic(), _ttl()
+    versions, expired = {}, []
+    for name in names:
+        cached = _local.get(name)
+        if cached is not None and now - cached[1] < ttl:
+            versions[name] = cached[0]
+        else:
+            expired.append(name)
+    if expired:
+        found = dict(SharedVersion.objects.filter(name__in=expired).values_list('name', 'version'))
+        for name in expired:
+            if name not in found:
+                # get_or_create agar proses yang berlomba memakai versi yang sama
+                row, _ = SharedVersion.objects.get_or_create(name=name, defaults={'version': uuid.uuid4().hex})
+                found[name] = row.version
+            _remember(name, found[name])
+            versions[name] = found[name]
+    return versions
+
+
+def get(name):
+    return get_many([name])[name]
+
+
+def bump(name):
+    """
+    Mengganti versi `name` dan mengembalikan (versi sebelumnya, versi baru).
+    Versi sebelumnya dibaca dari UPDATE yang sama, jadi tidak ada bump lain
+    di antaranya; None bila versi belum pernah ada.
+    """
+    version = uuid.uuid4().hex
+    with db_transaction.atomic():
+        updated = SharedVersion.objects.filter(name=name).update(previous=F('version'), version=version)
+        if updated:
+            previous = SharedVersion.objects.values_list('previous', flat=True).get(name=name)
+        else:
+            _, created = SharedVersion.objects.get_or_create(name=name, defaults={'version': version})
+            previous = None
+            if not created:
+                # dibuat proses lain di antara UPDATE dan INSERT
+                return bump(name)
+    # dalam transaksi luar, versi baru baru dipakai proses ini setelah commit
+    db_transaction.on_commit(lambda: _remember(name, version))
+    return previous, version
+
+
+def clear_local_cache():
+    with _lock:
+        _local.clear()
@@ -1,24 +1,25 @@
 from django.db import transaction as db_transaction, IntegrityError
-from django.db.models import Avg
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm 
 from django.contrib import messages
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q, Sum
-from datetime import date, datetime, timedelta
-from .forms import CustomUserCreationForm, ReviewForm, VenueForm, VenueScheduleForm, EquipmentForm, CoachProfileForm, CoachScheduleForm
-from .models import Venue, SportCategory, LocationArea, CoachProfile, VenueSchedule, Transaction, Review, UserProfile, Booking, BookingEquipment, Equipment, CoachSchedule
+from django.db.models import Q
+from datetime import date, datetime
+from .forms import CustomUserCreationForm, ReviewForm, VenueForm, VenueScheduleForm, EquipmentForm, CoachProfileForm, CoachScheduleForm, AvailabilityTemplateForm, RevenueFilterForm
+from .models import Venue, SportCategory, LocationArea, CoachProfile, VenueSchedule, Transaction, Review, Booking, BookingEquipment, Equipment, CoachSchedule, VenueAvailability, CoachAvailability
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 from django.urls import reverse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+import asyncio
 import json
 from django.http import Http404, JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
 from django.template.loader import render_to_string
-from django.db.models import Q, Avg
 import pytz
 from django.contrib.auth.models import User 
 from django.http import HttpResponse
@@ -26,7 +27,35 @@ from django.core import serializers
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.formats import date_format 
 import base64
-import requests
+from . import autocomplete
+from .booking import COACH_UNAVAILABLE, BookingError, allocate_booking
+from .coach_search import search_coaches
+from .facets import SEARCH_COLUMNS, FacetError, parse_filters, price_q, venue_facets
+from .imageproxy import (
+    ProxyImageError, aget_variant, choose_format, read_file, variant_key, width_bucket,
+)
+from .inventory import (
+    InsufficientStock, booking_equipment_items, release_booking_equipment, release_equipment,
+    reserve_equipment,
+)
+from .pagination import CursorError, paginate_request, wants_cursor
+from .ratings import rating_of
+from .refdata import by_name, location_areas, refdata_etag, sport_categories
+from .revenue import coach_revenue_total, venue_report_payload, venue_revenue_report
+from .roles import COACH, CUSTOMER, VENUE_OWNER, role_for_user, role_required
+from .schedules import (
+    SlotFilterError, availability_payload, delete_slots, find_slot, generate_slots, parse_slot_filter,
+    slot_payload, virtual_coach_slots, with_virtual_slots,
+)
+from .serializers import (
+    DisplayCache, booking_detail_payload, booking_list_queryset, booking_record, history_booking_payload,
+    json_response, latest_review, my_booking_payload, with_latest_reviews,
+)
+from . import slot_index
+from .slot_search import SearchError, parse_search_params, search_page
+from .streaming import export_format, stream_export, stream_json_array, stream_json_object
+from .venue_search import matching_venue_ids, search_venues
+from .venue_sort import SortError, slot_or_none, venue_ordering
 
 def get_user_dashboard(user):
     redirect_url_name = get_dashboard_redirect_url_name(user)
@@ -37,24 +66,7 @@ def get_dashboard_redirect_url_name(user):
     Mengembalikan 'nama' URL (name=...) untuk dashboard 
     berdasarkan role pengguna.
     """
-    if not user.is_authenticated:
-        return 'index' 
-    
-    if user.is_superuser or user.is_staff:
-        return 'admin_dashboard'  
-
-    try:
-        profile = user.profile
-        if profile.is_venue_owner:
-            return 'venue_dashboard'
-        elif profile.is_coach:
-            return 'coach_profile'
-        elif profile.is_customer:
-            return 'home' 
-    except UserProfile.DoesNotExist:
-        pass 
-
-    return 'home'
+    return role_for_user(user).dashboard
 
 def index_view(request):
     """
@@ -107,14 +119,8 @@ def login_view(request):
             redirect_url_name = get_dashboard_redirect_url_name(user)
             final_redirect_url = reverse(redirect_url_name)
             
-            role_type = 'CUSTOMER'
-            if user.is_superuser:
-                role_type = 'ADMIN'
-            elif hasattr(user, 'profile'):
-                if user.profile.is_venue_owner:
-                    role_type = 'VENUE_OWNER'
-                elif user.profile.is_coach:
-                    role_type = 'COACH'
+            # superuser selalu ADMIN; staff biasa mengikuti profilnya
+            role_type = 'ADMIN' if user.is_superuser else role_for_user(user)._replace(is_admin=False).name
 
             if is_ajax:
                 return JsonResponse({
@@ -142,26 +148,24 @@ def logout_view(request):
     return redirect(f"{reverse('landing')}?logout=1")
 
 @login_required(login_url='login') 
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='index') 
+@role_required(CUSTOMER, login_url='index')
 def main_view(request):
     """Main page untuk customer - list venues dengan filter"""
-    if not request.user.is_authenticated or not request.user.profile.is_customer:
-        return redirect('home')
-    
     venues = Venue.objects.all().select_related('location', 'sport_category', 'owner')
     
-    locations = LocationArea.objects.all().order_by('name')
-    sports = SportCategory.objects.all().order_by('name')
+    locations = by_name(location_areas())
+    sports = by_name(sport_categories())
     
     context = {
         'venues': venues,
         'locations': locations,
         'sports': sports,
+        'facets': venue_facets(parse_filters({})),
     }
     return render(request, 'main/home.html', context)
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 def coach_dashboard_view(request):
     return redirect('home')
 
@@ -171,7 +175,7 @@ def venue_detail_view(request, venue_id):
     return render(request, 'main/venue_detail.html', {'venue': venue})
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_venue_owner, login_url='home')
+@role_required(VENUE_OWNER)
 def venue_dashboard_view(request):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         venues = Venue.objects.filter(owner=request.user)
@@ -186,8 +190,8 @@ def venue_dashboard_view(request):
         return JsonResponse({'venues': venues_data})
     
     venues = Venue.objects.filter(owner=request.user)
-    locations = LocationArea.objects.all()
-    categories = SportCategory.objects.all()
+    locations = location_areas()
+    categories = sport_categories()
     
     context = {
         'venues': venues,
@@ -197,83 +201,37 @@ def venue_dashboard_view(request):
     return render(request, 'main/venue_dashboard.html', context)
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_venue_owner, login_url='home')
+@role_required(VENUE_OWNER)
 def venue_revenue_view(request):
     is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
-    
-    venues = Venue.objects.filter(owner=request.user)
-    venue_ids = venues.values_list('id', flat=True)
-    
-
-    total_revenue = Transaction.objects.filter(
-        booking__venue_schedule__venue__id__in=venue_ids,
-        status='CONFIRMED'
-    ).aggregate(total=Sum('revenue_venue'))['total'] or 0.00
-
-    venue_revenue_data = []
-    for venue in venues:
-        confirmed_bookings = Booking.objects.filter(
-            venue_schedule__venue=venue,
-            transaction__status='CONFIRMED'
-        ).select_related(
-            'customer',
-            'venue_schedule',
-            'transaction',
-            'coach_schedule__coach__user'
-        ).order_by('-booking_time')
-        
-        venue_total = Transaction.objects.filter(
-            booking__venue_schedule__venue=venue,
-            status='CONFIRMED'
-        ).aggregate(total=Sum('revenue_venue'))['total'] or 0.00
-        
-        venue_data = {
-            'venue': venue,
-            'bookings': confirmed_bookings,
-            'total_revenue': venue_total,
-            'booking_count': confirmed_bookings.count()
-        }
-        
+
+    filter_form = RevenueFilterForm(request.GET)
+    if not filter_form.is_valid():
         if is_ajax:
-            bookings_data = []
-            for booking in confirmed_bookings:
-                bookings_data.append({
-                    'id': booking.id,
-                    'customer_username': booking.customer.username,
-                    'date': booking.venue_schedule.date.strftime('%a, %d %b %Y'),
-                    'start_time': booking.venue_schedule.start_time.strftime('%H:%M'),
-                    'end_time': booking.venue_schedule.end_time.strftime('%H:%M'),
-                    'coach': booking.coach_schedule.coach.user.username if booking.coach_schedule else None,
-                    'revenue': float(booking.transaction.revenue_venue)
-                })
-            
-            venue_data = {
-                'venue_id': venue.id,
-                'venue_name': venue.name,
-                'sport_category': venue.sport_category.name,
-                'location': venue.location.name,
-                'total_revenue': float(venue_total),
-                'booking_count': confirmed_bookings.count(),
-                'bookings': bookings_data
-            }
-        
-        venue_revenue_data.append(venue_data)
+            return JsonResponse({'success': False, 'errors': filter_form.errors}, status=400)
+        filter_form = RevenueFilterForm({})
+        filter_form.is_valid()
+
+    report = venue_revenue_report(request.user, **filter_form.report_kwargs())
 
     if is_ajax:
         return JsonResponse({
             'success': True,
-            'total_revenue': float(total_revenue),
-            'venue_revenue_data': venue_revenue_data
+            'total_revenue': float(report['total_revenue']),
+            'granularity': report['granularity'],
+            'page': report['page'],
+            'venue_revenue_data': [venue_report_payload(r) for r in report['venues']],
         })
 
     context = {
-        'total_revenue': total_revenue,
-        'venue_revenue_data': venue_revenue_data,
+        'total_revenue': report['total_revenue'],
+        'venue_revenue_data': report['venues'],
+        'filter_form': filter_form,
     }
     return render(request, 'main/venue_revenue.html', context)
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_venue_owner, login_url='home')
+@role_required(VENUE_OWNER)
 def venue_create_view(request):
     if request.method == 'POST':
         form = VenueForm(request.POST)
@@ -309,7 +267,7 @@ def venue_create_view(request):
     return render(request, 'main/venue_form.html', {'form': form, 'page_title': 'Tambah Lapangan Baru'})
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_venue_owner, login_url='home')
+@role_required(VENUE_OWNER)
 def venue_manage_view(request, venue_id):
     venue = get_object_or_404(Venue, id=venue_id, owner=request.user)
 
@@ -473,7 +431,7 @@ def venue_manage_view(request, venue_id):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_venue_owner, login_url='home')
+@role_required(VENUE_OWNER)
 def venue_manage_schedule_view(request, venue_id):
     venue = get_object_or_404(Venue, id=venue_id, owner=request.user)
     
@@ -505,41 +463,18 @@ def venue_manage_schedule_view(request, venue_id):
                 msg = "Waktu selesai harus setelah mulai."
                 return JsonResponse({"success": False, "message": msg}, status=400) if is_flutter else render(request, 'main/venue_manage_schedule.html', {'error': msg, 'venue': venue, 'schedule_form': schedule_form})
 
-            created = 0
-            new_slots_data = []
-            current = start_dt
-            while current < end_dt:
-                slot_start = current.time()
-                next_dt = current + timedelta(hours=1)
-                
-                if next_dt > end_dt: 
-                    next_dt = end_dt
-                
-                slot_end = next_dt.time()
-
-                exists = VenueSchedule.objects.filter(venue=venue, date=schedule_date, start_time=slot_start).exists()
-                if not exists:
-                    new_sch = VenueSchedule.objects.create(
-                        venue=venue, 
-                        date=schedule_date, 
-                        start_time=slot_start, 
-                        end_time=slot_end, 
-                        is_available=is_available
-                    )
-                    created += 1
-                    
-                    new_slots_data.append({
-                        'id': new_sch.id,
-                        'date_str_iso': new_sch.date.strftime('%Y-%m-%d'),
-                        'date_str_display': date_format(new_sch.date, "l, d M Y"), 
-                        'start_time': new_sch.start_time.strftime('%H:%M'),
-                        'end_time': new_sch.end_time.strftime('%H:%M'),
-                        'is_booked': False,
-                        'is_available': True,
-                    })
-
-                
-                current = next_dt
+            new_slots = generate_slots(
+                VenueSchedule, 'venue', venue,
+                start_date=schedule_date,
+                end_date=cd['end_date'],
+                start_time=start_time,
+                end_time=end_dt_time,
+                weekdays=cd.get('weekdays'),
+                slot_minutes=cd.get('slot_minutes') or 60,
+                is_available=is_available,
+            )
+            created = len(new_slots)
+            new_slots_data = [slot_payload(slot) for slot in new_slots]
             
 
             if is_flutter:
@@ -572,19 +507,16 @@ def venue_manage_schedule_view(request, venue_id):
 
     if request.GET.get('format') == 'json' or request.headers.get('Accept') == 'application/json':
         schedules = venue.schedules.all().order_by('date', 'start_time')
-        data = []
-        for s in schedules:
-            data.append({
-                'id': s.id,
-                'date': s.date.strftime('%Y-%m-%d'),
+        return stream_json_array(schedules, lambda s: {
+            'id': s.id,
+            'date': s.date.strftime('%Y-%m-%d'),
 
-                'date_display': date_format(s.date, "l, d M Y"), 
-                'start_time': s.start_time.strftime('%H:%M'),
-                'end_time': s.end_time.strftime('%H:%M'),
-                'is_booked': s.is_booked,
-                'is_available': s.is_available,
-            })
-        return JsonResponse(data, safe=False)
+            'date_display': date_format(s.date, "l, d M Y"), 
+            'start_time': s.start_time.strftime('%H:%M'),
+            'end_time': s.end_time.strftime('%H:%M'),
+            'is_booked': s.is_booked,
+            'is_available': s.is_available,
+        })
 
 
     schedule_form = VenueScheduleForm()
@@ -598,7 +530,7 @@ def venue_manage_schedule_view(request, venue_id):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_venue_owner, login_url='home')
+@role_required(VENUE_OWNER)
 def venue_schedule_delete(request, venue_id):
 
     if request.method != 'DELETE' and request.method != 'POST':
@@ -611,25 +543,21 @@ def venue_schedule_delete(request, venue_id):
 
     try:
         data = json.loads(request.body)
-        ids = data.get('selected_schedules', [])
+        slot_filter = parse_slot_filter(data)
     except json.JSONDecodeError:
         return JsonResponse({"success": False, "message": "Format data JSON tidak valid."}, status=400)
+    except SlotFilterError as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
 
-    if not ids:
-        return JsonResponse({"success": False, "message": "Tidak ada jadwal yang dipilih."}, status=400)
-
-    deletable_qs = VenueSchedule.objects.filter(id__in=ids, venue_id=venue.id, is_booked=False)
-    count = deletable_qs.count()
+    count, _ = delete_slots(VenueSchedule, 'venue', venue, **slot_filter)
     
     if count == 0:
          return JsonResponse({"success": True, "message": "Tidak ada jadwal yang dapat dihapus."})
 
-    deletable_qs.delete()
-    
     return JsonResponse({"success": True, "message": f"{count} jadwal berhasil dihapus."})
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_venue_owner, login_url='home')
+@role_required(VENUE_OWNER)
 def delete_venue_view(request, venue_id):
     try:
         venue = get_object_or_404(Venue, pk=venue_id)
@@ -714,43 +642,57 @@ def delete_venue_view(request, venue_id):
         return redirect('venue_dashboard')
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def get_available_coaches(request, schedule_id):
     editing_booking_id = request.GET.get('editing_booking_id')
 
     try:
-        schedule_query = Q(id=schedule_id)
         schedule_booked_filter = Q(is_booked=False)
         if editing_booking_id:
             schedule_booked_filter |= Q(booking__id=editing_booking_id)
         
-        schedule_query &= schedule_booked_filter
-        
-        schedule = VenueSchedule.objects.select_related('venue__location', 'venue__sport_category').get(schedule_query)
+        schedule = find_slot(
+            VenueSchedule, 'venue', schedule_id,
+            queryset=VenueSchedule.objects.select_related('venue__location', 'venue__sport_category').filter(schedule_booked_filter)
+        )
         venue = schedule.venue
     except VenueSchedule.DoesNotExist:
         return JsonResponse({'error': 'Jadwal tidak ditemukan atau sudah dibooking.'}, status=404)
-    coach_schedule_query = Q(
-        date=schedule.date,
-        start_time=schedule.start_time,
-        is_available=True,
-    )
-    
-    coach_booked_filter = Q(is_booked=False)
+    candidate_ids = list(CoachProfile.objects.filter(
+        service_areas=venue.location,
+        main_sport_trained=venue.sport_category
+    ).values_list('id', flat=True).distinct())
+
+    # coach kosong tepat di jam mulai slot dijawab dari bitmap slot_index
+    masks = slot_index.get_masks('coach', candidate_ids, schedule.date)
+    available_coach_ids, unindexed_ids = [], []
+    for coach_id in candidate_ids:
+        free = slot_index.starts_at(masks[coach_id], schedule.start_time)
+        if free:
+            available_coach_ids.append(coach_id)
+        elif free is None:
+            unindexed_ids.append(coach_id)
+
+    # hari yang tidak bisa diindeks dan slot milik booking yang sedang diedit dicek lewat query
+    fallback_query = Q(coach_id__in=unindexed_ids, is_booked=False)
     if editing_booking_id:
-        coach_booked_filter |= Q(booking__id=editing_booking_id)
-
-    coach_schedule_query &= coach_booked_filter
-
-    available_coach_ids = CoachSchedule.objects.filter(
-        coach_schedule_query
-    ).values_list('coach_id', flat=True)
+        fallback_query |= Q(coach_id__in=candidate_ids, booking__id=editing_booking_id)
+    if unindexed_ids or editing_booking_id:
+        available_coach_ids += list(CoachSchedule.objects.filter(
+            fallback_query,
+            date=schedule.date,
+            start_time=schedule.start_time,
+            is_available=True,
+        ).values_list('coach_id', flat=True))
+    if unindexed_ids:
+        available_coach_ids += [
+            slot.coach_id
+            for slot in virtual_coach_slots(schedule.date, schedule.start_time, id__in=unindexed_ids)
+        ]
 
     coaches_for_schedule = CoachProfile.objects.filter(
-        id__in=available_coach_ids,
-        service_areas=venue.location,
-        main_sport_trained=venue.sport_category
-    ).distinct().select_related(
+        id__in=available_coach_ids
+    ).select_related(
         'user', 'main_sport_trained'
     ).prefetch_related('service_areas')
 
@@ -772,7 +714,7 @@ def get_available_coaches(request, schedule_id):
 
     return JsonResponse({'coaches': coaches_data})
 
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 def coach_profile_view(request):
     try:
         coach_profile = CoachProfile.objects.get(user=request.user)
@@ -793,7 +735,7 @@ def coach_profile_view(request):
     return render(request, 'main/coach_profile.html', context)
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 @require_http_methods(["POST"])
 def save_coach_profile_ajax(request):
     try:
@@ -833,7 +775,7 @@ def save_coach_profile_ajax(request):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 @require_http_methods(["DELETE", "POST"]) 
 def delete_coach_profile_ajax(request):
     
@@ -857,7 +799,7 @@ def delete_coach_profile_ajax(request):
         }, status=500)
     
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 def get_coach_profile_form_ajax(request):
     """Return form HTML for modal"""
     try:
@@ -876,7 +818,7 @@ def get_coach_profile_form_ajax(request):
 
 @csrf_exempt 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 def coach_schedule(request):
     """Handles displaying and AJAX/JSON creation of coach schedules."""
 
@@ -924,45 +866,15 @@ def coach_schedule(request):
                 return JsonResponse({"success": False, "message": msg}, status=400) if is_flutter else render(request, 'main/coach_schedule.html', {'form': form, 'error': msg})
 
 
-            created = 0
-            new_slots_data = []
-            current = start_dt
-
-            while current < end_dt:
-                slot_start = current.time()
-                next_dt = current + timedelta(hours=1)
-                
-                if next_dt > end_dt:
-                    next_dt = end_dt 
-                
-                slot_end = next_dt.time()
-
-                exists = CoachSchedule.objects.filter(
-                    coach=coach_profile, date=schedule_date, start_time=slot_start
-                ).exists()
-
-                if not exists:
-                    new_schedule = CoachSchedule.objects.create(
-                        coach=coach_profile,
-                        date=schedule_date,
-                        start_time=slot_start,
-                        end_time=slot_end,
-                        is_available=True 
-                    )
-                    created += 1
-                    
-                    new_slots_data.append({
-                        'id': new_schedule.id,
-                        'date_str_iso': new_schedule.date.strftime('%Y-%m-%d'),
-                        'date_str_display': date_format(new_schedule.date, "l, d M Y"), 
-                        'start_time': new_schedule.start_time.strftime('%H:%M'),
-                        'end_time': new_schedule.end_time.strftime('%H:%M'),
-                        'is_booked': False,
-                        'is_available': True,
-                    })
-
-                
-                current = next_dt
+            new_slots = generate_slots(
+                CoachSchedule, 'coach', coach_profile,
+                start_date=schedule_date,
+                end_date=schedule_date,
+                start_time=start_time_slot,
+                end_time=end_dt_time,
+            )
+            created = len(new_slots)
+            new_slots_data = [slot_payload(slot) for slot in new_slots]
 
 
             if is_flutter:
@@ -1019,7 +931,7 @@ def coach_schedule(request):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 def coach_schedule_delete(request):
 
     if request.method != 'DELETE' and request.method != 'POST':
@@ -1033,25 +945,13 @@ def coach_schedule_delete(request):
 
     try:
         data = json.loads(request.body)
-        ids = data.get('selected_schedules', [])
+        slot_filter = parse_slot_filter(data)
     except json.JSONDecodeError:
         return JsonResponse({"message": "Format data JSON tidak valid."}, status=400)
+    except SlotFilterError as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
 
-    if not ids:
-        return JsonResponse({"success": False, "message": "Tidak ada jadwal yang dipilih."}, status=400)
-
-    deleted = 0
-    warning_count = 0
-    
-    deletable_qs = CoachSchedule.objects.filter(id__in=ids, coach=coach_profile)
-
-    for cs in deletable_qs:
-        if cs.is_booked:
-            warning_count += 1
-            continue 
-        
-        cs.delete()
-        deleted += 1
+    deleted, warning_count = delete_slots(CoachSchedule, 'coach', coach_profile, **slot_filter)
 
     message = f"{deleted} jadwal berhasil dihapus."
     if warning_count > 0:
@@ -1068,11 +968,7 @@ def coach_list_view(request):
 
     query = request.GET.get('q')
     if query:
-        coaches_list = coaches_list.filter(
-            Q(user__first_name__icontains=query) |
-            Q(user__last_name__icontains=query) |
-            Q(user__username__icontains=query)
-        )
+        coaches_list = search_coaches(coaches_list, query).order_by('-search_rank', 'user__first_name', 'id')
     
 
     sport_filter = request.GET.get('sport')
@@ -1094,8 +990,8 @@ def coach_list_view(request):
     except EmptyPage:
         coaches = paginator.page(paginator.num_pages)
     
-    categories = SportCategory.objects.all()
-    areas = LocationArea.objects.all()
+    categories = sport_categories()
+    areas = location_areas()
     
     context = {
         'coaches': coaches, 
@@ -1107,7 +1003,7 @@ def coach_list_view(request):
 def coach_detail_public_view(request, coach_id):
     """Menampilkan detail coach untuk publik"""
     coach = get_object_or_404(
-        CoachProfile.objects.select_related('user', 'main_sport_trained')
+        CoachProfile.objects.select_related('user', 'main_sport_trained', 'rating_summary')
         .prefetch_related('service_areas'),
         id=coach_id
     )
@@ -1116,17 +1012,13 @@ def coach_detail_public_view(request, coach_id):
     reviews = Review.objects.filter(target_coach=coach).select_related('customer').order_by('-created_at')[:5]
     
 
-    avg_rating = reviews.aggregate(avg=Sum('rating'))['avg']
-    if avg_rating and reviews.count() > 0:
-        avg_rating = avg_rating / reviews.count()
-    else:
-        avg_rating = 0
+    avg_rating, total_reviews = rating_of(coach)
     
     context = {
         'coach': coach,
         'reviews': reviews,
         'avg_rating': avg_rating,
-        'total_reviews': reviews.count(),
+        'total_reviews': total_reviews,
     }
     return render(request, 'main/coach_detail.html', context)
 
@@ -1146,11 +1038,7 @@ def filter_coaches_ajax(request):
     
 
     if query:
-        coaches_list = coaches_list.filter(
-            Q(user__first_name__icontains=query) |
-            Q(user__last_name__icontains=query) |
-            Q(user__username__icontains=query)
-        )
+        coaches_list = search_coaches(coaches_list, query).order_by('-search_rank', 'user__first_name', 'id')
     
 
     if sport_filter:
@@ -1191,24 +1079,20 @@ def get_coach_detail_ajax(request, coach_id):
     View AJAX untuk mengambil detail coach untuk ditampilkan di modal.
     """
     coach = get_object_or_404(
-        CoachProfile.objects.select_related('user', 'main_sport_trained')
+        CoachProfile.objects.select_related('user', 'main_sport_trained', 'rating_summary')
         .prefetch_related('service_areas'),
         id=coach_id
     )
     
     reviews = Review.objects.filter(target_coach=coach).select_related('customer').order_by('-created_at')[:5]
     
-    avg_rating = reviews.aggregate(avg=Sum('rating'))['avg']
-    if avg_rating and reviews.count() > 0:
-        avg_rating = avg_rating / reviews.count()
-    else:
-        avg_rating = 0
+    avg_rating, total_reviews = rating_of(coach)
     
     context = {
         'coach': coach,
         'reviews': reviews,
         'avg_rating': avg_rating,
-        'total_reviews': reviews.count(),
+        'total_reviews': total_reviews,
     }
     
     html = render_to_string(
@@ -1219,7 +1103,7 @@ def get_coach_detail_ajax(request, coach_id):
     return JsonResponse({'html': html})
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 def coach_revenue_report(request):
     try:
         coach_profile = CoachProfile.objects.get(user=request.user)
@@ -1233,7 +1117,7 @@ def coach_revenue_report(request):
             booking__coach_schedule__coach=coach_profile, 
             status='CONFIRMED'
         )
-        total_revenue = transactions.aggregate(Sum('revenue_coach'))['revenue_coach__sum'] or 0
+        total_revenue = coach_revenue_total(coach_profile)
     else:
         transactions = []
         total_revenue = 0
@@ -1269,7 +1153,7 @@ def admin_dashboard_view(request):
     return render(request, 'main/admin_dashboard.html', context)
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def create_booking(request, venue_id):
     venue = get_object_or_404(Venue, id=venue_id)
     
@@ -1294,10 +1178,15 @@ def create_booking(request, venue_id):
             date=today,
             start_time__lt=current_time
         ).order_by('date', 'start_time')
+        schedules = with_virtual_slots(
+            VenueSchedule, 'venue', venue, schedules, today,
+            not_before=datetime.combine(today, current_time)
+        )
 
         schedules_data = [
             {
                 'id': s.id,
+                'slot_key': s.slot_key,
                 'date': s.date.isoformat(),
                 'date_display': s.date.strftime('%A, %d %B %Y'),
                 'start_time': s.start_time.strftime('%H:%M'),
@@ -1381,144 +1270,62 @@ def create_booking(request, venue_id):
             today = now_in_jakarta.date()
             current_time = now_in_jakarta.time()
 
-            with db_transaction.atomic():
-                try:
-                    schedule = VenueSchedule.objects.select_for_update().get(
-                        id=schedule_id,
-                        venue=venue,
-                        is_booked=False,
-                        date__gte=today
-                    )
-                    if schedule.date == today and schedule.start_time < current_time:
-                        raise VenueSchedule.DoesNotExist("Jadwal yang dipilih sudah lewat.")
-                except VenueSchedule.DoesNotExist as e:
-                    error_msg = f"Jadwal tidak tersedia atau sudah dibooking."
+            selected_equipment = []
+            if equipment_ids:
+                equipment_queryset = Equipment.objects.filter(id__in=equipment_ids, venue=venue)
+                for eq in equipment_queryset:
                     if is_json:
-                        return JsonResponse({'success': False, 'message': error_msg}, status=400)
-                    messages.error(request, error_msg)
-                    return redirect('create_booking', venue_id=venue.id)
-
-                total_price = venue.price_per_hour or 0
-                selected_equipment_data = []
-                equipment_revenue = 0
-
-
-                if equipment_ids:
-                    equipment_queryset = Equipment.objects.filter(id__in=equipment_ids, venue=venue)
-                    for eq in equipment_queryset:
-                        if is_json:
-                            quantity = quantities.get(str(eq.id), 1)
-                        else:
- 
-                            q_val = request.POST.get(f'quantity_{eq.id}')
-                            
- 
-                            if not q_val:
-                                from django.utils.numberformat import format
-                                id_with_dot = format(eq.id, '.', grouping=3, thousand_sep='.', force_grouping=True)
-                                q_val = request.POST.get(f'quantity_{id_with_dot}')
-                            
- 
-                            quantity_str = q_val if q_val else '1'
-                            
-                            try:
-                                quantity = int(quantity_str)
-                                if quantity <= 0: quantity = 1
-                            except (ValueError, TypeError):
-                                quantity = 1
-
-                        if quantity > eq.stock_quantity:
-                            error_msg = f"Stock untuk {eq.name} tidak mencukupi (tersisa {eq.stock_quantity})."
-                            if is_json:
-                                return JsonResponse({'success': False, 'message': error_msg}, status=400)
-                            messages.error(request, error_msg)
-                            raise IntegrityError(error_msg)
-
-                        item_sub_total = (eq.rental_price or 0) * quantity
-                        equipment_revenue += item_sub_total
-                        selected_equipment_data.append((eq, quantity, item_sub_total))
-
- 
-                coach_obj = None
-                coach_schedule_obj = None
-                coach_revenue = 0
-
-                if coach_id:
-                    try:
-                        coach_obj = CoachProfile.objects.get(id=coach_id)
-                        coach_schedule_obj = CoachSchedule.objects.select_for_update().get(
-                            coach=coach_obj,
-                            date=schedule.date,
-                            start_time=schedule.start_time,
-                            is_booked=False
-                        )
-                        coach_revenue = coach_obj.rate_per_hour or 0
-                    except (CoachProfile.DoesNotExist, CoachSchedule.DoesNotExist) as e:
-                        error_msg = "Coach tidak tersedia pada jadwal yang dipilih."
-                        if is_json:
-                            return JsonResponse({'success': False, 'message': error_msg}, status=400)
+                        quantity = quantities.get(str(eq.id), 1)
+                    else:
  
-                        messages.error(request, error_msg)
-                        return redirect('create_booking', venue_id=venue.id)
-
-                total_price += equipment_revenue + coach_revenue
+                        q_val = request.POST.get(f'quantity_{eq.id}')
+                        
  
-                booking = Booking.objects.create(
-                    customer=request.user,
-                    venue_schedule=schedule,
-                    coach_schedule=coach_schedule_obj,
-                    total_price=total_price,
-                )
-
+                        if not q_val:
+                            from django.utils.numberformat import format
+                            id_with_dot = format(eq.id, '.', grouping=3, thousand_sep='.', force_grouping=True)
+                            q_val = request.POST.get(f'quantity_{id_with_dot}')
+                        
  
-                schedule.is_booked = True
-                schedule.save()
+                        quantity_str = q_val if q_val else '1'
+                        
+                        try:
+                            quantity = int(quantity_str)
+                            if quantity <= 0: quantity = 1
+                        except (ValueError, TypeError):
+                            quantity = 1
 
-                if coach_schedule_obj:
-                    coach_schedule_obj.is_booked = True
-                    coach_schedule_obj.save()
+                    selected_equipment.append((eq, quantity))
 
  
-                booking_equipment_list = []
-                for equipment, quantity, sub_total in selected_equipment_data:
-                    booking_equipment_list.append(
-                        BookingEquipment(
-                            booking=booking,
-                            equipment=equipment,
-                            quantity=quantity,
-                            sub_total=sub_total
-                        )
-                    )
-                if booking_equipment_list:
-                    BookingEquipment.objects.bulk_create(booking_equipment_list)
-
- 
-                Transaction.objects.create(
-                    booking=booking,
-                    status='PENDING',
-                    payment_method=payment_method,
-                    revenue_venue=(venue.price_per_hour or 0) + equipment_revenue,
-                    revenue_coach=coach_revenue,
-                    revenue_platform=0
-                )
+            coach_obj = None
+            if coach_id:
+                coach_obj = CoachProfile.objects.filter(id=coach_id).first()
+                if coach_obj is None:
+                    raise BookingError(COACH_UNAVAILABLE)
+
+            booking = allocate_booking(
+                request.user, venue, schedule_id,
+                coach=coach_obj,
+                equipment=selected_equipment,
+                payment_method=payment_method,
+                not_before=datetime.combine(today, current_time),
+            )
 
-                if is_json:
-                    return JsonResponse({
-                        'success': True,
-                        'message': 'Booking berhasil dibuat!',
-                        'booking': {
-                            'id': booking.id,
-                            'total_price': float(booking.total_price),
-                            'payment_method': payment_method,
-                        }
-                    })
+            if is_json:
+                return JsonResponse({
+                    'success': True,
+                    'message': 'Booking berhasil dibuat!',
+                    'booking': {
+                        'id': booking.id,
+                        'total_price': float(booking.total_price),
+                        'payment_method': payment_method,
+                    }
+                })
 
-                if payment_method.upper() == 'CASH':
-                    return redirect('my_bookings')
-                else:
-                    return redirect('my_bookings')
+            return redirect('my_bookings')
 
-        except IntegrityError as e:
+        except (BookingError, IntegrityError) as e:
             if is_json:
                 return JsonResponse({'success': False, 'message': str(e)}, status=400)
             messages.error(request, str(e))
@@ -1550,6 +1357,10 @@ def create_booking(request, venue_id):
         date=today,
         start_time__lt=current_time
     ).order_by('date', 'start_time')
+    schedules = with_virtual_slots(
+        VenueSchedule, 'venue', venue, schedules, today,
+        not_before=datetime.combine(today, current_time)
+    )
 
     context = {
         'venue': venue,
@@ -1561,7 +1372,7 @@ def create_booking(request, venue_id):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def customer_payment(request, booking_id):
     booking = get_object_or_404(Booking, id=booking_id, customer=request.user)
     transaction = booking.transaction
@@ -1583,15 +1394,6 @@ def customer_payment(request, booking_id):
                     transaction.save()
                     raise IntegrityError("Maaf, jadwal ini baru saja dikonfirmasi oleh pengguna lain.")
 
-                booking_equipments = BookingEquipment.objects.filter(booking=booking).select_related('equipment')
-                for be in booking_equipments:
-                    equipment = Equipment.objects.select_for_update().get(id=be.equipment.id)
-                    if equipment.stock_quantity < be.quantity:
-                        raise IntegrityError(f"Maaf, stok {equipment.name} tidak mencukupi. Tersedia: {equipment.stock_quantity}, Dibutuhkan: {be.quantity}")
-                    
-                    equipment.stock_quantity -= be.quantity
-                    equipment.save()
-
                 venue_schedule.is_booked = True
                 venue_schedule.save()
                 
@@ -1617,16 +1419,10 @@ def customer_payment(request, booking_id):
     return render(request, 'main/customer_payment.html', {'booking': booking, 'transaction': transaction})
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def booking_history(request):
     bookings = Booking.objects.filter(
         customer=request.user
-    ).select_related(
-        'venue_schedule__venue__location',
-        'coach_schedule__coach__user__profile',
-        'transaction'
-    ).prefetch_related(
-        'equipment_details__equipment'
     ).order_by('-venue_schedule__date')
 
     query = request.GET.get('q', '').strip()
@@ -1634,124 +1430,33 @@ def booking_history(request):
 
     if query:
         bookings = bookings.filter(
-            Q(venue_schedule__venue__name__icontains=query) |
+            Q(venue_schedule__venue__in=matching_venue_ids(query, columns=('name',))) |
             Q(id__icontains=query)
         )
 
     if status:
         bookings = bookings.filter(transaction__status=status)
 
+    bookings = with_latest_reviews(bookings, request.user)
+
     is_ajax_json = request.headers.get('X-Requested-With') == 'XMLHttpRequest' and request.headers.get('Accept') == 'application/json'
     
     if is_ajax_json:
-        bookings_data = []
-        
-        user_reviews = Review.objects.filter(customer=request.user).select_related('target_venue', 'target_coach')
-        venue_review_map, coach_review_map = {}, {}
-        
-        for r in user_reviews:
-            if r.target_venue_id:
-                prev = venue_review_map.get(r.target_venue_id)
-                if prev is None or r.created_at > prev.created_at:
-                    venue_review_map[r.target_venue_id] = r
-            if r.target_coach_id:
-                prev = coach_review_map.get(r.target_coach_id)
-                if prev is None or r.created_at > prev.created_at:
-                    coach_review_map[r.target_coach_id] = r
-        
-        for booking in bookings:
-            equipment_list = []
-            for eq_detail in booking.equipment_details.all():
-                equipment_list.append({
-                    'id': eq_detail.equipment.id,
-                    'name': eq_detail.equipment.name,
-                    'quantity': eq_detail.quantity,
-                    'price': str(eq_detail.equipment.rental_price)
-                })
-
-            booking_data = {
-                'id': booking.id,
-                'venue': {
-                    'id': booking.venue_schedule.venue.id,
-                    'name': booking.venue_schedule.venue.name,
-                    'location': booking.venue_schedule.venue.location.name if booking.venue_schedule.venue.location else None
-                },
-                'schedule': {
-                    'date': booking.venue_schedule.date.strftime('%Y-%m-%d'),
-                    'date_display': booking.venue_schedule.date.strftime('%A, %d %B %Y'),
-                    'start_time': booking.venue_schedule.start_time.strftime('%H:%M'),
-                    'end_time': booking.venue_schedule.end_time.strftime('%H:%M')
-                },
-                'coach': None,
-                'equipment': equipment_list,
-                'total_price': str(booking.total_price),
-                'transaction': {
-                    'payment_method': booking.transaction.payment_method,
-                    'status': booking.transaction.status,
-                    'status_display': booking.transaction.get_status_display()
-                },
-                'venue_review': None,
-                'coach_review': None,
-                'booking_time': booking.booking_time.isoformat() if hasattr(booking, 'booking_time') else None
-            }
-
-            if booking.coach_schedule:
-                booking_data['coach'] = {
-                    'id': booking.coach_schedule.coach.id,
-                    'name': booking.coach_schedule.coach.user.get_full_name() or booking.coach_schedule.coach.user.username,
-                    'phone_number': booking.coach_schedule.coach.user.profile.phone_number if hasattr(booking.coach_schedule.coach.user, 'profile') else None
-                }
-
-            v_id = booking.venue_schedule.venue_id
-            c_id = booking.coach_schedule.coach_id if booking.coach_schedule else None
-            
-            if v_id and v_id in venue_review_map:
-                review = venue_review_map[v_id]
-                booking_data['venue_review'] = {
-                    'id': review.id,
-                    'rating': review.rating,
-                    'comment': review.comment,
-                    'created_at': review.created_at.isoformat()
-                }
-            
-            if c_id and c_id in coach_review_map:
-                review = coach_review_map[c_id]
-                booking_data['coach_review'] = {
-                    'id': review.id,
-                    'rating': review.rating,
-                    'comment': review.comment,
-                    'created_at': review.created_at.isoformat()
-                }
-
-            bookings_data.append(booking_data)
-
-        return JsonResponse({
+        display = DisplayCache()
+        bookings_data = [
+            history_booking_payload(booking, display)
+            for booking in booking_list_queryset(bookings)
+        ]
+        return json_response({
             'success': True,
             'bookings': bookings_data,
             'total': len(bookings_data)
         })
-    
-    user_reviews = Review.objects.filter(customer=request.user).select_related('target_venue', 'target_coach')
-    venue_review_map, coach_review_map = {}, {}
-    for r in user_reviews:
-        if r.target_venue_id:
-            prev = venue_review_map.get(r.target_venue_id)
-            if prev is None or r.created_at > prev.created_at:
-                venue_review_map[r.target_venue_id] = r
-        if r.target_coach_id:
-            prev = coach_review_map.get(r.target_coach_id)
-            if prev is None or r.created_at > prev.created_at:
-                coach_review_map[r.target_coach_id] = r
 
+    bookings = booking_list_queryset(bookings, compact=False)
     for b in bookings:
-        b.venue_review = None
-        b.coach_review = None
-        v_id = getattr(getattr(b, 'venue_schedule', None), 'venue_id', None)
-        c_id = getattr(getattr(b, 'coach_schedule', None), 'coach_id', None)
-        if v_id:
-            b.venue_review = venue_review_map.get(v_id)
-        if c_id:
-            b.coach_review = coach_review_map.get(c_id)
+        b.venue_review = latest_review(b, 'venue')
+        b.coach_review = latest_review(b, 'coach')
 
     context = {'bookings': bookings}
 
@@ -1761,7 +1466,7 @@ def booking_history(request):
     return render(request, 'main/booking_history.html', context)
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def my_bookings(request):
     user = request.user
     search_query = request.GET.get('q', '').strip()
@@ -1769,87 +1474,26 @@ def my_bookings(request):
     bookings = Booking.objects.filter(
         customer=user,
         transaction__status='PENDING'  
-    ).select_related(
-        'venue_schedule__venue__sport_category',
-        'venue_schedule__venue__location',
-        'coach_schedule__coach__user',
-        'transaction'
-    ).prefetch_related(
-        'equipment_details__equipment'
     ).order_by('-booking_time')
     
     if search_query:
         bookings = bookings.filter(
-            Q(venue_schedule__venue__name__icontains=search_query) |
+            Q(venue_schedule__venue__in=matching_venue_ids(search_query, columns=('name',))) |
             Q(id__icontains=search_query)
         )
     
     is_ajax_json = request.headers.get('X-Requested-With') == 'XMLHttpRequest' and request.headers.get('Accept') == 'application/json'
     
     if is_ajax_json:
-        bookings_data = []
-        for booking in bookings:
-            venue = booking.venue_schedule.venue
-            coach = booking.coach_schedule.coach if booking.coach_schedule else None
-            transaction = booking.transaction
-            
-            equipments = []
-            for be in booking.equipment_details.all():
-                equipments.append({
-                    'id': be.equipment.id,
-                    'name': be.equipment.name,
-                    'quantity': be.quantity,
-                    'rental_price': float(be.equipment.rental_price or 0),
-                    'sub_total': float(be.sub_total or 0)
-                })
-            
-            booking_data = {
-                'id': booking.id,
-                'venue': {
-                    'id': venue.id,
-                    'name': venue.name,
-                    'description': venue.description or '',
-                    'sport_category': venue.sport_category.name if venue.sport_category else None,
-                    'location': venue.location.name if venue.location else None,
-                    'price_per_hour': float(venue.price_per_hour or 0),
-                    'image_url': venue.main_image if venue.main_image else None,
-                },
-                'schedule': {
-                    'id': booking.venue_schedule.id,
-                    'date': booking.venue_schedule.date.isoformat(),
-                    'date_display': booking.venue_schedule.date.strftime('%A, %d %B %Y'),
-                    'start_time': booking.venue_schedule.start_time.strftime('%H:%M'),
-                    'end_time': booking.venue_schedule.end_time.strftime('%H:%M'),
-                },
-                'coach': {
-                    'id': coach.id,
-                    'name': coach.user.get_full_name() or coach.user.username,
-                    'rate_per_hour': float(coach.rate_per_hour or 0),
-                    'specialization': coach.main_sport_trained.name if coach.main_sport_trained else ''
-                } if coach else None,
-                'equipments': equipments,
-                'transaction': {
-                    'id': transaction.id,
-                    'status': transaction.status,
-                    'status_display': transaction.get_status_display(),
-                    'payment_method': transaction.payment_method,
-                    'revenue_venue': float(transaction.revenue_venue or 0),
-                    'revenue_coach': float(transaction.revenue_coach or 0),
-                    'transaction_time': transaction.transaction_time.isoformat(),  
-                } if transaction else None,
-                'total_price': float(booking.total_price or 0),
-                'booking_time': booking.booking_time.isoformat(),
-                'can_edit': True,  
-                'can_cancel': True,  
-            }
-            bookings_data.append(booking_data)
-        
-        return JsonResponse({
+        display = DisplayCache()
+        bookings_data = [my_booking_payload(booking, display) for booking in booking_list_queryset(bookings)]
+        return json_response({
             'success': True,
             'count': len(bookings_data),
             'bookings': bookings_data
         })
     
+    bookings = booking_list_queryset(bookings, compact=False)
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         html = render_to_string('main/_my_booking_list.html', {
             'bookings': bookings
@@ -1866,7 +1510,7 @@ def my_bookings(request):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def delete_booking(request, booking_id):
     if request.method not in ['DELETE', 'POST']:
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -1897,10 +1541,7 @@ def delete_booking(request, booking_id):
                     booking.coach_schedule.is_available = True
                     booking.coach_schedule.save()
                 
-                booking_equipments = BookingEquipment.objects.filter(booking=booking)
-                for item in booking_equipments:
-                    item.equipment.stock_quantity += item.quantity
-                    item.equipment.save()
+                release_booking_equipment(booking)
                 booking.transaction.delete()
                 booking.delete()
                 
@@ -1929,7 +1570,7 @@ def delete_booking(request, booking_id):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def update_booking(request, booking_id):
     if request.method not in ['PUT', 'POST']:   
         return JsonResponse({
@@ -2046,6 +1687,7 @@ def update_booking(request, booking_id):
                 except IntegrityError as e:
                     return JsonResponse({'success': False, 'message': str(e)}, status=400)
             
+            release_booking_equipment(booking)
             BookingEquipment.objects.filter(booking=booking).delete() 
             
             equipment_revenue = 0 
@@ -2060,9 +1702,6 @@ def update_booking(request, booking_id):
                     except (ValueError, TypeError):
                         quantity = 1
 
-                    if quantity > eq.stock_quantity:
-                         return JsonResponse({'success': False, 'message': f"Stock untuk {eq.name} tidak mencukupi."}, status=400)
-                    
                     item_sub_total = (eq.rental_price or 0) * quantity
                     equipment_revenue += item_sub_total 
                     
@@ -2074,6 +1713,14 @@ def update_booking(request, booking_id):
                             sub_total=item_sub_total 
                         )
                     )
+                try:
+                    reserve_equipment(
+                        new_schedule.date, new_schedule.start_time,
+                        [(item.equipment, item.quantity) for item in booking_equipment_list]
+                    )
+                except InsufficientStock as e:
+                    db_transaction.set_rollback(True)
+                    return JsonResponse({'success': False, 'message': str(e)}, status=400)
                 if booking_equipment_list:
                     BookingEquipment.objects.bulk_create(booking_equipment_list)
             
@@ -2124,7 +1771,7 @@ def update_booking(request, booking_id):
         return redirect('my_bookings')
 
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_customer, login_url='home')
+@role_required(CUSTOMER)
 def update_booking_data(request, booking_id):
     booking = get_object_or_404(
         Booking.objects.select_related(
@@ -2215,40 +1862,65 @@ def update_booking_data(request, booking_id):
     })
 
 def filter_venues_ajax(request):
-    """AJAX endpoint untuk filter venues dengan pagination"""
-    search = request.GET.get('search', '').strip()
-    location_id = request.GET.get('location', '')
-    sport_id = request.GET.get('sport', '')
+    """AJAX endpoint untuk filter venues dengan pagination; `facets=1` menambahkan jumlah per filter, `sort` mengatur urutan"""
+    try:
+        filters = parse_filters(request.GET)
+    except FacetError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     page = request.GET.get('page', 1)
     
-    venues = Venue.objects.all().select_related('location', 'sport_category', 'owner')
+    venues = Venue.objects.all().select_related(
+        'location', 'sport_category', 'owner', 'rating_summary'
+    ).order_by('id')
     
   
-    if search:
-        venues = venues.filter(
-            Q(name__icontains=search) | 
-            Q(description__icontains=search)
-        )
+    ordering = ['id']
+    if filters['search']:
+        venues = search_venues(venues, filters['search'], columns=SEARCH_COLUMNS)
+        ordering = ['-search_rank', 'id']
     
-    if location_id:
-        venues = venues.filter(location_id=location_id)
+    if filters['location']:
+        venues = venues.filter(location_id=filters['location'])
     
-    if sport_id:
-        venues = venues.filter(sport_category_id=sport_id)
+    if filters['sport']:
+        venues = venues.filter(sport_category_id=filters['sport'])
+
+    if filters['price']:
+        venues = venues.filter(price_q(filters['price']))
+
+    sort = request.GET.get('sort', '')
+    try:
+        ordering = venue_ordering(sort, default=ordering)
+    except SortError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     
  
-    paginator = Paginator(venues, 6)
-    try:
-        venues_page = paginator.page(page)
-    except PageNotAnInteger:
-        venues_page = paginator.page(1)
-    except EmptyPage:
-        venues_page = paginator.page(paginator.num_pages)
+    if wants_cursor(request):
+        try:
+            venues_page = paginate_request(request, venues, ordering, default_size=6)
+        except CursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        page_info = venues_page.meta()
+    else:
+        paginator = Paginator(venues.order_by(*ordering), 6)
+        try:
+            venues_page = paginator.page(page)
+        except PageNotAnInteger:
+            venues_page = paginator.page(1)
+        except EmptyPage:
+            venues_page = paginator.page(paginator.num_pages)
+        page_info = {
+            'has_next': venues_page.has_next(),
+            'has_previous': venues_page.has_previous(),
+            'current_page': venues_page.number,
+            'total_pages': paginator.num_pages,
+            'total_count': paginator.count,
+        }
     
   
     venues_data = []
     for venue in venues_page:
-        avg_rating = venue.reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+        avg_rating, review_count = rating_of(venue)
         
         venues_data.append({
             'id': venue.id,
@@ -2259,17 +1931,18 @@ def filter_venues_ajax(request):
             'price': float(venue.price_per_hour),
             'image': venue.main_image if venue.main_image else None,
             'rating': round(avg_rating, 1),
+            'review_count': review_count,
+            'next_available_slot': slot_or_none(venue.next_available_slot),
         })
     
   
+    if request.GET.get('facets') in ('1', 'true'):
+        page_info['facets'] = venue_facets(filters)
+
     return JsonResponse({
         'success': True,
         'venues': venues_data,
-        'has_next': venues_page.has_next(),
-        'has_previous': venues_page.has_previous(),
-        'current_page': venues_page.number,
-        'total_pages': paginator.num_pages,
-        'total_count': paginator.count,
+        **page_info,
     })
 
 def landing_page_view(request):
@@ -2339,7 +2012,8 @@ def upsert_review(request, booking_id):
                 obj.target_venue, obj.target_coach = venue, None
             else:
                 obj.target_coach, obj.target_venue = coach, None
-            obj.save()
+            with db_transaction.atomic():
+                obj.save()
 
             msg = "Feedback diperbarui." if instance else "Feedback berhasil ditambahkan."
             return JsonResponse({"success": True, "message": msg})
@@ -2369,7 +2043,8 @@ def delete_review(request, review_id):
     except Review.DoesNotExist:
         return JsonResponse({"success": False, "message": "Review tidak ditemukan."}, status=404)
     
-    review.delete()
+    with db_transaction.atomic():
+        review.delete()
     return JsonResponse({"success": True, "message": "Feedback berhasil dihapus."})
 
 @csrf_exempt
@@ -2381,10 +2056,13 @@ def get_booking_reviews(request, booking_id):
         )
     
     try:
-        booking = Booking.objects.select_related(
-            'venue_schedule__venue',
-            'coach_schedule__coach__user',
-            'customer'
+        booking = with_latest_reviews(
+            Booking.objects.select_related(
+                'venue_schedule__venue',
+                'coach_schedule__coach__user',
+                'customer'
+            ),
+            request.user
         ).get(pk=booking_id)
     except Booking.DoesNotExist:
         return JsonResponse(
@@ -2402,10 +2080,7 @@ def get_booking_reviews(request, booking_id):
     
     if booking.venue_schedule and booking.venue_schedule.venue:
         venue = booking.venue_schedule.venue
-        venue_review = Review.objects.filter(
-            customer=request.user,
-            target_venue=venue
-        ).first()
+        venue_review = latest_review(booking, 'venue')
         
         if venue_review:
             reviews_data.append({
@@ -2421,10 +2096,7 @@ def get_booking_reviews(request, booking_id):
     
     if booking.coach_schedule and booking.coach_schedule.coach:
         coach = booking.coach_schedule.coach
-        coach_review = Review.objects.filter(
-            customer=request.user,
-            target_coach=coach
-        ).first()
+        coach_review = latest_review(booking, 'coach')
         
         if coach_review:
             reviews_data.append({
@@ -2540,128 +2212,29 @@ def admin_toggle_coach_verification_view(request, coach_id):
 
 def show_json(request):
     if request.user.is_authenticated:
-        booking_list = Booking.objects.filter(customer=request.user).select_related(
-            'venue_schedule__venue', 
-            'coach_schedule__coach__user'
-        )
+        booking_list = booking_list_queryset(Booking.objects.filter(customer=request.user))
     else:
         booking_list = Booking.objects.none()
     
-    data = []
-    for booking in booking_list:
-        item = {
-            "model": "main.booking",
-            "pk": booking.pk,
-            "fields": {
-                "venue_schedule": booking.venue_schedule.id, 
-                "coach_schedule": booking.coach_schedule.id if booking.coach_schedule else None,
-                "customer": booking.customer.id, 
-
-                "customer_name": booking.customer.get_full_name() or booking.customer.username,
-                "venue_name": booking.venue_schedule.venue.name,
-                "date": booking.venue_schedule.date.strftime("%Y-%m-%d"),
-                "start_time": booking.venue_schedule.start_time.strftime("%H:%M"),
-                "end_time": booking.venue_schedule.end_time.strftime("%H:%M"),
-                "coach_name": booking.coach_schedule.coach.user.get_full_name() if booking.coach_schedule else "-",
-                
-                "total_price": str(booking.total_price),
-                "booking_time": booking.booking_time.isoformat() if hasattr(booking, 'booking_time') else None
-            }
-        }
-        data.append(item)
-    
-    return JsonResponse(data, safe=False)
+    display = DisplayCache()
+    return stream_json_array(booking_list, lambda booking: booking_record(booking, display, extended=False))
 
-def show_my_bookings_json(request):
+def _booking_records_json(request, status):
     if not request.user.is_authenticated:
-        return JsonResponse([], safe=False)
+        return json_response([])
 
-    bookings = Booking.objects.filter(
+    bookings = booking_list_queryset(Booking.objects.filter(
         customer=request.user,
-        transaction__status='PENDING'
-    ).select_related(
-        'venue_schedule__venue',
-        'coach_schedule__coach__user',
-        'transaction'
-    ).prefetch_related('equipment_details__equipment')
-
-    data = []
-    for booking in bookings:
-        equipments = []
-        for be in booking.equipment_details.all():
-            equipments.append({
-                "name": be.equipment.name,
-                "quantity": be.quantity
-            })
-
-        item = {
-            "model": "main.booking",
-            "pk": booking.pk,
-            "fields": {
-                "venue_schedule": booking.venue_schedule.id,
-                "coach_schedule": booking.coach_schedule.id if booking.coach_schedule else None,
-                "customer": booking.customer.id,
-                "customer_name": booking.customer.get_full_name() or booking.customer.username,
-                "venue_name": booking.venue_schedule.venue.name,
-                "date": booking.venue_schedule.date.strftime("%Y-%m-%d"),
-                "start_time": booking.venue_schedule.start_time.strftime("%H:%M"),
-                "end_time": booking.venue_schedule.end_time.strftime("%H:%M"),
-                "coach_name": (booking.coach_schedule.coach.user.get_full_name() or booking.coach_schedule.coach.user.username) if booking.coach_schedule else "-",
-                "total_price": str(booking.total_price),
-                "booking_time": booking.booking_time.isoformat() if booking.booking_time else None,
-                "payment_method": booking.transaction.payment_method if booking.transaction else "CASH",
-                "equipments": equipments,
-            }
-        }
-        data.append(item)
+        transaction__status=status
+    ))
+    display = DisplayCache()
+    return json_response([booking_record(booking, display) for booking in bookings])
 
-    return JsonResponse(data, safe=False)
+def show_my_bookings_json(request):
+    return _booking_records_json(request, 'PENDING')
 
 def show_booking_history_json(request):
-    if not request.user.is_authenticated:
-        return JsonResponse([], safe=False)
-    
-    bookings = Booking.objects.filter(
-        customer=request.user,
-        transaction__status='CONFIRMED'  
-    ).select_related(
-        'venue_schedule__venue',
-        'coach_schedule__coach__user',
-        'transaction'
-    ).prefetch_related('equipment_details__equipment')
-
-    data = []
-    for booking in bookings:
-        equipments = []
-        for be in booking.equipment_details.all():
-            equipments.append({
-                "name": be.equipment.name,
-                "quantity": be.quantity
-            })
-
-        item = {
-            "model": "main.booking",
-            "pk": booking.pk,
-            "fields": {
-                "venue_schedule": booking.venue_schedule.id,
-                "coach_schedule": booking.coach_schedule.id if booking.coach_schedule else None,
-                "customer": booking.customer.id,
-                "customer_name": booking.customer.get_full_name() or booking.customer.username,
-                "venue_name": booking.venue_schedule.venue.name,
-                "date": booking.venue_schedule.date.strftime("%Y-%m-%d"),
-                "start_time": booking.venue_schedule.start_time.strftime("%H:%M"),
-                "end_time": booking.venue_schedule.end_time.strftime("%H:%M"),
-                
-                "coach_name": (booking.coach_schedule.coach.user.get_full_name() or booking.coach_schedule.coach.user.username) if booking.coach_schedule else "-",
-                "total_price": str(booking.total_price),
-                "booking_time": booking.booking_time.isoformat() if booking.booking_time else None,
-                "payment_method": booking.transaction.payment_method if booking.transaction else "CASH",
-                "equipments": equipments,
-            }
-        }
-        data.append(item)
-
-    return JsonResponse(data, safe=False)
+    return _booking_records_json(request, 'CONFIRMED')
 
 @csrf_exempt
 def api_create_booking(request, venue_id):
@@ -2679,69 +2252,22 @@ def api_create_booking(request, venue_id):
         quantities = data.get('quantities', {})
         payment_method = data.get('payment_method', 'CASH')
         
-        schedule = get_object_or_404(VenueSchedule, pk=schedule_id, venue=venue)
-        
-        if schedule.is_booked:
-            return JsonResponse({'success': False, 'message': 'Jadwal sudah dibooking'})
-        
-        total_price = venue.price_per_hour
-        revenue_coach = 0
-        
-        coach_schedule = None
-        if coach_schedule_id:
-            coach_schedule = get_object_or_404(CoachSchedule, pk=coach_schedule_id)
-            if coach_schedule.is_booked:
-                return JsonResponse({'success': False, 'message': 'Coach sudah dibooking'})
-            revenue_coach = coach_schedule.coach.rate_per_hour
-            total_price += revenue_coach
-        
-        equipment_total = 0
+        selected_equipment = []
         for eq_id in equipment_ids:
             eq = get_object_or_404(Equipment, pk=eq_id, venue=venue)
             qty = int(quantities.get(str(eq_id), 1))
-            
-            if eq.stock_quantity < qty:
-                return JsonResponse({'success': False, 'message': f'Stok {eq.name} tidak mencukupi. Tersedia: {eq.stock_quantity}'})
-            
-            equipment_total += eq.rental_price * qty
-        
-        total_price += equipment_total
-        
-        booking = Booking.objects.create(
-            customer=request.user,
-            venue_schedule=schedule,
-            coach_schedule=coach_schedule,
-            total_price=total_price,
-        )
+            selected_equipment.append((eq, qty))
         
-        for eq_id in equipment_ids:
-            eq = get_object_or_404(Equipment, pk=eq_id, venue=venue)
-            qty = int(quantities.get(str(eq_id), 1))
-            
-            BookingEquipment.objects.create(
-                booking=booking,
-                equipment=eq,
-                quantity=qty,
-                sub_total=eq.rental_price * qty,
+        try:
+            booking = allocate_booking(
+                request.user, venue, schedule_id,
+                coach_schedule_ref=coach_schedule_id,
+                equipment=selected_equipment,
+                payment_method=payment_method,
+                mark_unavailable=True,
             )
-        
-        Transaction.objects.create(
-            booking=booking,
-            status='PENDING',
-            payment_method=payment_method,
-            revenue_venue=float(venue.price_per_hour) + float(equipment_total),
-            revenue_coach=float(revenue_coach),
-            revenue_platform=0,
-        )
-        
-        schedule.is_booked = True
-        schedule.is_available = False
-        schedule.save()
-        
-        if coach_schedule:
-            coach_schedule.is_booked = True
-            coach_schedule.is_available = False
-            coach_schedule.save()
+        except BookingError as e:
+            return JsonResponse({'success': False, 'message': str(e)})
         
         return JsonResponse({
             'success': True,
@@ -2759,30 +2285,48 @@ def api_filter_venues(request):
     sport_name = request.GET.get('sport_category', '') 
     page = request.GET.get('page', 1) 
     
-    venues_query = Venue.objects.all().select_related('location', 'sport_category', 'owner').order_by('id')
+    venues_query = Venue.objects.all().select_related(
+        'location', 'sport_category', 'owner', 'rating_summary'
+    ).order_by('id')
     
+    ordering = ['id']
     if search:
-        venues_query = venues_query.filter(
-            Q(name__icontains=search) |
-            Q(location__name__icontains=search) |
-            Q(sport_category__name__icontains=search)
-        )
+        venues_query = search_venues(venues_query, search, columns=('name', 'location', 'sport'))
+        ordering = ['-search_rank', 'id']
     
     if location_name:
         venues_query = venues_query.filter(location__name__icontains=location_name)
         
     if sport_name:
         venues_query = venues_query.filter(sport_category__name__icontains=sport_name)
-    
-    paginator = Paginator(venues_query, 6) 
+
+    sort = request.GET.get('sort', '')
     try:
-        venues_page = paginator.page(page)
-    except:
-        return JsonResponse({'success': True, 'venues': [], 'total_pages': 1})
+        ordering = venue_ordering(sort, default=ordering)
+    except SortError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    if wants_cursor(request):
+        try:
+            venues_page = paginate_request(request, venues_query, ordering, default_size=6)
+        except CursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        page_info = venues_page.meta()
+    else:
+        paginator = Paginator(venues_query.order_by(*ordering), 6) 
+        try:
+            venues_page = paginator.page(page)
+        except:
+            return JsonResponse({'success': True, 'venues': [], 'total_pages': 1})
+        page_info = {
+            'total_pages': paginator.num_pages, 
+            'current_page': venues_page.number,
+            'has_next': venues_page.has_next() 
+        }
 
     venues_data = []
     for v in venues_page:
-        avg_rating = Review.objects.filter(target_venue=v).aggregate(avg=Avg('rating'))['avg']
+        avg_rating, review_count = rating_of(v)
         
         venues_data.append({
             'id': v.pk,
@@ -2792,14 +2336,41 @@ def api_filter_venues(request):
             'price_per_hour': float(v.price_per_hour or 0),
             'image': v.main_image if v.main_image else '',
             'rating': float(avg_rating) if avg_rating else 5.0,  
+            'review_count': review_count,
+            'next_available_slot': slot_or_none(v.next_available_slot),
         })
     
     return JsonResponse({
         'success': True,
         'venues': venues_data,
-        'total_pages': paginator.num_pages, 
-        'current_page': venues_page.number,
-        'has_next': venues_page.has_next() 
+        **page_info,
+    })
+
+@require_http_methods(["GET"])
+def api_search_slots(request):
+    """Venue dengan slot kosong beserta jumlah coach kosong di jam yang sama."""
+    now = timezone.localtime()
+    try:
+        params = parse_search_params(request.GET, now.date())
+    except SearchError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    return JsonResponse(search_page(params, not_before=now.replace(tzinfo=None)))
+
+@require_http_methods(["GET"])
+def api_autocomplete(request):
+    """Saran nama venue, coach, area, dan olahraga dari indeks di memori; tanpa query database."""
+    kinds = tuple(filter(None, request.GET.get('types', '').split(','))) or autocomplete.KINDS
+    if not set(kinds) <= set(autocomplete.KINDS):
+        return JsonResponse({'success': False, 'message': f"types hanya boleh {', '.join(autocomplete.KINDS)}."}, status=400)
+    try:
+        limit = int(request.GET.get('limit') or autocomplete.DEFAULT_LIMIT)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= autocomplete.MAX_LIMIT:
+        return JsonResponse({'success': False, 'message': f"limit harus antara 1 dan {autocomplete.MAX_LIMIT}."}, status=400)
+    return JsonResponse({
+        'success': True,
+        'suggestions': autocomplete.suggest(request.GET.get('q', ''), kinds, limit),
     })
 
 @csrf_exempt
@@ -2809,15 +2380,18 @@ def api_booking_form_data(request, venue_id):
     except Venue.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Venue tidak ditemukan'}, status=404)
     
+    today = timezone.now().date()
     schedules = VenueSchedule.objects.filter(
         venue=venue,
-        date__gte=timezone.now().date()
+        date__gte=today
     ).order_by('date', 'start_time')
+    schedules = with_virtual_slots(VenueSchedule, 'venue', venue, schedules, today)
     
     schedules_data = []
     for s in schedules:
         schedules_data.append({
             'id': s.id,
+            'slot_key': s.slot_key,
             'date': s.date.strftime('%Y-%m-%d'),
             'date_display': s.date.strftime('%a, %d %b %Y'),
             'start_time': s.start_time.strftime('%H:%M'),
@@ -2855,7 +2429,10 @@ def api_get_coaches_for_schedule(request, schedule_id):
     editing_booking_id = request.GET.get('editing_booking_id')
 
     try:
-        venue_schedule = VenueSchedule.objects.select_related('venue', 'venue__sport_category', 'venue__location').get(pk=schedule_id)
+        venue_schedule = find_slot(
+            VenueSchedule, 'venue', schedule_id,
+            queryset=VenueSchedule.objects.select_related('venue', 'venue__sport_category', 'venue__location')
+        )
         venue = venue_schedule.venue
     except VenueSchedule.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Schedule tidak ditemukan'}, status=404)
@@ -2864,14 +2441,35 @@ def api_get_coaches_for_schedule(request, schedule_id):
     if editing_booking_id and editing_booking_id != 'null' and editing_booking_id != '':
         coach_booked_filter |= Q(booking__id=editing_booking_id)
 
+    # coach yang waktu kosongnya tidak menutupi slot ini (menurut bitmap) tidak perlu dicari
+    candidate_ids = list(CoachProfile.objects.filter(
+        main_sport_trained=venue.sport_category,
+        service_areas=venue.location
+    ).values_list('id', flat=True).distinct())
+    masks = slot_index.get_masks('coach', candidate_ids, venue_schedule.date)
+    coach_ids = [
+        coach_id for coach_id in candidate_ids
+        if slot_index.covers(masks[coach_id], venue_schedule.start_time, venue_schedule.end_time) is not False
+    ]
+    if editing_booking_id and editing_booking_id != 'null' and editing_booking_id != '':
+        coach_ids = candidate_ids
+    if not coach_ids:
+        return JsonResponse({'success': True, 'coaches': []})
+
     coach_schedules = CoachSchedule.objects.filter(
         coach_booked_filter, 
+        coach_id__in=coach_ids,
         date=venue_schedule.date,
         start_time__lte=venue_schedule.start_time,
         end_time__gte=venue_schedule.end_time,
         coach__main_sport_trained=venue.sport_category, 
         coach__service_areas=venue.location          
     ).select_related('coach', 'coach__user', 'coach__main_sport_trained').prefetch_related('coach__service_areas')
+    # Coach dengan pola mingguan tanpa baris jadwal: coach_schedule_id berisi slot_key
+    coach_schedules = list(coach_schedules) + virtual_coach_slots(
+        venue_schedule.date, venue_schedule.start_time, venue_schedule.end_time,
+        id__in=coach_ids
+    )
     
     coaches_data = []
     for cs in coach_schedules:
@@ -2879,7 +2477,7 @@ def api_get_coaches_for_schedule(request, schedule_id):
         service_areas = [area.name for area in coach.service_areas.all()] if coach.service_areas.exists() else []
         coaches_data.append({
             'id': coach.id,
-            'coach_schedule_id': cs.id,
+            'coach_schedule_id': cs.id or cs.slot_key,
             'name': coach.user.get_full_name() or coach.user.username,
             'age': coach.age,
             'rate_per_hour': float(coach.rate_per_hour or 0),
@@ -2915,10 +2513,7 @@ def api_cancel_booking(request, booking_id):
                     booking.coach_schedule.is_available = True
                     booking.coach_schedule.save()
                 
-                booking_equipments = BookingEquipment.objects.filter(booking=booking)
-                for item in booking_equipments:
-                    item.equipment.stock_quantity += item.quantity
-                    item.equipment.save()
+                release_booking_equipment(booking)
 
                 booking.transaction.delete()
                 booking.delete()
@@ -2948,96 +2543,107 @@ def api_update_booking(request, booking_id):
                 'message': 'Booking yang sudah dibayar tidak bisa diedit'
             })
         
-        if 'schedule_id' in data and data['schedule_id']: 
-            new_schedule_id = data['schedule_id']
+        old_schedule = booking.venue_schedule
+        old_items = booking_equipment_items(booking)
+        
+        with db_transaction.atomic():
+            if 'schedule_id' in data and data['schedule_id']: 
+                new_schedule_id = data['schedule_id']
             
-            if int(new_schedule_id) == booking.venue_schedule.id:
-                pass 
-            else:
-                new_schedule = get_object_or_404(VenueSchedule, pk=new_schedule_id)
+                if int(new_schedule_id) == booking.venue_schedule.id:
+                    pass 
+                else:
+                    new_schedule = get_object_or_404(VenueSchedule, pk=new_schedule_id)
                 
-                if new_schedule.is_booked:
-                     return JsonResponse({'success': False, 'message': 'Maaf, jadwal tersebut baru saja dibooking orang lain.'})
+                    if new_schedule.is_booked:
+                         return JsonResponse({'success': False, 'message': 'Maaf, jadwal tersebut baru saja dibooking orang lain.'})
 
-                old_schedule = booking.venue_schedule
-                old_schedule.is_booked = False
-                old_schedule.is_available = True
-                old_schedule.save()
+                    old_schedule = booking.venue_schedule
+                    old_schedule.is_booked = False
+                    old_schedule.is_available = True
+                    old_schedule.save()
                 
-                booking.venue_schedule = new_schedule
-                new_schedule.is_booked = True
-                new_schedule.is_available = False
-                new_schedule.save()
-        
-        if 'coach_schedule_id' in data:
-            new_coach_sched_id = data['coach_schedule_id']
-            old_coach_sched = booking.coach_schedule
+                    booking.venue_schedule = new_schedule
+                    new_schedule.is_booked = True
+                    new_schedule.is_available = False
+                    new_schedule.save()
+        
+            if 'coach_schedule_id' in data:
+                new_coach_sched_id = data['coach_schedule_id']
+                old_coach_sched = booking.coach_schedule
             
-            if old_coach_sched and (not new_coach_sched_id or old_coach_sched.id != new_coach_sched_id):
-                old_coach_sched.is_booked = False
-                old_coach_sched.save()
+                if old_coach_sched and (not new_coach_sched_id or old_coach_sched.id != new_coach_sched_id):
+                    old_coach_sched.is_booked = False
+                    old_coach_sched.save()
             
-            if new_coach_sched_id:
-                new_coach_sched = get_object_or_404(CoachSchedule, pk=new_coach_sched_id)
+                if new_coach_sched_id:
+                    new_coach_sched = get_object_or_404(CoachSchedule, pk=new_coach_sched_id)
                 
-                if new_coach_sched.is_booked and (not old_coach_sched or new_coach_sched.id != old_coach_sched.id):
-                    return JsonResponse({'success': False, 'message': 'Coach tersebut sudah dibooking.'})
+                    if new_coach_sched.is_booked and (not old_coach_sched or new_coach_sched.id != old_coach_sched.id):
+                        return JsonResponse({'success': False, 'message': 'Coach tersebut sudah dibooking.'})
                 
-                booking.coach_schedule = new_coach_sched
-                new_coach_sched.is_booked = True
-                new_coach_sched.save()
-            else:
-                booking.coach_schedule = None
+                    booking.coach_schedule = new_coach_sched
+                    new_coach_sched.is_booked = True
+                    new_coach_sched.save()
+                else:
+                    booking.coach_schedule = None
 
-        if 'equipment' in data:
-            old_equipments = BookingEquipment.objects.filter(booking=booking)
-            old_equipments.delete()
+            if 'equipment' in data:
+                old_equipments = BookingEquipment.objects.filter(booking=booking)
+                old_equipments.delete()
             
-            equipment_ids = data.get('equipment', [])
-            quantities = data.get('quantities', {})
+                equipment_ids = data.get('equipment', [])
+                quantities = data.get('quantities', {})
             
-            for eq_id in equipment_ids:
-                equipment = get_object_or_404(Equipment, pk=eq_id)
-                qty = int(quantities.get(str(eq_id), 1))
+                for eq_id in equipment_ids:
+                    equipment = get_object_or_404(Equipment, pk=eq_id)
+                    qty = int(quantities.get(str(eq_id), 1))
                 
-                if equipment.stock_quantity < qty:
-                    return JsonResponse({'success': False, 'message': f"Stok {equipment.name} tidak mencukupi."}, status=400)
-                
-                BookingEquipment.objects.create(
-                    booking=booking,
-                    equipment=equipment,
-                    quantity=qty,
-                    sub_total=equipment.rental_price * qty
+                    BookingEquipment.objects.create(
+                        booking=booking,
+                        equipment=equipment,
+                        quantity=qty,
+                        sub_total=equipment.rental_price * qty
+                    )
+
+            release_equipment(old_schedule.date, old_schedule.start_time, old_items)
+            try:
+                reserve_equipment(
+                    booking.venue_schedule.date, booking.venue_schedule.start_time,
+                    booking_equipment_items(booking)
                 )
+            except InsufficientStock as e:
+                db_transaction.set_rollback(True)
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
-        if 'payment_method' in data:
-            booking.transaction.payment_method = data['payment_method']
+            if 'payment_method' in data:
+                booking.transaction.payment_method = data['payment_method']
             
-        new_total_price = float(venue.price_per_hour)
+            new_total_price = float(venue.price_per_hour)
         
-        revenue_coach = 0
-        if booking.coach_schedule:
-            revenue_coach = float(booking.coach_schedule.coach.rate_per_hour)
-            new_total_price += revenue_coach
+            revenue_coach = 0
+            if booking.coach_schedule:
+                revenue_coach = float(booking.coach_schedule.coach.rate_per_hour)
+                new_total_price += revenue_coach
             
-        if 'equipment' not in data:
-            current_equipments = BookingEquipment.objects.filter(booking=booking)
-            equipment_cost = sum([e.sub_total for e in current_equipments])
-            new_total_price += float(equipment_cost)
-        else:
-            recalc_equipments = BookingEquipment.objects.filter(booking=booking)
-            equipment_cost = sum([e.sub_total for e in recalc_equipments])
-            new_total_price += float(equipment_cost)
+            if 'equipment' not in data:
+                current_equipments = BookingEquipment.objects.filter(booking=booking)
+                equipment_cost = sum([e.sub_total for e in current_equipments])
+                new_total_price += float(equipment_cost)
+            else:
+                recalc_equipments = BookingEquipment.objects.filter(booking=booking)
+                equipment_cost = sum([e.sub_total for e in recalc_equipments])
+                new_total_price += float(equipment_cost)
 
-        booking.total_price = new_total_price
-        booking.save()
+            booking.total_price = new_total_price
+            booking.save()
         
-        transaction = booking.transaction
-        transaction.revenue_venue = float(venue.price_per_hour) + float(equipment_cost)
-        transaction.revenue_coach = revenue_coach
-        transaction.save()
+            transaction = booking.transaction
+            transaction.revenue_venue = float(venue.price_per_hour) + float(equipment_cost)
+            transaction.revenue_coach = revenue_coach
+            transaction.save()
         
-        return JsonResponse({'success': True, 'message': 'Booking berhasil diperbarui'})
+            return JsonResponse({'success': True, 'message': 'Booking berhasil diperbarui'})
 
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -3045,28 +2651,14 @@ def api_update_booking(request, booking_id):
 @csrf_exempt
 def api_booking_detail(request, booking_id):
     try:
-        booking = get_object_or_404(Booking, pk=booking_id, customer=request.user)
-        
-        equipments = []
-        for be in booking.equipment_details.all():
-            equipments.append({
-                'id': be.equipment.pk,
-                'name': be.equipment.name,
-                'quantity': be.quantity,
-            })
-        
-        data = {
+        booking = get_object_or_404(
+            Booking.objects.select_related('transaction').prefetch_related('equipment_details__equipment'),
+            pk=booking_id, customer=request.user
+        )
+        return JsonResponse({
             'success': True,
-            'booking': {
-                'id': booking.pk,
-                'venue_id': booking.venue_schedule.venue.pk,      
-                'schedule_id': booking.venue_schedule.pk,        
-                'coach_schedule_id': booking.coach_schedule.pk if booking.coach_schedule else None,
-                'payment_method': booking.transaction.payment_method if hasattr(booking, 'transaction') else 'CASH',
-                'equipments': equipments,
-            }
-        }
-        return JsonResponse(data)
+            'booking': booking_detail_payload(booking),
+        })
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
 @login_required(login_url='login')
@@ -3109,8 +2701,8 @@ def api_venue_add(request):
     
  
     if request.method == 'GET':
-        locations = LocationArea.objects.all()
-        sports = SportCategory.objects.all()
+        locations = location_areas()
+        sports = sport_categories()
         
         locations_data = [
             {'id': loc.id, 'name': loc.name}
@@ -3207,53 +2799,17 @@ def api_venue_revenue(request):
         }, status=403)
     
     if request.method == 'GET':
-        venues = Venue.objects.filter(owner=request.user)
-        
-        total_revenue = 0
-        venue_revenue_data = []
-        
-        for venue in venues:
-            bookings = Booking.objects.filter(
-                venue_schedule__venue=venue,
-                transaction__status='CONFIRMED'
-            ).select_related('transaction', 'venue_schedule', 'customer', 'coach_schedule__coach__user').order_by('-venue_schedule__date')
-            
-            venue_revenue = 0
-            bookings_data = []
-            
-            for booking in bookings:
-                amount = float(booking.transaction.revenue_venue or 0)
-                venue_revenue += amount
-                
- 
-                coach_name = None
-                if booking.coach_schedule:
-                    coach_name = booking.coach_schedule.coach.user.username
-
-                bookings_data.append({
-                    'id': booking.id,
-                    'date': booking.venue_schedule.date.strftime('%a, %d %b %Y'),
-                    'start_time': booking.venue_schedule.start_time.strftime('%H:%M'),
-                    'end_time': booking.venue_schedule.end_time.strftime('%H:%M'),
-                    'customer_username': booking.customer.username,
-                    'revenue': amount,
-                    'coach': coach_name, 
-                })
-            
-            total_revenue += venue_revenue
-            
-            venue_revenue_data.append({
-                'venue_id': venue.id,
-                'venue_name': venue.name,
-                'total_revenue': venue_revenue,
-                'booking_count': bookings.count(),
-                'bookings': bookings_data
-            })
-        
+        filter_form = RevenueFilterForm(request.GET)
+        if not filter_form.is_valid():
+            return JsonResponse({'success': False, 'errors': filter_form.errors}, status=400)
+
+        report = venue_revenue_report(request.user, **filter_form.report_kwargs())
         return JsonResponse({
             'success': True,
-            'total_revenue': total_revenue,
-            'venue_revenue_data': venue_revenue_data
+            'total_revenue': float(report['total_revenue']),
+            'granularity': report['granularity'],
+            'page': report['page'],
+            'venue_revenue_data': [venue_report_payload(r) for r in report['venues']],
         })
     
     return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=405)
@@ -3279,8 +2835,8 @@ def api_venue_manage(request, venue_id):
     
  
     if request.method == 'GET':
-        locations = LocationArea.objects.all()
-        categories = SportCategory.objects.all()
+        locations = location_areas()
+        categories = sport_categories()
         equipments = Equipment.objects.filter(venue=venue)
         
         venue_data = {
@@ -3483,8 +3039,71 @@ def api_venue_delete(request, venue_id):
     
     return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=405)
 
+def _manage_availability(request, templates, create):
+    """GET: daftar pola; POST: tambah pola, atau hapus dengan {"action": "delete", "id": ...}."""
+    if request.method == 'GET':
+        return JsonResponse({
+            'success': True,
+            'templates': [availability_payload(t) for t in templates.order_by('id')],
+        })
+
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON'}, status=400)
+
+    if data.get('action') == 'delete':
+        deleted, _ = templates.filter(id=data.get('id')).delete()
+        if not deleted:
+            return JsonResponse({'success': False, 'message': 'Pola tidak ditemukan'}, status=404)
+        return JsonResponse({'success': True, 'message': 'Pola ketersediaan dihapus'})
+
+    form = AvailabilityTemplateForm(data)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+    template = create(**form.cleaned_data)
+    return JsonResponse({
+        'success': True,
+        'message': 'Pola ketersediaan disimpan',
+        'template': availability_payload(template),
+    }, status=201)
+
+@csrf_exempt
+@login_required(login_url='login')
+def api_venue_availability(request, venue_id):
+    """Flutter API: Pola ketersediaan mingguan venue (slot dibuat saat dibooking)."""
+    try:
+        venue = Venue.objects.get(id=venue_id, owner=request.user)
+    except Venue.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'message': 'Venue tidak ditemukan atau bukan milik Anda'
+        }, status=404)
+
+    return _manage_availability(
+        request, venue.availability_templates.all(),
+        lambda **fields: VenueAvailability.objects.create(venue=venue, **fields)
+    )
+
+@csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+def api_coach_availability(request):
+    """Flutter API: Pola ketersediaan mingguan coach (slot dibuat saat dibooking)."""
+    try:
+        coach_profile = CoachProfile.objects.get(user=request.user)
+    except CoachProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Profil pelatih tidak ditemukan.'}, status=400)
+
+    return _manage_availability(
+        request, coach_profile.availability_templates.all(),
+        lambda **fields: CoachAvailability.objects.create(coach=coach_profile, **fields)
+    )
+
+@login_required(login_url='login')
+@role_required(COACH)
 def get_coach_profile_json(request):
     """Endpoint JSON untuk mendapatkan coach profile user yang sedang login"""
     try:
@@ -3535,13 +3154,15 @@ def get_coach_profile_json(request):
         }, status=500)
     
 @login_required(login_url='login')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=lambda request: refdata_etag('sport_categories'))
 def get_sport_categories_json(request):
-    """Endpoint untuk mendapatkan daftar kategori olahraga"""
+    """Endpoint untuk mendapatkan daftar kategori olahraga (ETag, 304 bila tidak berubah)"""
     try:
-        categories = SportCategory.objects.all().values('id', 'name')
+        categories = [{'id': c.id, 'name': c.name} for c in sport_categories()]
         return JsonResponse({
             'success': True,
-            'categories': list(categories)
+            'categories': categories
         })
     except Exception as e:
         return JsonResponse({
@@ -3551,13 +3172,15 @@ def get_sport_categories_json(request):
 
 
 @login_required(login_url='login')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=lambda request: refdata_etag('location_areas'))
 def get_location_areas_json(request):
-    """Endpoint untuk mendapatkan daftar area lokasi"""
+    """Endpoint untuk mendapatkan daftar area lokasi (ETag, 304 bila tidak berubah)"""
     try:
-        areas = LocationArea.objects.all().values('id', 'name')
+        areas = [{'id': a.id, 'name': a.name} for a in location_areas()]
         return JsonResponse({
             'success': True,
-            'areas': list(areas)
+            'areas': areas
         })
     except Exception as e:
         return JsonResponse({
@@ -3568,7 +3191,7 @@ def get_location_areas_json(request):
 
 @csrf_exempt
 @login_required(login_url='login')
-@user_passes_test(lambda user: hasattr(user, 'profile') and user.profile.is_coach, login_url='home')
+@role_required(COACH)
 def save_coach_profile_flutter(request):
     """
     Endpoint untuk save/update coach profile dari Flutter
@@ -3693,7 +3316,7 @@ def coach_revenue_api(request):
             status='CONFIRMED'
         ).order_by('-transaction_time')
         
-        total_revenue = transactions.aggregate(Sum('revenue_coach'))['revenue_coach__sum'] or 0
+        total_revenue = coach_revenue_total(coach_profile)
         
         transactions_data = []
         for transaction in transactions:
@@ -3736,13 +3359,11 @@ def coach_list_json(request):
         ).prefetch_related('service_areas').order_by('user__first_name')
         
  
+        ordering = ['user__first_name', 'id']
         query = request.GET.get('q', '')
         if query:
-            coaches_list = coaches_list.filter(
-                Q(user__first_name__icontains=query) |
-                Q(user__last_name__icontains=query) |
-                Q(user__username__icontains=query)
-            )
+            coaches_list = search_coaches(coaches_list, query)
+            ordering = ['-search_rank', *ordering]
         
  
         sport_filter = request.GET.get('sport', '')
@@ -3754,15 +3375,31 @@ def coach_list_json(request):
             coaches_list = coaches_list.filter(service_areas__id=area_filter)
         
  
-        paginator = Paginator(coaches_list, 8)
-        page_number = request.GET.get('page', 1)
-        
-        try:
-            coaches = paginator.page(page_number)
-        except PageNotAnInteger:
-            coaches = paginator.page(1)
-        except EmptyPage:
-            coaches = paginator.page(paginator.num_pages)
+        if wants_cursor(request):
+            try:
+                coaches = paginate_request(request, coaches_list, ordering, default_size=8)
+            except CursorError as e:
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
+            pagination = coaches.meta()
+        else:
+            paginator = Paginator(coaches_list.order_by(*ordering), 8)
+            page_number = request.GET.get('page', 1)
+            
+            try:
+                coaches = paginator.page(page_number)
+            except PageNotAnInteger:
+                coaches = paginator.page(1)
+            except EmptyPage:
+                coaches = paginator.page(paginator.num_pages)
+            pagination = {
+                'current_page': coaches.number,
+                'total_pages': paginator.num_pages,
+                'has_previous': coaches.has_previous(),
+                'has_next': coaches.has_next(),
+                'previous_page': coaches.previous_page_number() if coaches.has_previous() else None,
+                'next_page': coaches.next_page_number() if coaches.has_next() else None,
+                'total_count': paginator.count,
+            }
         
  
         coaches_data = []
@@ -3796,15 +3433,7 @@ def coach_list_json(request):
         return JsonResponse({
             'success': True,
             'coaches': coaches_data,
-            'pagination': {
-                'current_page': coaches.number,
-                'total_pages': paginator.num_pages,
-                'has_previous': coaches.has_previous(),
-                'has_next': coaches.has_next(),
-                'previous_page': coaches.previous_page_number() if coaches.has_previous() else None,
-                'next_page': coaches.next_page_number() if coaches.has_next() else None,
-                'total_count': paginator.count,
-            }
+            'pagination': pagination,
         })
         
     except Exception as e:
@@ -3818,7 +3447,7 @@ def coach_detail_json(request, coach_id):
     """API endpoint untuk mendapatkan detail coach dalam format JSON"""
     try:
         coach = get_object_or_404(
-            CoachProfile.objects.select_related('user', 'main_sport_trained')
+            CoachProfile.objects.select_related('user', 'main_sport_trained', 'rating_summary')
             .prefetch_related('service_areas'),
             id=coach_id
         )
@@ -3837,7 +3466,6 @@ def coach_detail_json(request, coach_id):
         ).select_related('customer').order_by('-created_at')[:10]
         
         reviews_data = []
-        total_rating = 0
         for review in reviews:
             reviews_data.append({
                 'id': review.id,
@@ -3846,12 +3474,9 @@ def coach_detail_json(request, coach_id):
                 'comment': review.comment or '',
                 'created_at': review.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             })
-            total_rating += review.rating
         
  
-        avg_rating = 0
-        if reviews.count() > 0:
-            avg_rating = total_rating / reviews.count()
+        avg_rating, total_reviews = rating_of(coach)
         
         coach_data = {
             'id': coach.id,
@@ -3878,8 +3503,9 @@ def coach_detail_json(request, coach_id):
             'certifications': coach.certifications if hasattr(coach, 'certifications') else None,
             'achievements': coach.achievements if hasattr(coach, 'achievements') else None,
             'reviews': reviews_data,
-            'total_reviews': reviews.count(),
+            'total_reviews': total_reviews,
             'avg_rating': round(avg_rating, 1),
+            'rating_histogram': coach.rating_summary.histogram if total_reviews else {},
         }
         
         return JsonResponse({
@@ -3898,23 +3524,38 @@ def coach_detail_json(request, coach_id):
             'message': str(e)
         }, status=500)
 
-def proxy_image(request):
+IMAGE_CACHE_SECONDS = 30 * 24 * 60 * 60
+
+def _proxy_image_etag(request):
+    image_url = request.GET.get('url')
+    if not image_url:
+        return None
+    return variant_key(image_url, width_bucket(request.GET.get('w')), choose_format(request))
+
+@condition(etag_func=_proxy_image_etag)
+async def proxy_image(request):
+    """
+    Proxy gambar dengan cache disk; ?w= memilih lebar bucket, ?format= memilih jpeg/png/webp.
+    View async: saat cache miss, worker tidak tertahan menunggu host gambar yang lambat.
+    """
     image_url = request.GET.get('url')
     if not image_url:
         return HttpResponse('No URL provided', status=400)
+    if not image_url.startswith(('http://', 'https://')):
+        return HttpResponse('Invalid URL', status=400)
     
     try:
- 
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-  
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg')
+        path, content_type = await aget_variant(
+            image_url, width_bucket(request.GET.get('w')), choose_format(request)
         )
-    except requests.RequestException as e:
-        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+        data = await asyncio.to_thread(read_file, path)
+    except ProxyImageError as e:
+        return HttpResponse(str(e), status=500)
+    
+    response = HttpResponse(data, content_type=content_type)
+    patch_cache_control(response, public=True, max_age=IMAGE_CACHE_SECONDS, immutable=True)
+    patch_vary_headers(response, ['Accept'])
+    return response
     
 # --- ADMIN API FOR FLUTTER ---
 
@@ -3929,6 +3570,9 @@ def api_admin_dashboard(request):
     }
     return JsonResponse(data)
 
+ADMIN_USER_EXPORT_COLUMNS = ['username', 'email', 'role', 'phone_number', 'date_joined']
+ADMIN_BOOKING_EXPORT_COLUMNS = ['id', 'customer', 'venue', 'coach', 'total', 'status']
+
 @login_required
 @user_passes_test(is_admin)
 def api_admin_users(request):
@@ -3943,8 +3587,7 @@ def api_admin_users(request):
             Q(email__icontains=search_query)
         )
 
-    data = []
-    for u in users:
+    def serialize(u):
         role = "Lainnya"
         if u.is_superuser: role = "Admin"
         elif hasattr(u, 'profile'):
@@ -3956,14 +3599,26 @@ def api_admin_users(request):
         if hasattr(u, 'profile') and u.profile.phone_number:
             phone = u.profile.phone_number
 
-        data.append({
+        return {
             'username': u.username,
             'email': u.email or "-",
             'role': role,
             'phone_number': phone,
             'date_joined': u.date_joined.strftime("%d %b %Y")
-        })
-    return JsonResponse({'users': data})
+        }
+
+    fmt = export_format(request)
+    if fmt:
+        return stream_export(users, serialize, fmt, 'users', ADMIN_USER_EXPORT_COLUMNS)
+
+    if wants_cursor(request):
+        try:
+            users = paginate_request(request, users, ['-date_joined', '-id'], default_size=50)
+        except CursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        return JsonResponse({'users': [serialize(u) for u in users], **users.meta()})
+
+    return stream_json_object('users', users, serialize)
 
 @login_required
 @user_passes_test(is_admin)
@@ -3975,6 +3630,14 @@ def api_admin_venues(request):
     if search_query:
         venues = venues.filter(name__icontains=search_query)
 
+    page_info = {}
+    if wants_cursor(request):
+        try:
+            venues = paginate_request(request, venues, ['id'], default_size=50)
+        except CursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        page_info = venues.meta()
+
     data = []
     for v in venues:
         data.append({
@@ -3984,18 +3647,26 @@ def api_admin_venues(request):
             'location': v.location.name if v.location else "-",
             'price': v.price_per_hour
         })
-    return JsonResponse({'venues': data})
+    return JsonResponse({'venues': data, **page_info})
 
 @login_required
 @user_passes_test(is_admin)
 def api_admin_coaches(request):
     search_query = request.GET.get('q', '').strip()
     
-    coaches = CoachProfile.objects.select_related('user', 'main_sport_trained').all()
+    coaches = CoachProfile.objects.select_related('user', 'main_sport_trained').prefetch_related('service_areas').all()
     
     if search_query:
         coaches = coaches.filter(user__username__icontains=search_query)
 
+    page_info = {}
+    if wants_cursor(request):
+        try:
+            coaches = paginate_request(request, coaches, ['id'], default_size=50)
+        except CursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        page_info = coaches.meta()
+
     data = []
     for c in coaches:
         areas = [a.name for a in c.service_areas.all()] 
@@ -4010,7 +3681,7 @@ def api_admin_coaches(request):
             'profile_picture': c.profile_picture 
         })
         
-    return JsonResponse({'coaches': data})
+    return JsonResponse({'coaches': data, **page_info})
 
 @login_required
 @user_passes_test(is_admin)
@@ -4020,7 +3691,8 @@ def api_admin_bookings(request):
     bookings = Booking.objects.select_related(
         'customer', 
         'venue_schedule__venue', 
-        'transaction'
+        'transaction',
+        'coach_schedule__coach__user'
     ).all().order_by('-booking_time')
     
     if search_query:
@@ -4030,18 +3702,29 @@ def api_admin_bookings(request):
             Q(venue_schedule__venue__name__icontains=search_query)
         )
 
-    data = []
-    for b in bookings:
+    def serialize(b):
         status = "Unknown"
         if hasattr(b, 'transaction'):
             status = b.transaction.status
             
-        data.append({
+        return {
             'id': b.id,
             'customer': b.customer.username,
             'venue': b.venue_schedule.venue.name,
             'total': b.total_price,
             'status': status,
             'coach': b.coach_schedule.coach.user.username if b.coach_schedule else "-"
-        })
-    return JsonResponse({'bookings': data})
\ No newline at end of file
+        }
+
+    fmt = export_format(request)
+    if fmt:
+        return stream_export(bookings, serialize, fmt, 'bookings', ADMIN_BOOKING_EXPORT_COLUMNS)
+
+    if wants_cursor(request):
+        try:
+            bookings = paginate_request(request, bookings, ['-booking_time', '-id'], default_size=50)
+        except CursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        return JsonResponse({'bookings': [serialize(b) for b in bookings], **bookings.meta()})
+
+    return stream_json_object('bookings', bookings, serialize)
\ No newline at end of file